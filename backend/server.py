@@ -1,22 +1,64 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, UploadFile, File, Header, Query, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers, MutableHeaders
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, TEXT, DeleteOne, IndexModel, InsertOne, ReturnDocument, UpdateOne, monitoring
+from pymongo.errors import BulkWriteError, ExecutionTimeout, OperationFailure, ServerSelectionTimeoutError
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
-from typing import List, Optional, Dict
+from pydantic import BaseModel, Field, ConfigDict, TypeAdapter, ValidationError
+from typing import List, Literal, Optional, Dict
 import uuid
 from datetime import datetime, timezone, timedelta
 import jwt
 import bcrypt
 import base64
+import hashlib
+import re
+import asyncio
 import secrets
 import string
+import time
+import inspect
+import html
+import importlib.util
+import sys
+import json
+import threading
+from contextlib import asynccontextmanager
+import math
+import gzip
+import zlib
+import mimetypes
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from io import BytesIO
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+    from prometheus_client.core import GaugeMetricFamily
+except ImportError:
+    prometheus_client = None
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -37,15 +79,154 @@ if not DB_NAME:
     logger.error("DB_NAME environment variable is not set!")
     DB_NAME = "seattle_gov"
 
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+# Сколько запрос ждет свободное соединение, прежде чем получить ошибку вместо зависания
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 60000))
+
+HEALTH_PING_TIMEOUT_MS = int(os.environ.get('HEALTH_PING_TIMEOUT_MS', 500))
+# Доля занятых соединений, при которой /api/health/ready просит балансировщик снять трафик
+HEALTH_POOL_SATURATION = float(os.environ.get('HEALTH_POOL_SATURATION', 0.9))
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    # События приходят из потоков pymongo, поэтому счетчики под блокировкой
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pools: Dict[str, Dict[str, int]] = {}
+    
+    def update(self, address, **deltas):
+        key = f"{address[0]}:{address[1]}"
+        with self.lock:
+            pool = self.pools.setdefault(key, {
+                "open": 0, "checked_out": 0, "waiting": 0,
+                "checkouts": 0, "checkout_failures": 0, "cleared": 0
+            })
+            for name, delta in deltas.items():
+                pool[name] += delta
+    
+    def pool_created(self, event):
+        self.update(event.address)
+    
+    def pool_ready(self, event):
+        pass
+    
+    def pool_cleared(self, event):
+        self.update(event.address, cleared=1)
+    
+    def pool_closed(self, event):
+        pass
+    
+    def connection_created(self, event):
+        self.update(event.address, open=1)
+    
+    def connection_ready(self, event):
+        pass
+    
+    def connection_closed(self, event):
+        self.update(event.address, open=-1)
+    
+    def connection_check_out_started(self, event):
+        self.update(event.address, waiting=1)
+    
+    def connection_check_out_failed(self, event):
+        self.update(event.address, waiting=-1, checkout_failures=1)
+    
+    def connection_checked_out(self, event):
+        self.update(event.address, waiting=-1, checked_out=1, checkouts=1)
+    
+    def connection_checked_in(self, event):
+        self.update(event.address, checked_out=-1)
+    
+    def snapshot(self) -> dict:
+        with self.lock:
+            pools = {key: dict(pool) for key, pool in self.pools.items()}
+        busiest = max((pool["checked_out"] for pool in pools.values()), default=0)
+        return {
+            "max_pool_size": MONGO_MAX_POOL_SIZE,
+            "utilization": round(busiest / MONGO_MAX_POOL_SIZE, 3) if MONGO_MAX_POOL_SIZE else 0,
+            "waiting": sum(pool["waiting"] for pool in pools.values()),
+            "pools": pools
+        }
+
+pool_monitor = PoolMonitor()
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+# Если задан, /metrics требует заголовок Authorization: Bearer <METRICS_TOKEN>
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+if METRICS_ENABLED and prometheus_client is None:
+    logger.warning("prometheus_client is not installed, /metrics is disabled")
+    METRICS_ENABLED = False
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+if METRICS_ENABLED:
+    HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests", ["method", "route", "status"])
+    HTTP_LATENCY = Histogram("http_request_duration_seconds", "HTTP request latency", ["method", "route"], buckets=LATENCY_BUCKETS)
+    # Маршрут известен только после роутинга, поэтому запросы в работе считаем по методу
+    HTTP_IN_FLIGHT = Gauge("http_requests_in_flight", "HTTP requests being served", ["method"])
+    HTTP_RESPONSE_BYTES = Histogram("http_response_bytes", "HTTP response body size on the wire", ["method", "route"], buckets=BYTES_BUCKETS)
+    MONGO_COMMAND_LATENCY = Histogram("mongo_command_duration_seconds", "MongoDB command latency", ["collection", "command"], buckets=LATENCY_BUCKETS)
+    MONGO_COMMAND_FAILURES = Counter("mongo_command_failures_total", "Failed MongoDB commands", ["collection", "command"])
+    AUTH_REJECTIONS = Counter("auth_rate_limit_rejections_total", "Auth attempts rejected by the rate limiter", ["scope", "reason"])
+    PASSWORD_HASH_LATENCY = Histogram("password_hash_duration_seconds", "bcrypt time per operation", ["operation"],
+                                      buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 2, 5))
+
+class CommandMetrics(monitoring.CommandListener):
+    # started и succeeded приходят парой, но коллекция есть только в started.
+    # Если пара не пришла (оборванное соединение), запись вытесняется самой старой, когда их больше limit
+    def __init__(self, limit: int = 10000):
+        self.pending: OrderedDict = OrderedDict()
+        self.limit = limit
+        self.lock = threading.Lock()
+    
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        with self.lock:
+            self.pending[(event.request_id, event.connection_id)] = target if isinstance(target, str) else "-"
+            while len(self.pending) > self.limit:
+                self.pending.popitem(last=False)
+    
+    def succeeded(self, event):
+        collection = self.pending.pop((event.request_id, event.connection_id), "-")
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1_000_000)
+    
+    def failed(self, event):
+        collection = self.pending.pop((event.request_id, event.connection_id), "-")
+        MONGO_COMMAND_LATENCY.labels(collection, event.command_name).observe(event.duration_micros / 1_000_000)
+        MONGO_COMMAND_FAILURES.labels(collection, event.command_name).inc()
+
 client = None
 db = None
 
-try:
-    client = AsyncIOMotorClient(MONGO_URL)
-    db = client[DB_NAME]
-    logger.info(f"Connected to MongoDB: {DB_NAME}")
-except Exception as e:
-    logger.error(f"Failed to connect to MongoDB: {e}")
+def connect_mongo():
+    global client, db
+    if client is not None:
+        return
+    try:
+        client = AsyncIOMotorClient(
+            MONGO_URL,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            event_listeners=[pool_monitor, CommandMetrics()] if METRICS_ENABLED else [pool_monitor]
+        )
+        db = client[DB_NAME]
+        logger.info(f"Connected to MongoDB: {DB_NAME} (maxPoolSize={MONGO_MAX_POOL_SIZE})")
+    except Exception as e:
+        logger.error(f"Failed to connect to MongoDB: {e}")
+
+def close_mongo():
+    global client, db
+    if client is not None:
+        client.close()
+        logger.info("MongoDB connection closed")
+    client = None
+    db = None
 
 JWT_SECRET = os.environ.get('JWT_SECRET', 'majestic-gov-secret-key-2024')
 JWT_ALGORITHM = "HS256"
@@ -53,9 +234,113 @@ JWT_EXPIRATION_HOURS = 24
 
 GOVERNOR_SECRET = os.environ.get('GOVERNOR_SECRET', 'GOV-SEATTLE-2024')
 
+PRINCIPAL_CACHE_SIZE = int(os.environ.get('PRINCIPAL_CACHE_SIZE', 1024))
+PRINCIPAL_CACHE_TTL = float(os.environ.get('PRINCIPAL_CACHE_TTL', 60))
+# Права роли кладутся в JWT, и get_current_user не ходит в базу вообще
+JWT_EMBED_PERMISSIONS = os.environ.get('JWT_EMBED_PERMISSIONS', 'false').lower() == 'true'
+# Сколько секунд вложенным правам верят без базы. Отзыв прав живет в памяти процесса, поэтому другие
+# воркеры и перезапущенный сервер узнают о нем только когда вложенные права протухнут
+JWT_CLAIMS_TTL = int(os.environ.get('JWT_CLAIMS_TTL', 300))
+
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', 4))
+PASSWORD_HASH_QUEUE_LIMIT = int(os.environ.get('PASSWORD_HASH_QUEUE_LIMIT', 64))
+PASSWORD_HASH_RETRY_AFTER = int(os.environ.get('PASSWORD_HASH_RETRY_AFTER', 1))
+
+LIST_DEFAULT_LIMIT = int(os.environ.get('LIST_DEFAULT_LIMIT', 100))
+LIST_MAX_LIMIT = int(os.environ.get('LIST_MAX_LIMIT', 1000))
+
+HOME_NEWS_LIMIT = int(os.environ.get('HOME_NEWS_LIMIT', 3))
+HOME_MINISTRIES_LIMIT = int(os.environ.get('HOME_MINISTRIES_LIMIT', 4))
+HOME_LEADERSHIP_LIMIT = int(os.environ.get('HOME_LEADERSHIP_LIMIT', 50))
+HOME_TEASER_LENGTH = int(os.environ.get('HOME_TEASER_LENGTH', 300))
+# Снимок /api/home пересобирается не реже этого: записи других воркеров без change streams сюда не доходят
+HOME_SNAPSHOT_TTL = float(os.environ.get('HOME_SNAPSHOT_TTL', 300))
+
+# Cache-Control для публичных маршрутов, переопределяется через CACHE_CONTROL_<МАРШРУТ>
+CACHE_CONTROL_POLICIES = {
+    route: os.environ.get(f'CACHE_CONTROL_{route.upper()}', 'no-cache')
+    for route in ("home", "news", "news_item", "ministries", "ministry",
+                  "amendments", "amendment", "leadership", "roles", "org_chart")
+}
+
+RESPONSE_CACHE_BACKEND = os.environ.get('RESPONSE_CACHE_BACKEND', 'memory')
+RESPONSE_CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 512))
+RESPONSE_CACHE_TTL = float(os.environ.get('RESPONSE_CACHE_TTL', 300))
+# Сколько секунд после TTL можно отдавать устаревший ответ, пока он обновляется в фоне
+RESPONSE_CACHE_STALE_TTL = float(os.environ.get('RESPONSE_CACHE_STALE_TTL', 60))
+
+MEDIA_DIR = Path(os.environ.get('MEDIA_DIR', ROOT_DIR / 'media'))
+MEDIA_URL_PREFIX = "/api/media/"
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 10 * 1024 * 1024))
+UPLOAD_CHUNK_SIZE = 64 * 1024
+IMAGE_WORKERS = int(os.environ.get('IMAGE_WORKERS', 2))
+IMAGE_QUALITY = int(os.environ.get('IMAGE_QUALITY', 80))
+# Максимальная сторона каждого варианта; все варианты кодируются в WebP
+IMAGE_VARIANTS = {"thumb": 160, "card": 480, "full": 1600}
+
+RATE_LIMIT_BACKEND = os.environ.get('RATE_LIMIT_BACKEND', 'memory')
+RATE_LIMIT_SIZE = int(os.environ.get('RATE_LIMIT_SIZE', 100000))
+# Токен-бакеты для /auth/*: емкость и пополнение в токенах в секунду
+RATE_LIMIT_IP_BURST = float(os.environ.get('RATE_LIMIT_IP_BURST', 20))
+RATE_LIMIT_IP_RATE = float(os.environ.get('RATE_LIMIT_IP_RATE', 0.2))
+RATE_LIMIT_USER_BURST = float(os.environ.get('RATE_LIMIT_USER_BURST', 5))
+RATE_LIMIT_USER_RATE = float(os.environ.get('RATE_LIMIT_USER_RATE', 1 / 60))
+# После N неудач подряд ключ блокируется на base * 2^(n - N) секунд, но не дольше max
+AUTH_LOCKOUT_USER_THRESHOLD = int(os.environ.get('AUTH_LOCKOUT_USER_THRESHOLD', 5))
+AUTH_LOCKOUT_IP_THRESHOLD = int(os.environ.get('AUTH_LOCKOUT_IP_THRESHOLD', 20))
+AUTH_LOCKOUT_BASE = float(os.environ.get('AUTH_LOCKOUT_BASE', 30))
+AUTH_LOCKOUT_MAX = float(os.environ.get('AUTH_LOCKOUT_MAX', 900))
+# Счетчик неудач обнуляется, если с последней прошло больше этого окна
+AUTH_FAILURE_WINDOW = float(os.environ.get('AUTH_FAILURE_WINDOW', AUTH_LOCKOUT_MAX * 2))
+# За прокси адрес клиента берется из последнего элемента X-Forwarded-For
+RATE_LIMIT_TRUST_FORWARDED = os.environ.get('RATE_LIMIT_TRUST_FORWARDED', 'false').lower() == 'true'
+
+# Хвост change stream базы: записи других воркеров и узлов сбрасывают кеши этого процесса.
+# Требует replica set (достаточно одноузлового)
+CHANGE_STREAMS_ENABLED = os.environ.get('CHANGE_STREAMS_ENABLED', 'false').lower() == 'true'
+# Под этим именем в change_stream_state хранится токен возобновления
+CHANGE_STREAM_NAME = os.environ.get('CHANGE_STREAM_NAME', 'default')
+CHANGE_STREAM_CHECKPOINT_SECONDS = float(os.environ.get('CHANGE_STREAM_CHECKPOINT_SECONDS', 5))
+CHANGE_STREAM_MAX_BACKOFF = float(os.environ.get('CHANGE_STREAM_MAX_BACKOFF', 30))
+# Сколько пар _id -> id помнить на коллекцию: по ним удаления адресуются конкретному документу
+CHANGE_STREAM_ID_CACHE = int(os.environ.get('CHANGE_STREAM_ID_CACHE', 100000))
+
+# Лента /api/stream/updates: кольцевой буфер для Last-Event-ID, очередь на клиента, пинг простаивающих соединений
+SSE_RING_SIZE = int(os.environ.get('SSE_RING_SIZE', 1000))
+SSE_CLIENT_QUEUE = int(os.environ.get('SSE_CLIENT_QUEUE', 64))
+SSE_MAX_CLIENTS = int(os.environ.get('SSE_MAX_CLIENTS', 5000))
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 15))
+SSE_RETRY_MS = int(os.environ.get('SSE_RETRY_MS', 3000))
+
+# Параметры `python -m backend.server serve`; каждый воркер - отдельный процесс со своим клиентом Mongo
+SERVER_HOST = os.environ.get('HOST', '0.0.0.0')
+SERVER_PORT = int(os.environ.get('PORT', 8000))
+SERVER_WORKERS = int(os.environ.get('WEB_CONCURRENCY', 1))
+# Сколько одновременных соединений принимает воркер, сверх этого отвечает 503; 0 - без ограничения
+SERVER_LIMIT_CONCURRENCY = int(os.environ.get('SERVER_LIMIT_CONCURRENCY', 0))
+SERVER_BACKLOG = int(os.environ.get('SERVER_BACKLOG', 2048))
+SERVER_KEEPALIVE = int(os.environ.get('SERVER_KEEPALIVE', 5))
+# Открытые SSE-соединения сами не закрываются: через столько секунд после сигнала остановки они обрываются
+SERVER_GRACEFUL_TIMEOUT = int(os.environ.get('SERVER_GRACEFUL_TIMEOUT', 10))
+
 security = HTTPBearer()
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect_mongo()
+    await ensure_indexes()
+    if FRONTEND_DIR.exists():
+        await asyncio.to_thread(static_assets.load)
+    if CHANGE_STREAMS_ENABLED:
+        await change_bus.start()
+    yield
+    await change_bus.stop()
+    password_hasher.shutdown()
+    shutdown_image_pool()
+    close_mongo()
+
+app = FastAPI(lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 
 class RolePermissions(BaseModel):
@@ -78,6 +363,7 @@ class RoleResponse(BaseModel):
     access_code: str
     created_at: str
     created_by: str
+    version: int = 0
 
 class LeadershipCreate(BaseModel):
     name: str
@@ -101,6 +387,7 @@ class LeadershipResponse(BaseModel):
     appointed_date: str
     order: int
     created_at: str
+    version: int = 0
 
 class UserCreate(BaseModel):
     username: str
@@ -164,6 +451,7 @@ class MinistryResponse(BaseModel):
     staff: List[str] = []
     contact_info: Optional[str] = None
     created_at: str
+    version: int = 0
 
 class NewsCreate(BaseModel):
     title: str
@@ -179,6 +467,7 @@ class NewsResponse(BaseModel):
     image: Optional[str] = None
     is_archive: bool = False
     created_at: str
+    version: int = 0
 
 class AmendmentCreate(BaseModel):
     number: str
@@ -194,37 +483,1276 @@ class AmendmentResponse(BaseModel):
     content: str
     status: str
     created_at: str
+    version: int = 0
+
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', 500))
+
+class NewsBatchOperation(BaseModel):
+    op: Literal["update", "archive", "unarchive", "delete"]
+    id: str
+    data: Optional[NewsCreate] = None
+    version: Optional[int] = None
+
+class NewsBatchRequest(BaseModel):
+    operations: List[NewsBatchOperation] = Field(..., min_length=1, max_length=BATCH_MAX_OPERATIONS)
+
+class AmendmentBatchOperation(BaseModel):
+    op: Literal["update", "set_status", "delete"]
+    id: str
+    data: Optional[AmendmentCreate] = None
+    status: Optional[str] = None
+    version: Optional[int] = None
+
+class AmendmentBatchRequest(BaseModel):
+    operations: List[AmendmentBatchOperation] = Field(..., min_length=1, max_length=BATCH_MAX_OPERATIONS)
+
+class LeadershipReorderRequest(BaseModel):
+    # id руководителей в новом порядке; order становится индексом в списке
+    ids: List[str] = Field(..., min_length=1, max_length=BATCH_MAX_OPERATIONS)
+
+class BatchItemResult(BaseModel):
+    id: str
+    op: str
+    status: str  # ok | not_found | conflict | duplicate | invalid | error
+    version: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
+
+INDEXES = {
+    "users": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("username", ASCENDING)], unique=True, name="username_unique"),
+        IndexModel([("role", ASCENDING)], name="role"),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+    ],
+    "roles": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("access_code", ASCENDING)], unique=True, name="access_code_unique"),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+    ],
+    "news": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("is_archive", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)], name="is_archive_created_at_id"),
+        IndexModel([("title", TEXT), ("content", TEXT)], name="text_search",
+                   default_language="russian", weights={"title": 10, "content": 1}),
+    ],
+    "amendments": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("created_at", DESCENDING), ("id", DESCENDING)], name="created_at_id"),
+        IndexModel([("title", TEXT), ("content", TEXT)], name="text_search",
+                   default_language="russian", weights={"title": 10, "content": 1}),
+    ],
+    "ministries": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("created_at", ASCENDING), ("id", ASCENDING)], name="created_at_id"),
+        IndexModel([("name", TEXT), ("description", TEXT)], name="text_search",
+                   default_language="russian", weights={"name": 10, "description": 1}),
+    ],
+    "leadership": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+        IndexModel([("order", ASCENDING), ("id", ASCENDING)], name="order_id"),
+    ],
+    "media": [
+        IndexModel([("id", ASCENDING)], unique=True, name="id_unique"),
+    ],
+    "rate_limits": [
+        IndexModel([("key", ASCENDING)], unique=True, name="key_unique"),
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0, name="expires_at_ttl"),
+    ],
+}
+
+def keyset_filter(query: dict, sort_field: str, descending: bool, value, last_id: str) -> dict:
+    # Страница после курсора: строго дальше по паре (sort_field, id)
+    op = "$lt" if descending else "$gt"
+    return {"$and": [query, {"$or": [
+        {sort_field: {op: value}},
+        {sort_field: value, "id": {op: last_id}}
+    ]}]}
+
+def count_pipeline(query: dict, limit: Optional[int] = None) -> list:
+    # Так count_documents выполняется на сервере
+    return [{"$match": query}, *([{"$limit": limit}] if limit else []), {"$group": {"_id": 1, "n": {"$sum": 1}}}]
+
+# Все формы запросов, которые выполняет сервер: (коллекция, фильтр, сортировка)
+QUERY_SHAPES = [
+    ("users", {"id": "x"}, None),
+    ("users", {"username": "x"}, None),
+    ("users", {"role": "governor"}, None),
+    ("users", {}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("roles", {"id": "x"}, None),
+    ("roles", {"access_code": "x"}, None),
+    ("roles", {}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("news", {"id": "x"}, None),
+    ("news", {"is_archive": False}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("news", {"is_archive": True}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("amendments", {"id": "x"}, None),
+    ("amendments", {}, [("created_at", DESCENDING), ("id", DESCENDING)]),
+    ("ministries", {"id": "x"}, None),
+    ("ministries", {}, [("created_at", ASCENDING), ("id", ASCENDING)]),
+    ("leadership", {"id": "x"}, None),
+    ("leadership", {}, [("order", ASCENDING), ("id", ASCENDING)]),
+    ("media", {"id": "x"}, None),
+    ("rate_limits", {"key": "x"}, None),
+]
+# Те же списки со второй страницы: fetch_page добавляет к фильтру условие курсора
+QUERY_SHAPES += [
+    (collection, keyset_filter(query, sort[0][0], sort[0][1] == DESCENDING, "x", "x"), sort)
+    for collection, query, sort in QUERY_SHAPES if sort
+]
+
+# Агрегации и подсчеты: (коллекция, название, функция, собирающая конвейер).
+# Конвейеры собираются при вызове, потому что их функции объявлены ниже
+AGGREGATION_SHAPES = [
+    ("news", "home news", lambda: home_news_pipeline()),
+    ("ministries", "org chart", lambda: org_chart_pipeline()),
+    ("ministries", "org chart of one ministry", lambda: org_chart_pipeline("x")),
+    ("news", "count unarchived news", lambda: count_pipeline({"is_archive": False})),
+    ("users", "count users of a role", lambda: count_pipeline({"role": "x"})),
+    *[
+        (collection, "count by id (If-Match 412/404)", lambda: count_pipeline({"id": "x"}, limit=1))
+        for collection in ("roles", "leadership", "ministries", "news", "amendments")
+    ],
+]
+
+async def ensure_indexes():
+    if db is None:
+        return
+    for collection_name, models in INDEXES.items():
+        for model in models:
+            name = model.document["name"]
+            started = time.perf_counter()
+            try:
+                await db[collection_name].create_indexes([model])
+                logger.info(f"Index {collection_name}.{name} ready in {time.perf_counter() - started:.2f}s")
+            except OperationFailure as e:
+                logger.error(f"Failed to build index {collection_name}.{name}: {e}")
+            except ServerSelectionTimeoutError as e:
+                logger.error(f"MongoDB unreachable, skipping index provisioning: {e}")
+                return
+
+def plan_stages(plan: dict) -> List[str]:
+    stages = [plan.get("stage", "")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+def winning_plans(explain) -> List[dict]:
+    # План агрегации лежит либо сверху, либо в стадии $cursor, у $facet - внутри нее
+    if isinstance(explain, dict):
+        if "winningPlan" in explain:
+            return [explain["winningPlan"]]
+        return [plan for value in explain.values() for plan in winning_plans(value)]
+    if isinstance(explain, list):
+        return [plan for value in explain for plan in winning_plans(value)]
+    return []
+
+async def explain_queries() -> List[dict]:
+    if db is None:
+        raise RuntimeError("Database not available")
+    report = []
+    for collection_name, query, sort in QUERY_SHAPES:
+        cursor = db[collection_name].find(query).limit(LIST_DEFAULT_LIMIT)
+        if sort:
+            cursor = cursor.sort(sort)
+        explain = await cursor.explain()
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+        report.append({
+            "collection": collection_name,
+            "kind": "find",
+            "query": query,
+            "sort": sort,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages
+        })
+    for collection_name, name, pipeline in AGGREGATION_SHAPES:
+        explain = await db.command({
+            "explain": {"aggregate": collection_name, "pipeline": pipeline(), "cursor": {}},
+            "verbosity": "queryPlanner"
+        })
+        stages = [stage for plan in winning_plans(explain) for stage in plan_stages(plan)]
+        report.append({
+            "collection": collection_name,
+            "kind": "aggregate",
+            "query": name,
+            "sort": None,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages
+        })
+    return report
+
+class HomeNewsItem(BaseModel):
+    id: str
+    title: str
+    teaser: str = ""
+    image: Optional[str] = None
+    created_at: str
+
+class HomeMinistryItem(BaseModel):
+    id: str
+    name: str
+    logo: Optional[str] = None
+
+class HomeLeaderItem(BaseModel):
+    id: str
+    name: str
+    surname: str
+    position: str
+    photo: Optional[str] = None
+    email: Optional[str] = None
+    passport_number: Optional[str] = None
+    appointed_date: str
+
+class HomeCounts(BaseModel):
+    news: int = 0
+    ministries: int = 0
+    leadership: int = 0
+    amendments: int = 0
+
+class HomeResponse(BaseModel):
+    news: List[HomeNewsItem] = []
+    ministries: List[HomeMinistryItem] = []
+    leadership: List[HomeLeaderItem] = []
+    counts: HomeCounts = HomeCounts()
+
+# Оргструктура: только то, что нужно для схемы; права и коды доступа ролей наружу не отдаются
+class OrgRole(BaseModel):
+    id: str
+    name: str
+
+class OrgDeputy(BaseModel):
+    id: str
+    name: str
+    photo: Optional[str] = None
+    position: str
+    appointed_date: str
+    role: Optional[OrgRole] = None
+
+class OrgMinister(BaseModel):
+    id: str
+    name: str
+    photo: Optional[str] = None
+    appointed_date: str
+    role: Optional[OrgRole] = None
+    deputies: List[OrgDeputy] = []
+
+class OrgMinistry(BaseModel):
+    id: str
+    name: str
+    logo: Optional[str] = None
+    minister: Optional[OrgMinister] = None
+    staff: List[str] = []
+
+class OrgLeader(BaseModel):
+    id: str
+    name: str
+    surname: str
+    position: str
+    photo: Optional[str] = None
+    appointed_date: str
+    order: int
+
+class OrgChartResponse(BaseModel):
+    leadership: List[OrgLeader] = []
+    ministries: List[OrgMinistry] = []
+
+# Чтение отдает документы Mongo как есть: схема гарантируется при записи (модели *Create
+# и normalize-documents для старых записей). READ_VALIDATION=true возвращает проверку на чтении.
+READ_VALIDATION = os.environ.get('READ_VALIDATION', 'false').lower() == 'true'
+
+def dump_json(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+def response_projection(model) -> dict:
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+LEADERSHIP_PROJECTION = response_projection(LeadershipResponse)
+MINISTRY_PROJECTION = response_projection(MinistryResponse)
+NEWS_PROJECTION = response_projection(NewsResponse)
+AMENDMENT_PROJECTION = response_projection(AmendmentResponse)
+
+ROLE_LIST = TypeAdapter(List[dict])
+LEADERSHIP_LIST = TypeAdapter(List[LeadershipResponse])
+MINISTRY_LIST = TypeAdapter(List[MinistryResponse])
+MINISTRY_ITEM = TypeAdapter(MinistryResponse)
+NEWS_LIST = TypeAdapter(List[NewsResponse])
+NEWS_ITEM = TypeAdapter(NewsResponse)
+AMENDMENT_LIST = TypeAdapter(List[AmendmentResponse])
+AMENDMENT_ITEM = TypeAdapter(AmendmentResponse)
+ORG_CHART = TypeAdapter(OrgChartResponse)
+ORG_MINISTRY = TypeAdapter(OrgMinistry)
 
 def generate_access_code(length: int = 8) -> str:
     chars = string.ascii_uppercase + string.digits
     return ''.join(secrets.choice(chars) for _ in range(length))
 
-def hash_password(password: str) -> str:
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+USER_LIST_FIELDS = {"id", "username", "role", "role_name", "created_at"}
+
+def parse_fields(fields: Optional[str], allowed) -> Optional[List[str]]:
+    if not fields:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return requested
+
+def encode_cursor(value, last_id: str) -> str:
+    # Курсор непрозрачен для клиента: пара (ключ сортировки, id) в urlsafe base64 без экранирования "+" и ":"
+    return base64.urlsafe_b64encode(json.dumps([str(value), last_id]).encode()).decode().rstrip("=")
+
+def parse_cursor(after: str, cast=str):
+    try:
+        value, last_id = json.loads(base64.urlsafe_b64decode(after + "=" * (-len(after) % 4)))
+        if not isinstance(value, str) or not isinstance(last_id, str) or not last_id:
+            raise ValueError(after)
+        return cast(value), last_id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_page(collection, query: dict, projection: dict, sort_field: str, descending: bool,
+                     after: Optional[str], limit: int, fields: Optional[List[str]], cast=str):
+    if fields is not None:
+        projection = {"_id": 0, "id": 1, sort_field: 1, **{field: 1 for field in fields}}
+    if after:
+        value, last_id = parse_cursor(after, cast)
+        query = keyset_filter(query, sort_field, descending, value, last_id)
+    direction = -1 if descending else 1
+    cursor = collection.find(query, projection).sort([(sort_field, direction), ("id", direction)])
+    docs = await cursor.limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1].get(sort_field), docs[-1]["id"])
+    return docs, next_cursor
+
+def page_response(docs: List[dict], next_cursor: Optional[str], response: Response, fields: Optional[List[str]]):
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    # Урезанные документы не проходят response_model, поэтому отдаем их как есть
+    if fields is not None:
+        return JSONResponse(docs, headers=dict(response.headers))
+    return docs
+
+def parse_if_match(if_match: Optional[str]) -> Optional[int]:
+    if not if_match or if_match.strip() == "*":
+        return None
+    try:
+        return int(if_match.strip().removeprefix("W/").strip('"'))
+    except ValueError:
+        # Тег не от карточки (например, хеш списка) не совпадает ни с одной версией: ответ будет 412
+        return -1
+
+async def update_versioned(collection, doc_id: str, update: dict, if_match: Optional[str], not_found: str) -> dict:
+    query = {"id": doc_id}
+    expected = parse_if_match(if_match)
+    if expected is not None:
+        # У документов, созданных до появления версий, поля version нет
+        query["version"] = {"$in": [0, None]} if expected == 0 else expected
+    updated = await collection.find_one_and_update(
+        query,
+        {"$set": update, "$inc": {"version": 1}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if updated is None:
+        if expected is not None and await collection.count_documents({"id": doc_id}, limit=1):
+            raise HTTPException(status_code=412, detail="Document was modified by someone else")
+        raise HTTPException(status_code=404, detail=not_found)
+    return updated
+
+async def run_batch(collection: str, items: List[dict]) -> List[dict]:
+    # items: {"op", "id", "version" (ожидаемая или None), "update" ($-операторы или None для удаления), "error"}
+    ids = list({item["id"] for item in items})
+    existing = {
+        doc["id"]: doc.get("version", 0)
+        async for doc in db[collection].find({"id": {"$in": ids}}, {"_id": 0, "id": 1, "version": 1})
+    }
+    results, writes, written = [], [], []
+    seen = set()
+    for item in items:
+        result = {"id": item["id"], "op": item["op"], "status": "ok"}
+        results.append(result)
+        if item.get("error"):
+            result.update(status="invalid", error=item["error"])
+        elif item["id"] in seen:
+            result.update(status="duplicate", error="id appears earlier in this batch")
+        elif item["id"] not in existing:
+            result["status"] = "not_found"
+        elif item.get("version") is not None and item["version"] != existing[item["id"]]:
+            result.update(status="conflict", version=existing[item["id"]])
+        else:
+            seen.add(item["id"])
+            query = {"id": item["id"]}
+            if item.get("version") is not None:
+                query["version"] = item["version"]
+            if item["update"] is None:
+                writes.append(DeleteOne(query))
+                result["version"] = None
+            else:
+                writes.append(UpdateOne(query, {**item["update"], "$inc": {"version": 1}}))
+                result["version"] = existing[item["id"]] + 1
+            written.append(result)
+    if not writes:
+        return results
+    
+    try:
+        details = (await db[collection].bulk_write(writes, ordered=False)).bulk_api_result
+    except BulkWriteError as e:
+        details = e.details
+        for error in details.get("writeErrors", []):
+            written[error["index"]].update(status="error", error=error.get("errmsg", "write failed"), version=None)
+    # Версию могли поменять между предварительным чтением и bulk_write: тогда фильтр не совпал
+    if details.get("nMatched", 0) + details.get("nRemoved", 0) < len(writes):
+        current = {
+            doc["id"]: doc.get("version", 0)
+            async for doc in db[collection].find({"id": {"$in": [r["id"] for r in written]}}, {"_id": 0, "id": 1, "version": 1})
+        }
+        for result in written:
+            if result["status"] != "ok":
+                continue
+            if result["version"] is None and result["id"] in current:
+                result.update(status="conflict", version=current[result["id"]])
+            elif result["version"] is not None and current.get(result["id"]) != result["version"]:
+                result.update(status="conflict", version=current.get(result["id"]))
+    # По событию на документ: живые клиенты обновляют строки, а не перечитывают весь список
+    for result in written:
+        if result["status"] == "ok":
+            await publish_change(collection, "delete" if result["version"] is None else "update", result["id"])
+    return results
+
+DATA_URL_RE = re.compile(r'^data:([^;,]*)((?:;[^;,]*)*),', re.IGNORECASE)
+MEDIA_DIGEST_RE = re.compile(r'^[0-9a-f]{64}$')
+
+# Поля с изображениями, которые раньше хранились как data: URL
+MEDIA_FIELDS = {
+    "ministries": ["logo", "minister.photo", "minister.deputies.photo"],
+    "leadership": ["photo"],
+    "news": ["image"],
+}
+
+def media_path(digest: str) -> Path:
+    return MEDIA_DIR / digest[:2] / digest
 
-def verify_password(password: str, hashed: str) -> bool:
-    return bcrypt.checkpw(password.encode(), hashed.encode())
+def _write_blob(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
 
-def create_token(user_id: str, username: str, role: str) -> str:
+async def register_blob(digest: str, content_type: str, size: int):
+    if db is None:
+        return
+    await db.media.update_one(
+        {"id": digest},
+        {"$setOnInsert": {
+            "id": digest,
+            "content_type": content_type,
+            "size": size,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }},
+        upsert=True
+    )
+
+async def store_blob(data: bytes, content_type: str) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    path = media_path(digest)
+    if not path.exists():
+        await asyncio.to_thread(_write_blob, path, data)
+    await register_blob(digest, content_type, len(data))
+    return digest
+
+# Типы, которые /api/media отдает как есть; все остальное уходит как application/octet-stream
+IMAGE_CONTENT_TYPES = {"image/png", "image/jpeg", "image/gif", "image/webp", "image/avif"}
+
+def sniff_image_type(head: bytes) -> Optional[str]:
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return "image/avif"
+    return None
+
+async def spool_upload(file: UploadFile):
+    tmp_dir = MEDIA_DIR / "tmp"
+    tmp_dir.mkdir(parents=True, exist_ok=True)
+    tmp_path = tmp_dir / uuid.uuid4().hex
+    hasher = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        with open(tmp_path, "wb") as out:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_UPLOAD_BYTES:
+                    raise HTTPException(status_code=413, detail=f"File is larger than {MAX_UPLOAD_BYTES} bytes")
+                if len(head) < 16:
+                    head += chunk[:16]
+                hasher.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+    return tmp_path, hasher.hexdigest(), size, head
+
+def _render_variants(path: str, sizes: Dict[str, int], quality: int) -> Dict[str, bytes]:
+    variants = {}
+    with Image.open(path) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or "A" in image.getbands() else "RGB")
+        for name, size in sizes.items():
+            variant = image.copy()
+            variant.thumbnail((size, size), Image.LANCZOS)
+            buffer = BytesIO()
+            variant.save(buffer, "WEBP", quality=quality, method=4)
+            variants[name] = buffer.getvalue()
+    return variants
+
+image_pool = None
+
+async def generate_variants(digest: str, mime_type: str) -> Dict[str, str]:
+    # Без Pillow и для анимированных GIF отдаем только оригинал
+    if Image is None or mime_type == "image/gif" or db is None:
+        return {}
+    existing = await db.media.find_one({"id": digest}, {"_id": 0, "variants": 1})
+    if existing and existing.get("variants"):
+        return existing["variants"]
+    
+    global image_pool
+    if image_pool is None:
+        image_pool = ProcessPoolExecutor(max_workers=IMAGE_WORKERS)
+    loop = asyncio.get_running_loop()
+    try:
+        rendered = await loop.run_in_executor(
+            image_pool, _render_variants, str(media_path(digest)), IMAGE_VARIANTS, IMAGE_QUALITY
+        )
+    except Exception as e:
+        logger.warning(f"Failed to render variants for {digest}: {e}")
+        return {}
+    variants = {name: await store_blob(data, "image/webp") for name, data in rendered.items()}
+    await db.media.update_one({"id": digest}, {"$set": {"variants": variants}})
+    return variants
+
+def shutdown_image_pool():
+    # Следующий generate_variants создаст пул заново
+    global image_pool
+    pool, image_pool = image_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False)
+
+def decode_data_url(value: str):
+    match = DATA_URL_RE.match(value)
+    if not match or ";base64" not in match.group(2).lower():
+        return None
+    try:
+        data = base64.b64decode(value[match.end():], validate=False)
+    except (ValueError, TypeError):
+        return None
+    return (match.group(1) or "application/octet-stream"), data
+
+async def externalize_media(value, strict: bool = True):
+    if not isinstance(value, str) or not value.startswith("data:"):
+        return value
+    decoded = decode_data_url(value)
+    if decoded is None:
+        return value
+    # Заявленному в data: URL типу не верим: text/html или SVG с нашего домена - это XSS
+    content_type = sniff_image_type(decoded[1][:16])
+    if content_type is None:
+        if strict:
+            raise ValueError("inline data must be a PNG, JPEG, GIF, WebP or AVIF image")
+        logger.warning(f"Inline media declared as '{decoded[0]}' is not an image, storing as application/octet-stream")
+        content_type = "application/octet-stream"
+    digest = await store_blob(decoded[1], content_type)
+    return f"{MEDIA_URL_PREFIX}{digest}"
+
+async def _externalize_path(container, parts: List[str], strict: bool = True):
+    if isinstance(container, list):
+        changed = False
+        for item in container:
+            changed = await _externalize_path(item, parts, strict) or changed
+        return changed
+    if not isinstance(container, dict) or parts[0] not in container:
+        return False
+    if len(parts) > 1:
+        return await _externalize_path(container[parts[0]], parts[1:], strict)
+    new_value = await externalize_media(container[parts[0]], strict)
+    if new_value is container[parts[0]]:
+        return False
+    container[parts[0]] = new_value
+    return True
+
+async def externalize_fields(collection: str, doc: dict) -> dict:
+    # data: URL из форм и импорта сразу уходят в хранилище, в документах остаются только ссылки
+    for field in MEDIA_FIELDS.get(collection, []):
+        await _externalize_path(doc, field.split("."))
+    return doc
+
+async def externalize_request(collection: str, doc: dict) -> dict:
+    try:
+        return await externalize_fields(collection, doc)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def migrate_inline_media() -> Dict[str, int]:
+    if db is None:
+        raise RuntimeError("Database not available")
+    migrated = {}
+    for collection_name, fields in MEDIA_FIELDS.items():
+        collection = db[collection_name]
+        query = {"$or": [{field: {"$regex": "^data:"}} for field in fields]}
+        count = 0
+        async for doc in collection.find(query, {"_id": 0}):
+            updates = {}
+            for field in fields:
+                parts = field.split(".")
+                # Старые данные не отбрасываем: не-картинки сохраняются как application/octet-stream
+                if await _externalize_path(doc, parts, strict=False):
+                    updates[parts[0]] = doc[parts[0]]
+            if updates:
+                # Версия растет при любом изменении: на ней держатся ETag карточек и If-Match
+                await collection.update_one({"id": doc["id"]}, {"$set": updates, "$inc": {"version": 1}})
+                count += 1
+        migrated[collection_name] = count
+        logger.info(f"Migrated inline media in {collection_name}: {count} documents")
+    return migrated
+
+RESPONSE_MODELS = {
+    "roles": RoleResponse,
+    "leadership": LeadershipResponse,
+    "ministries": MinistryResponse,
+    "news": NewsResponse,
+    "amendments": AmendmentResponse,
+}
+
+async def normalize_documents() -> Dict[str, Dict[str, int]]:
+    # Дописывает значения по умолчанию в старые документы, чтобы быстрый путь чтения отдавал полную схему
+    if db is None:
+        raise RuntimeError("Database not available")
+    report = {}
+    for collection_name, model in RESPONSE_MODELS.items():
+        collection = db[collection_name]
+        stats = {"checked": 0, "updated": 0, "invalid": 0}
+        async for doc in collection.find({}, response_projection(model)):
+            stats["checked"] += 1
+            try:
+                normalized = model.model_validate(doc).model_dump(mode="json")
+            except Exception as e:
+                stats["invalid"] += 1
+                logger.warning(f"{collection_name} {doc.get('id')} does not match {model.__name__}: {e}")
+                continue
+            updates = {key: value for key, value in normalized.items() if doc.get(key, ...) != value}
+            # Отсутствующая версия и так читается как 0
+            updates.pop("version", None)
+            if updates:
+                await collection.update_one({"id": doc["id"]}, {"$set": updates, "$inc": {"version": 1}})
+                stats["updated"] += 1
+        report[collection_name] = stats
+        logger.info(f"Normalized {collection_name}: {stats}")
+    return report
+
+class PasswordHasher:
+    # bcrypt отпускает GIL, поэтому пула потоков достаточно, чтобы не блокировать event loop.
+    # workers=0 выполняет хеширование прямо в event loop (старое поведение).
+    # Пул создается при первом хешировании и заново после shutdown(), так что lifespan можно запускать повторно.
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.queue_limit = queue_limit
+        self.pending = 0
+        self.stats = {
+            "completed": 0,
+            "rejected": 0,
+            "queue_wait_seconds_total": 0.0,
+            "queue_wait_seconds_max": 0.0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+        }
+
+    async def run(self, func, *args):
+        if self.pending >= self.queue_limit:
+            self.stats["rejected"] += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Server is busy, please retry",
+                headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER)}
+            )
+        
+        def timed():
+            started = time.perf_counter()
+            result = func(*args)
+            return result, started, time.perf_counter()
+        
+        self.pending += 1
+        enqueued = time.perf_counter()
+        try:
+            if self.workers <= 0:
+                result, started, finished = timed()
+            else:
+                if self.executor is None:
+                    self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+                loop = asyncio.get_running_loop()
+                result, started, finished = await loop.run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+        
+        queue_wait = started - enqueued
+        hash_time = finished - started
+        self.stats["completed"] += 1
+        self.stats["queue_wait_seconds_total"] += queue_wait
+        self.stats["queue_wait_seconds_max"] = max(self.stats["queue_wait_seconds_max"], queue_wait)
+        self.stats["hash_seconds_total"] += hash_time
+        self.stats["hash_seconds_max"] = max(self.stats["hash_seconds_max"], hash_time)
+        return result
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": PASSWORD_HASH_WORKERS,
+            "queue_limit": self.queue_limit,
+            "pending": self.pending,
+            **self.stats
+        }
+
+    def shutdown(self):
+        executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+password_hasher = PasswordHasher(PASSWORD_HASH_WORKERS, PASSWORD_HASH_QUEUE_LIMIT)
+
+def _bcrypt_hash(password: str) -> str:
+    started = time.perf_counter()
+    hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    if METRICS_ENABLED:
+        PASSWORD_HASH_LATENCY.labels("hash").observe(time.perf_counter() - started)
+    return hashed
+
+def _bcrypt_check(password: str, hashed: str) -> bool:
+    started = time.perf_counter()
+    valid = bcrypt.checkpw(password.encode(), hashed.encode())
+    if METRICS_ENABLED:
+        PASSWORD_HASH_LATENCY.labels("verify").observe(time.perf_counter() - started)
+    return valid
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.run(_bcrypt_hash, password)
+
+async def verify_password(password: str, hashed: str) -> bool:
+    return await password_hasher.run(_bcrypt_check, password, hashed)
+
+class TTLCache:
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                del self.entries[key]
+            self.stats["misses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[1]
+
+    def set(self, key, value):
+        self.entries[key] = (time.monotonic() + self.ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def pop(self, key):
+        self.entries.pop(key, None)
+
+    def remove_where(self, predicate):
+        for key in [key for key, (_, value) in self.entries.items() if predicate(key, value)]:
+            del self.entries[key]
+
+    def clear(self):
+        self.entries.clear()
+
+    def snapshot(self) -> dict:
+        return {"size": len(self.entries), "maxsize": self.maxsize, "ttl": self.ttl, **self.stats}
+
+# Подписчики на изменения коллекций: обработчики записи вызывают publish_change с source="local",
+# ChangeStreamBus - с source="stream" (туда приходят и записи этого же процесса)
+CHANGE_SOURCES = ("local", "stream")
+change_listeners: Dict[str, list] = {}
+
+def on_change(*collections: str, source: Optional[str] = None):
+    # source=None - все события, иначе только из указанного источника
+    if source is not None and source not in CHANGE_SOURCES:
+        raise ValueError(f"Unknown change source '{source}'")
+    def decorator(func):
+        for collection in collections:
+            change_listeners.setdefault(collection, []).append((func, source))
+        return func
+    return decorator
+
+async def publish_change(collection: str, op: str, doc_id: Optional[str] = None, source: str = "local"):
+    for listener, wanted in change_listeners.get(collection, []):
+        if wanted is not None and wanted != source:
+            continue
+        try:
+            result = listener(collection, op, doc_id)
+            if inspect.isawaitable(result):
+                await result
+        except Exception:
+            logger.exception(f"Change listener {listener.__name__} failed for {collection}")
+
+# Метка запуска процесса: номера событий /api/stream/updates сравнимы только внутри нее
+BOOT_ID = uuid.uuid4().hex[:8]
+
+class ChangeStreamBus:
+    # Один change stream на базу, отфильтрованный по коллекциям. Удаления несут только documentKey._id,
+    # а документы адресуются полем id: соответствие _id -> id запоминается из вставок и обновлений
+    # и заранее читается из базы при старте. Удаление неизвестного документа сбрасывает всю коллекцию
+    def __init__(self, name: str, collections: tuple):
+        self.name = name
+        self.collections = collections
+        self.ids: Dict[str, OrderedDict] = {collection: OrderedDict() for collection in collections}
+        self.task: Optional[asyncio.Task] = None
+        self.token = None
+        self.saved_token = None
+        self.saved_at = 0.0
+        self.connected = False
+        self.stats = {"events": 0, "restarts": 0, "history_lost": 0, "resumed": False, "last_event_at": None,
+                      "last_error": None, "unresolved_deletes": 0}
+
+    def pipeline(self) -> list:
+        return [
+            {"$match": {"ns.coll": {"$in": list(self.collections)}}},
+            {"$project": {"operationType": 1, "ns": 1, "documentKey": 1, "fullDocument.id": 1}},
+        ]
+
+    def remember(self, collection: str, key, doc_id: str):
+        ids = self.ids.setdefault(collection, OrderedDict())
+        ids[key] = doc_id
+        ids.move_to_end(key)
+        while len(ids) > CHANGE_STREAM_ID_CACHE:
+            ids.popitem(last=False)
+
+    async def load_ids(self):
+        for collection in self.collections:
+            cursor = db[collection].find({}, {"_id": 1, "id": 1}).sort("_id", DESCENDING).limit(CHANGE_STREAM_ID_CACHE)
+            async for doc in cursor:
+                if doc.get("id") is not None:
+                    self.ids[collection][doc["_id"]] = doc["id"]
+                    self.ids[collection].move_to_end(doc["_id"], last=False)
+
+    def normalize(self, change: dict) -> Optional[tuple]:
+        collection = change.get("ns", {}).get("coll")
+        op = change["operationType"]
+        if op == "invalidate":
+            return None
+        if op in ("drop", "rename"):
+            self.ids.get(collection, {}).clear()
+            return collection, "drop", None
+        key = (change.get("documentKey") or {}).get("_id")
+        ids = self.ids.get(collection, {})
+        if op == "delete":
+            doc_id = ids.pop(key, None)
+            if doc_id is None:
+                self.stats["unresolved_deletes"] += 1
+            return collection, op, doc_id
+        if op == "replace":
+            op = "update"
+        # updateLookup не находит документ, удаленный сразу после изменения
+        doc_id = (change.get("fullDocument") or {}).get("id") or ids.get(key)
+        if doc_id is not None and key is not None:
+            self.remember(collection, key, doc_id)
+        return collection, op, doc_id
+
+    async def start(self):
+        if self.task is not None:
+            return
+        state = await db.change_stream_state.find_one({"_id": self.name})
+        self.token = self.saved_token = state.get("token") if state else None
+        await self.load_ids()
+        self.stats["resumed"] = self.token is not None
+        self.task = asyncio.create_task(self.run())
+        logger.info(f"Change stream '{self.name}' started ({'resuming' if self.token else 'from now'})")
+
+    async def stop(self):
+        if self.task is None:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        self.connected = False
+        await self.checkpoint(force=True)
+
+    async def checkpoint(self, force: bool = False):
+        if self.token is None or self.token == self.saved_token:
+            return
+        if not force and time.monotonic() - self.saved_at < CHANGE_STREAM_CHECKPOINT_SECONDS:
+            return
+        try:
+            await db.change_stream_state.update_one(
+                {"_id": self.name},
+                {"$set": {"token": self.token, "updated_at": datetime.now(timezone.utc).isoformat()}},
+                upsert=True
+            )
+            self.saved_token = self.token
+            self.saved_at = time.monotonic()
+        except Exception as e:
+            logger.warning(f"Could not save change stream token: {e}")
+
+    async def flush_all(self):
+        # Пропущенные события не восстановить - сбрасываем все, что на них подписано
+        await self.load_ids()
+        for collection in self.collections:
+            await publish_change(collection, "resync", None, source="stream")
+
+    async def run(self):
+        backoff = 1.0
+        while True:
+            try:
+                async with db.watch(self.pipeline(), full_document="updateLookup", resume_after=self.token,
+                                    max_await_time_ms=1000) as stream:
+                    self.connected = True
+                    backoff = 1.0
+                    while stream.alive:
+                        change = await stream.try_next()
+                        if change is not None:
+                            self.stats["events"] += 1
+                            self.stats["last_event_at"] = datetime.now(timezone.utc).isoformat()
+                            event = self.normalize(change)
+                            if event is not None:
+                                await publish_change(*event, source="stream")
+                        self.token = stream.resume_token
+                        await self.checkpoint()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                self.connected = False
+                self.stats["last_error"] = type(e).__name__
+                # 286 ChangeStreamHistoryLost, 280 ChangeStreamFatalError: токен больше не годится
+                if e.code in (280, 286) and self.token is not None:
+                    logger.warning(f"Change stream token expired, resynchronizing: {e}")
+                    self.stats["history_lost"] += 1
+                    self.token = None
+                    await self.flush_all()
+                    continue
+                if e.code == 40573:
+                    logger.error("Change streams need a replica set; cross-worker invalidation is disabled")
+                    return
+                logger.error(f"Change stream failed: {e}")
+            except Exception as e:
+                self.connected = False
+                self.stats["last_error"] = type(e).__name__
+                logger.warning(f"Change stream interrupted, retrying in {backoff:g}s: {e}")
+            self.stats["restarts"] += 1
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, CHANGE_STREAM_MAX_BACKOFF)
+
+    def snapshot(self) -> dict:
+        return {"enabled": CHANGE_STREAMS_ENABLED, "name": self.name, "connected": self.connected,
+                "collections": list(self.collections), "known_ids": sum(len(ids) for ids in self.ids.values()), **self.stats}
+
+change_bus = ChangeStreamBus(CHANGE_STREAM_NAME, ("users", "roles", "leadership", "ministries", "news", "amendments"))
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+def body_etag(body: bytes) -> str:
+    return f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+
+def cache_policy(policy: str):
+    # ETag ставит cached_json (хеш тела или версия карточки), здесь только Cache-Control
+    async def apply(response: Response):
+        response.headers["Cache-Control"] = CACHE_CONTROL_POLICIES[policy]
+    return Depends(apply)
+
+class CachedResponse(BaseModel):
+    body: bytes
+    headers: Dict[str, str] = {}
+    tags: List[str] = []
+    created_at: float
+
+class ResponseCacheBackend:
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        raise NotImplementedError
+
+    async def set(self, key: str, entry: CachedResponse):
+        raise NotImplementedError
+
+    async def invalidate_tags(self, tags: List[str]):
+        raise NotImplementedError
+
+    async def invalidate_prefix(self, prefix: str):
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+    def snapshot(self) -> dict:
+        return {}
+
+class MemoryResponseCacheBackend(ResponseCacheBackend):
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.tag_index: Dict[str, set] = {}
+        self.evictions = 0
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse):
+        self._drop(key)
+        self.entries[key] = entry
+        for tag in entry.tags:
+            self.tag_index.setdefault(tag, set()).add(key)
+        while len(self.entries) > self.maxsize:
+            self._drop(next(iter(self.entries)))
+            self.evictions += 1
+
+    async def invalidate_tags(self, tags: List[str]):
+        for tag in tags:
+            for key in self.tag_index.pop(tag, set()):
+                self._drop(key)
+
+    async def invalidate_prefix(self, prefix: str):
+        await self.invalidate_tags([tag for tag in self.tag_index if tag.startswith(prefix)])
+
+    async def clear(self):
+        self.entries.clear()
+        self.tag_index.clear()
+
+    def _drop(self, key: str):
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return
+        for tag in entry.tags:
+            keys = self.tag_index.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tag_index[tag]
+
+    def snapshot(self) -> dict:
+        return {"size": len(self.entries), "maxsize": self.maxsize, "evictions": self.evictions}
+
+RESPONSE_CACHE_BACKENDS = {
+    "memory": lambda: MemoryResponseCacheBackend(RESPONSE_CACHE_SIZE),
+}
+
+class ResponseCache:
+    def __init__(self, backend: ResponseCacheBackend, ttl: float, stale_ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refreshing = set()
+        # Ссылки на фоновые обновления: задачу без ссылки сборщик мусора может уничтожить на середине
+        self.tasks: set = set()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "invalidations": 0}
+
+    async def fill(self, key: str, tags: List[str], build) -> CachedResponse:
+        invalidations = self.stats["invalidations"]
+        body, headers = await build()
+        entry = CachedResponse(body=body, headers={"ETag": body_etag(body), **headers}, tags=tags, created_at=time.time())
+        # Запись во время сборки могла сделать ответ устаревшим: отдаем, но не кешируем
+        if invalidations == self.stats["invalidations"]:
+            await self.backend.set(key, entry)
+        return entry
+
+    async def refresh(self, key: str, tags: List[str], build):
+        try:
+            await self.fill(key, tags, build)
+        except Exception:
+            logger.exception(f"Background refresh failed for {key}")
+        finally:
+            self.refreshing.discard(key)
+
+    async def get_or_build(self, key: str, tags: List[str], build) -> CachedResponse:
+        entry = await self.backend.get(key)
+        age = time.time() - entry.created_at if entry is not None else None
+        if entry is not None and age <= self.ttl:
+            self.stats["hits"] += 1
+            return entry
+        if entry is not None and age <= self.ttl + self.stale_ttl:
+            self.stats["stale_hits"] += 1
+            if key not in self.refreshing:
+                self.refreshing.add(key)
+                task = asyncio.create_task(self.refresh(key, tags, build))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+            return entry
+        self.stats["misses"] += 1
+        return await self.fill(key, tags, build)
+
+    async def invalidate(self, collection: str, op: str, doc_id: Optional[str]):
+        self.stats["invalidations"] += 1
+        # doc_id=None - массовое изменение: сбрасываем и список, и все карточки коллекции
+        if doc_id is None:
+            await self.backend.invalidate_prefix(f"{collection}:")
+            return
+        await self.backend.invalidate_tags([f"{collection}:list", f"{collection}:{doc_id}"])
+
+    def snapshot(self) -> dict:
+        return {"backend": RESPONSE_CACHE_BACKEND, **self.stats, **self.backend.snapshot()}
+
+if RESPONSE_CACHE_BACKEND not in RESPONSE_CACHE_BACKENDS:
+    logger.error(f"Unknown RESPONSE_CACHE_BACKEND '{RESPONSE_CACHE_BACKEND}', using memory")
+response_cache = ResponseCache(
+    RESPONSE_CACHE_BACKENDS.get(RESPONSE_CACHE_BACKEND, RESPONSE_CACHE_BACKENDS["memory"])(),
+    RESPONSE_CACHE_TTL,
+    RESPONSE_CACHE_STALE_TTL
+)
+on_change("roles", "leadership", "ministries", "news", "amendments")(response_cache.invalidate)
+
+def conditional_json(request: Request, response: Response, entry: CachedResponse) -> Response:
+    # ETag - хеш тела или версия документа, поэтому он совпадает во всех воркерах и меняется при любой
+    # записи в базу, кто бы ее ни сделал; 304 никогда не старше ответа, который этот воркер отдал бы целиком
+    headers = {**response.headers, **entry.headers}
+    if etag_matches(request.headers.get("if-none-match"), entry.headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+async def cached_json(request: Request, response: Response, tags: List[str], build):
+    key = f"{request.url.path}?{request.url.query}"
+    return conditional_json(request, response, await response_cache.get_or_build(key, tags, build))
+
+def page_builder(adapter: TypeAdapter, fetch, fields: Optional[List[str]]):
+    async def build():
+        docs, next_cursor = await fetch()
+        if fields is None and READ_VALIDATION:
+            body = adapter.dump_json(adapter.validate_python(docs))
+        else:
+            body = dump_json(docs)
+        return body, ({"X-Next-Cursor": next_cursor} if next_cursor else {})
+    return build
+
+def item_builder(adapter: TypeAdapter, fetch, versioned: bool = False):
+    async def build():
+        doc = await fetch()
+        # ETag карточки - ее версия, тот же тег принимает If-Match у PUT
+        headers = {"ETag": f'"{doc.get("version", 0)}"'} if versioned else {}
+        if READ_VALIDATION:
+            return adapter.dump_json(adapter.validate_python(doc)), headers
+        return dump_json(doc), headers
+    return build
+
+# user_id -> {"user": dict, "permissions": RolePermissions | None}
+principal_cache = TTLCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+# "user:<id>" / "role:<id>" -> время изменения; токены, выданные раньше, перепроверяются по базе
+principal_revocations: Dict[str, float] = {}
+
+def revoke_principal(key: str):
+    # Ключи идут в порядке времени отзыва. Запись старше JWT_CLAIMS_TTL не нужна: права во всех
+    # токенах, выданных до нее, уже истекли, поэтому старые записи снимаем с начала словаря
+    now = time.time()
+    principal_revocations.pop(key, None)
+    principal_revocations[key] = now
+    for stale, revoked_at in list(principal_revocations.items()):
+        if revoked_at > now - JWT_CLAIMS_TTL:
+            break
+        del principal_revocations[stale]
+
+def invalidate_principals(user_id: Optional[str] = None, role_id: Optional[str] = None):
+    if user_id:
+        principal_cache.pop(user_id)
+        revoke_principal(f"user:{user_id}")
+    if role_id:
+        principal_cache.remove_where(lambda key, entry: entry["user"].get("role") == role_id)
+        revoke_principal(f"role:{role_id}")
+
+@on_change("users", "roles", source="stream")
+def invalidate_remote_principals(collection: str, op: str, doc_id: Optional[str]):
+    # Свои записи обработчики уже сбросили напрямую; повтор безвреден
+    if doc_id is None:
+        principal_cache.clear()
+        revoke_principal("*")
+    elif collection == "users":
+        invalidate_principals(user_id=doc_id)
+    else:
+        invalidate_principals(role_id=doc_id)
+
+def create_token(user_id: str, username: str, role: str, role_name: str = "", created_at: str = "",
+                 permissions: Optional[RolePermissions] = None) -> str:
+    now = datetime.now(timezone.utc)
     payload = {
         "sub": user_id,
         "username": username,
         "role": role,
-        "exp": datetime.now(timezone.utc) + timedelta(hours=JWT_EXPIRATION_HOURS)
+        "iat": now,
+        "exp": now + timedelta(hours=JWT_EXPIRATION_HOURS)
     }
+    if JWT_EMBED_PERMISSIONS and permissions is not None:
+        payload["role_name"] = role_name
+        payload["created_at"] = created_at
+        payload["perms"] = permissions.model_dump()
+        payload["perms_exp"] = int(time.time()) + JWT_CLAIMS_TTL
     return jwt.encode(payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
+def principal_from_claims(payload: dict):
+    if not JWT_EMBED_PERMISSIONS or "perms" not in payload:
+        return None
+    # Токен дальше действует, но права берутся из базы
+    if payload.get("perms_exp", 0) <= time.time():
+        return None
+    issued_at = payload.get("iat", 0)
+    for key in (f"user:{payload['sub']}", f"role:{payload.get('role')}", "*"):
+        if principal_revocations.get(key, 0) >= issued_at:
+            return None
+    user = {
+        "id": payload["sub"],
+        "username": payload.get("username", ""),
+        "role": payload.get("role", ""),
+        "role_name": payload.get("role_name", ""),
+        "created_at": payload.get("created_at", "")
+    }
+    return user, RolePermissions(**payload["perms"])
+
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
     try:
         payload = jwt.decode(credentials.credentials, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         user_id = payload.get("sub")
         if not user_id:
             raise HTTPException(status_code=401, detail="Invalid token")
+        
+        cached = principal_cache.get(user_id)
+        if cached is not None:
+            return cached["user"]
+        
+        from_claims = principal_from_claims(payload)
+        if from_claims is not None:
+            user, permissions = from_claims
+            principal_cache.set(user_id, {"user": user, "permissions": permissions})
+            return user
+        
         if db is None:
             raise HTTPException(status_code=503, detail="Database not available")
-        user = await db.users.find_one({"id": user_id}, {"_id": 0})
+        user = await db.users.find_one({"id": user_id}, {"_id": 0, "password": 0})
         if not user:
             raise HTTPException(status_code=401, detail="User not found")
+        principal_cache.set(user_id, {"user": user, "permissions": None})
         return user
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token expired")
@@ -232,6 +1760,15 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
         raise HTTPException(status_code=401, detail="Invalid token")
 
 async def get_user_permissions(user: dict) -> RolePermissions:
+    cached = principal_cache.get(user.get("id"))
+    if cached is not None and cached["permissions"] is not None:
+        return cached["permissions"]
+    permissions = await resolve_permissions(user)
+    if cached is not None:
+        cached["permissions"] = permissions
+    return permissions
+
+async def resolve_permissions(user: dict) -> RolePermissions:
     if user.get("role") == "governor":
         return RolePermissions(
             can_manage_ministries=True,
@@ -242,28 +1779,203 @@ async def get_user_permissions(user: dict) -> RolePermissions:
             can_delete=True
         )
     
-    if db is None:
-        return RolePermissions()
+    if db is None:
+        return RolePermissions()
+    
+    role = await db.roles.find_one({"id": user.get("role")}, {"_id": 0})
+    if role:
+        return RolePermissions(**role.get("permissions", {}))
+    
+    return RolePermissions()
+
+def require_permission(permission: str):
+    async def check_permission(current_user: dict = Depends(get_current_user)):
+        permissions = await get_user_permissions(current_user)
+        if current_user.get("role") == "governor":
+            return current_user
+        if not getattr(permissions, permission, False):
+            raise HTTPException(status_code=403, detail="Permission denied")
+        return current_user
+    return check_permission
+
+def lockout_seconds(failures: int, threshold: int) -> float:
+    if failures < threshold:
+        return 0.0
+    return min(AUTH_LOCKOUT_MAX, AUTH_LOCKOUT_BASE * 2 ** (failures - threshold))
+
+class RateLimitBackend:
+    # Возвращает 0, если токен выдан, иначе через сколько секунд появится следующий
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        raise NotImplementedError
+    
+    async def locked_for(self, key: str) -> float:
+        raise NotImplementedError
+    
+    async def register_failure(self, key: str, threshold: int) -> float:
+        raise NotImplementedError
+    
+    async def reset(self, key: str):
+        raise NotImplementedError
+    
+    def snapshot(self) -> dict:
+        return {}
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.buckets = OrderedDict()
+        self.failures = OrderedDict()
+    
+    def _store(self, entries: OrderedDict, key: str, value):
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > self.maxsize:
+            entries.popitem(last=False)
+    
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        now = time.monotonic()
+        tokens, updated = self.buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._store(self.buckets, key, (tokens, now))
+        return 0.0 if allowed else (1 - tokens) / rate
+    
+    async def locked_for(self, key: str) -> float:
+        _, locked_until, _ = self.failures.get(key, (0, 0.0, 0.0))
+        return max(0.0, locked_until - time.time())
+    
+    async def register_failure(self, key: str, threshold: int) -> float:
+        # Как expires_at в Mongo: после тишины дольше окна счет начинается заново
+        now = time.time()
+        count, _, last_failure = self.failures.get(key, (0, 0.0, now))
+        if now - last_failure > AUTH_FAILURE_WINDOW:
+            count = 0
+        count += 1
+        lockout = lockout_seconds(count, threshold)
+        self._store(self.failures, key, (count, now + lockout, now))
+        return lockout
+    
+    async def reset(self, key: str):
+        self.failures.pop(key, None)
+    
+    def snapshot(self) -> dict:
+        return {"buckets": len(self.buckets), "tracked_failures": len(self.failures)}
+
+class MongoRateLimitBackend(RateLimitBackend):
+    # Общее состояние для нескольких воркеров/инстансов; каждая операция - один атомарный запрос
+    async def take(self, key: str, capacity: float, rate: float) -> float:
+        now = time.time()
+        refilled = {"$min": [capacity, {"$add": [
+            {"$ifNull": ["$tokens", capacity]},
+            {"$multiply": [{"$subtract": [now, {"$ifNull": ["$updated", now]}]}, rate]}
+        ]}]}
+        doc = await db.rate_limits.find_one_and_update(
+            {"key": f"bucket:{key}"},
+            [
+                {"$set": {"tokens": refilled, "updated": now}},
+                {"$set": {
+                    "allowed": {"$gte": ["$tokens", 1]},
+                    "expires_at": datetime.now(timezone.utc) + timedelta(seconds=capacity / rate)
+                }},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}}
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return 0.0 if doc["allowed"] else (1 - doc["tokens"]) / rate
+    
+    async def locked_for(self, key: str) -> float:
+        doc = await db.rate_limits.find_one({"key": f"failures:{key}"}, {"_id": 0, "locked_until": 1})
+        return max(0.0, (doc or {}).get("locked_until", 0.0) - time.time())
+    
+    async def register_failure(self, key: str, threshold: int) -> float:
+        doc = await db.rate_limits.find_one_and_update(
+            {"key": f"failures:{key}"},
+            {"$inc": {"count": 1}, "$set": {"expires_at": datetime.now(timezone.utc) + timedelta(seconds=AUTH_FAILURE_WINDOW)}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        lockout = lockout_seconds(doc["count"], threshold)
+        if lockout:
+            await db.rate_limits.update_one({"key": f"failures:{key}"}, {"$set": {"locked_until": time.time() + lockout}})
+        return lockout
+    
+    async def reset(self, key: str):
+        await db.rate_limits.delete_one({"key": f"failures:{key}"})
+
+RATE_LIMIT_BACKENDS = {
+    "memory": lambda: MemoryRateLimitBackend(RATE_LIMIT_SIZE),
+    "mongo": MongoRateLimitBackend,
+}
+
+class AuthRateLimiter:
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+        self.rejections: Dict[str, int] = {}
+    
+    def client_ip(self, request: Request) -> str:
+        if RATE_LIMIT_TRUST_FORWARDED:
+            forwarded = request.headers.get("x-forwarded-for")
+            if forwarded:
+                return forwarded.split(",")[-1].strip()
+        return request.client.host if request.client else "unknown"
+    
+    def reject(self, scope: str, reason: str, retry_after: float):
+        label = f"{scope}:{reason}"
+        self.rejections[label] = self.rejections.get(label, 0) + 1
+        if METRICS_ENABLED:
+            AUTH_REJECTIONS.labels(scope, reason).inc()
+        raise HTTPException(
+            status_code=429,
+            detail="Too many attempts, try again later",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+    
+    async def check(self, request: Request, scope: str, username: Optional[str] = None) -> dict:
+        # Вызывается до любых обращений к базе и bcrypt
+        keys = {"ip": f"{scope}:ip:{self.client_ip(request)}"}
+        if username:
+            keys["user"] = f"{scope}:user:{username.strip().lower()}"
+        for kind, key in keys.items():
+            locked = await self.backend.locked_for(key)
+            if locked > 0:
+                self.reject(scope, f"{kind}_lockout", locked)
+        wait = await self.backend.take(keys["ip"], RATE_LIMIT_IP_BURST, RATE_LIMIT_IP_RATE)
+        if wait:
+            self.reject(scope, "ip_rate", wait)
+        if "user" in keys:
+            wait = await self.backend.take(keys["user"], RATE_LIMIT_USER_BURST, RATE_LIMIT_USER_RATE)
+            if wait:
+                self.reject(scope, "user_rate", wait)
+        return keys
     
-    role = await db.roles.find_one({"id": user.get("role")}, {"_id": 0})
-    if role:
-        return RolePermissions(**role.get("permissions", {}))
+    async def failure(self, keys: dict):
+        thresholds = {"ip": AUTH_LOCKOUT_IP_THRESHOLD, "user": AUTH_LOCKOUT_USER_THRESHOLD}
+        for kind, key in keys.items():
+            lockout = await self.backend.register_failure(key, thresholds[kind])
+            if lockout:
+                logger.warning(f"Auth lockout for {key}: {lockout:.0f}s")
     
-    return RolePermissions()
+    async def success(self, keys: dict):
+        # IP-ключ не сбрасываем: иначе вход в свой аккаунт обнулял бы подбор чужих с того же адреса.
+        # Его счетчик затухает через AUTH_FAILURE_WINDOW
+        if "user" in keys:
+            await self.backend.reset(keys["user"])
+    
+    def snapshot(self) -> dict:
+        return {"backend": type(self.backend).__name__, "rejections": dict(self.rejections), **self.backend.snapshot()}
 
-def require_permission(permission: str):
-    async def check_permission(current_user: dict = Depends(get_current_user)):
-        permissions = await get_user_permissions(current_user)
-        if current_user.get("role") == "governor":
-            return current_user
-        if not getattr(permissions, permission, False):
-            raise HTTPException(status_code=403, detail="Permission denied")
-        return current_user
-    return check_permission
+if RATE_LIMIT_BACKEND not in RATE_LIMIT_BACKENDS:
+    logger.error(f"Unknown RATE_LIMIT_BACKEND '{RATE_LIMIT_BACKEND}', using memory")
+auth_limiter = AuthRateLimiter(RATE_LIMIT_BACKENDS.get(RATE_LIMIT_BACKEND, RATE_LIMIT_BACKENDS["memory"])())
 
 @api_router.post("/auth/register-governor", response_model=TokenResponse)
-async def register_governor(data: GovernorCreate):
+async def register_governor(data: GovernorCreate, request: Request):
+    limit_keys = await auth_limiter.check(request, "register-governor")
     if data.governor_secret != GOVERNOR_SECRET:
+        await auth_limiter.failure(limit_keys)
         raise HTTPException(status_code=403, detail="Invalid governor secret")
     
     if db is None:
@@ -278,7 +1990,7 @@ async def register_governor(data: GovernorCreate):
         raise HTTPException(status_code=400, detail="Username already exists")
     
     user_id = str(uuid.uuid4())
-    hashed_pw = hash_password(data.password)
+    hashed_pw = await hash_password(data.password)
     created_at = datetime.now(timezone.utc).isoformat()
     
     user_doc = {
@@ -290,6 +2002,7 @@ async def register_governor(data: GovernorCreate):
         "created_at": created_at
     }
     await db.users.insert_one(user_doc)
+    await publish_change("users", "insert", user_doc["id"])
     
     permissions = RolePermissions(
         can_manage_ministries=True,
@@ -300,7 +2013,7 @@ async def register_governor(data: GovernorCreate):
         can_delete=True
     )
     
-    token = create_token(user_id, data.username, "governor")
+    token = create_token(user_id, data.username, "governor", "Губернатор", created_at, permissions)
     return TokenResponse(
         access_token=token,
         user=UserResponse(
@@ -314,12 +2027,14 @@ async def register_governor(data: GovernorCreate):
     )
 
 @api_router.post("/auth/register", response_model=TokenResponse)
-async def register_with_code(data: UserCreate):
+async def register_with_code(data: UserCreate, request: Request):
+    limit_keys = await auth_limiter.check(request, "register")
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
     role = await db.roles.find_one({"access_code": data.access_code}, {"_id": 0})
     if not role:
+        await auth_limiter.failure(limit_keys)
         raise HTTPException(status_code=400, detail="Invalid access code")
     
     existing_user = await db.users.find_one({"username": data.username})
@@ -332,16 +2047,17 @@ async def register_with_code(data: UserCreate):
     user_doc = {
         "id": user_id,
         "username": data.username,
-        "password": hash_password(data.access_code),
+        "password": await hash_password(data.access_code),
         "role": role["id"],
         "role_name": role["name"],
         "created_at": created_at
     }
     await db.users.insert_one(user_doc)
+    await publish_change("users", "insert", user_doc["id"])
     
     permissions = RolePermissions(**role.get("permissions", {}))
     
-    token = create_token(user_id, data.username, role["id"])
+    token = create_token(user_id, data.username, role["id"], role["name"], created_at, permissions)
     return TokenResponse(
         access_token=token,
         user=UserResponse(
@@ -355,17 +2071,23 @@ async def register_with_code(data: UserCreate):
     )
 
 @api_router.post("/auth/login", response_model=TokenResponse)
-async def login(data: UserLogin):
+async def login(data: UserLogin, request: Request):
+    limit_keys = await auth_limiter.check(request, "login", data.username)
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
     user = await db.users.find_one({"username": data.username}, {"_id": 0})
-    if not user or not verify_password(data.password, user["password"]):
+    if not user or not await verify_password(data.password, user["password"]):
+        await auth_limiter.failure(limit_keys)
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    await auth_limiter.success(limit_keys)
     
     permissions = await get_user_permissions(user)
     
-    token = create_token(user["id"], user["username"], user.get("role", ""))
+    token = create_token(
+        user["id"], user["username"], user.get("role", ""),
+        user.get("role_name", ""), user["created_at"], permissions
+    )
     return TokenResponse(
         access_token=token,
         user=UserResponse(
@@ -398,18 +2120,34 @@ async def check_governor():
     return {"exists": existing is not None}
 
 @api_router.get("/roles", response_model=List[RoleResponse])
-async def get_roles(current_user: dict = Depends(require_permission("can_manage_roles"))):
+async def get_roles(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    fields: Optional[str] = None,
+    current_user: dict = Depends(require_permission("can_manage_roles"))
+):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
-    roles = await db.roles.find({}, {"_id": 0}).to_list(100)
-    return roles
+    fields = parse_fields(fields, RoleResponse.model_fields)
+    roles, next_cursor = await fetch_page(db.roles, {}, {"_id": 0}, "created_at", False, after, limit, fields)
+    return page_response(roles, next_cursor, response, fields)
 
-@api_router.get("/roles/all")
-async def get_all_roles():
+@api_router.get("/roles/all", dependencies=[cache_policy("roles")])
+async def get_all_roles(
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    fields: Optional[str] = None
+):
     if db is None:
         return []
-    roles = await db.roles.find({}, {"_id": 0, "access_code": 0}).to_list(100)
-    return roles
+    fields = parse_fields(fields, set(RoleResponse.model_fields) - {"access_code"})
+    fetch = lambda: fetch_page(
+        db.roles, {}, {"_id": 0, "access_code": 0}, "created_at", False, after, limit, fields
+    )
+    return await cached_json(request, response, ["roles:list"], page_builder(ROLE_LIST, fetch, fields))
 
 @api_router.post("/roles", response_model=RoleResponse)
 async def create_role(role: RoleCreate, current_user: dict = Depends(require_permission("can_manage_roles"))):
@@ -426,28 +2164,26 @@ async def create_role(role: RoleCreate, current_user: dict = Depends(require_per
         "permissions": role.permissions.model_dump(),
         "access_code": access_code,
         "created_at": created_at,
-        "created_by": current_user["id"]
+        "created_by": current_user["id"],
+        "version": 1
     }
     await db.roles.insert_one(role_doc)
+    await publish_change("roles", "insert", role_doc["id"])
     role_doc.pop("_id", None)
     return role_doc
 
 @api_router.put("/roles/{role_id}", response_model=RoleResponse)
-async def update_role(role_id: str, role: RoleCreate, current_user: dict = Depends(require_permission("can_manage_roles"))):
+async def update_role(role_id: str, role: RoleCreate, if_match: Optional[str] = Header(None), current_user: dict = Depends(require_permission("can_manage_roles"))):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
-    existing = await db.roles.find_one({"id": role_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Role not found")
-    
     update_data = {
         "name": role.name,
         "permissions": role.permissions.model_dump()
     }
-    await db.roles.update_one({"id": role_id}, {"$set": update_data})
-    
-    updated = await db.roles.find_one({"id": role_id}, {"_id": 0})
+    updated = await update_versioned(db.roles, role_id, update_data, if_match, "Role not found")
+    await publish_change("roles", "update", role_id)
+    invalidate_principals(role_id=role_id)
     return updated
 
 @api_router.delete("/roles/{role_id}")
@@ -462,29 +2198,36 @@ async def delete_role(role_id: str, current_user: dict = Depends(require_permiss
     result = await db.roles.delete_one({"id": role_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Role not found")
+    await publish_change("roles", "delete", role_id)
+    invalidate_principals(role_id=role_id)
     return {"message": "Role deleted"}
 
 @api_router.post("/roles/{role_id}/regenerate-code", response_model=RoleResponse)
-async def regenerate_access_code(role_id: str, current_user: dict = Depends(require_permission("can_manage_roles"))):
+async def regenerate_access_code(role_id: str, if_match: Optional[str] = Header(None), current_user: dict = Depends(require_permission("can_manage_roles"))):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
-    existing = await db.roles.find_one({"id": role_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Role not found")
-    
     new_code = generate_access_code()
-    await db.roles.update_one({"id": role_id}, {"$set": {"access_code": new_code}})
-    
-    updated = await db.roles.find_one({"id": role_id}, {"_id": 0})
+    updated = await update_versioned(db.roles, role_id, {"access_code": new_code}, if_match, "Role not found")
+    await publish_change("roles", "update", role_id)
+    invalidate_principals(role_id=role_id)
     return updated
 
 @api_router.get("/users", response_model=List[dict])
-async def get_users(current_user: dict = Depends(require_permission("can_manage_roles"))):
+async def get_users(
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    fields: Optional[str] = None,
+    current_user: dict = Depends(require_permission("can_manage_roles"))
+):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
-    users = await db.users.find({}, {"_id": 0, "password": 0}).to_list(100)
-    return users
+    fields = parse_fields(fields, USER_LIST_FIELDS)
+    users, next_cursor = await fetch_page(
+        db.users, {}, {"_id": 0, "password": 0}, "created_at", False, after, limit, fields
+    )
+    return page_response(users, next_cursor, response, fields)
 
 @api_router.delete("/users/{user_id}")
 async def delete_user(user_id: str, current_user: dict = Depends(require_permission("can_manage_roles"))):
@@ -502,14 +2245,26 @@ async def delete_user(user_id: str, current_user: dict = Depends(require_permiss
         raise HTTPException(status_code=400, detail="Cannot delete yourself")
     
     await db.users.delete_one({"id": user_id})
+    await publish_change("users", "delete", user_id)
+    invalidate_principals(user_id=user_id)
     return {"message": "User deleted"}
 
-@api_router.get("/leadership", response_model=List[LeadershipResponse])
-async def get_leadership():
+@api_router.get("/leadership", response_model=List[LeadershipResponse],
+                dependencies=[cache_policy("leadership")])
+async def get_leadership(
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    fields: Optional[str] = None
+):
     if db is None:
         return []
-    leaders = await db.leadership.find({}, {"_id": 0}).sort("order", 1).to_list(100)
-    return leaders
+    fields = parse_fields(fields, LeadershipResponse.model_fields)
+    fetch = lambda: fetch_page(
+        db.leadership, {}, LEADERSHIP_PROJECTION, "order", False, after, limit, fields, cast=int
+    )
+    return await cached_json(request, response, ["leadership:list"], page_builder(LEADERSHIP_LIST, fetch, fields))
 
 @api_router.post("/leadership", response_model=LeadershipResponse)
 async def create_leader(leader: LeadershipCreate, current_user: dict = Depends(require_permission("can_manage_leadership"))):
@@ -521,24 +2276,22 @@ async def create_leader(leader: LeadershipCreate, current_user: dict = Depends(r
     
     leader_doc = {
         "id": leader_id,
-        **leader.model_dump(),
-        "created_at": created_at
+        **await externalize_request("leadership", leader.model_dump()),
+        "created_at": created_at,
+        "version": 1
     }
     await db.leadership.insert_one(leader_doc)
+    await publish_change("leadership", "insert", leader_doc["id"])
     leader_doc.pop("_id", None)
     return leader_doc
 
 @api_router.put("/leadership/{leader_id}", response_model=LeadershipResponse)
-async def update_leader(leader_id: str, leader: LeadershipCreate, current_user: dict = Depends(require_permission("can_manage_leadership"))):
+async def update_leader(leader_id: str, leader: LeadershipCreate, if_match: Optional[str] = Header(None), current_user: dict = Depends(require_permission("can_manage_leadership"))):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
-    existing = await db.leadership.find_one({"id": leader_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Leader not found")
-    
-    await db.leadership.update_one({"id": leader_id}, {"$set": leader.model_dump()})
-    updated = await db.leadership.find_one({"id": leader_id}, {"_id": 0})
+    updated = await update_versioned(db.leadership, leader_id, await externalize_request("leadership", leader.model_dump()), if_match, "Leader not found")
+    await publish_change("leadership", "update", leader_id)
     return updated
 
 @api_router.delete("/leadership/{leader_id}")
@@ -549,24 +2302,53 @@ async def delete_leader(leader_id: str, current_user: dict = Depends(require_per
     result = await db.leadership.delete_one({"id": leader_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Leader not found")
+    await publish_change("leadership", "delete", leader_id)
     return {"message": "Leader deleted"}
 
-@api_router.get("/ministries", response_model=List[MinistryResponse])
-async def get_ministries():
+@api_router.patch("/leadership/reorder", response_model=BatchResponse)
+async def reorder_leadership(request: LeadershipReorderRequest, current_user: dict = Depends(require_permission("can_manage_leadership"))):
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    # Частичный список оставил бы неуказанным руководителям совпадающие order
+    current = {doc["id"] async for doc in db.leadership.find({}, {"_id": 0, "id": 1})}
+    if len(request.ids) != len(set(request.ids)) or set(request.ids) != current:
+        raise HTTPException(status_code=400, detail="ids must list every leader exactly once")
+    
+    items = [
+        {"op": "reorder", "id": leader_id, "update": {"$set": {"order": index}}}
+        for index, leader_id in enumerate(request.ids)
+    ]
+    return {"results": await run_batch("leadership", items)}
+
+@api_router.get("/ministries", response_model=List[MinistryResponse],
+                dependencies=[cache_policy("ministries")])
+async def get_ministries(
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    fields: Optional[str] = None
+):
     if db is None:
         return []
-    ministries = await db.ministries.find({}, {"_id": 0}).to_list(100)
-    return ministries
+    fields = parse_fields(fields, MinistryResponse.model_fields)
+    fetch = lambda: fetch_page(
+        db.ministries, {}, MINISTRY_PROJECTION, "created_at", False, after, limit, fields
+    )
+    return await cached_json(request, response, ["ministries:list"], page_builder(MINISTRY_LIST, fetch, fields))
 
-@api_router.get("/ministries/{ministry_id}", response_model=MinistryResponse)
-async def get_ministry(ministry_id: str):
+@api_router.get("/ministries/{ministry_id}", response_model=MinistryResponse,
+                dependencies=[cache_policy("ministry")])
+async def get_ministry(ministry_id: str, request: Request, response: Response):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
-    ministry = await db.ministries.find_one({"id": ministry_id}, {"_id": 0})
-    if not ministry:
-        raise HTTPException(status_code=404, detail="Ministry not found")
-    return ministry
+    async def fetch():
+        ministry = await db.ministries.find_one({"id": ministry_id}, MINISTRY_PROJECTION)
+        if not ministry:
+            raise HTTPException(status_code=404, detail="Ministry not found")
+        return ministry
+    return await cached_json(request, response, [f"ministries:{ministry_id}"], item_builder(MINISTRY_ITEM, fetch, versioned=True))
 
 @api_router.post("/ministries", response_model=MinistryResponse)
 async def create_ministry(ministry: MinistryCreate, current_user: dict = Depends(require_permission("can_manage_ministries"))):
@@ -578,24 +2360,22 @@ async def create_ministry(ministry: MinistryCreate, current_user: dict = Depends
     
     ministry_doc = {
         "id": ministry_id,
-        **ministry.model_dump(),
-        "created_at": created_at
+        **await externalize_request("ministries", ministry.model_dump()),
+        "created_at": created_at,
+        "version": 1
     }
     await db.ministries.insert_one(ministry_doc)
+    await publish_change("ministries", "insert", ministry_doc["id"])
     ministry_doc.pop("_id", None)
     return ministry_doc
 
 @api_router.put("/ministries/{ministry_id}", response_model=MinistryResponse)
-async def update_ministry(ministry_id: str, ministry: MinistryCreate, current_user: dict = Depends(require_permission("can_manage_ministries"))):
+async def update_ministry(ministry_id: str, ministry: MinistryCreate, if_match: Optional[str] = Header(None), current_user: dict = Depends(require_permission("can_manage_ministries"))):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
-    existing = await db.ministries.find_one({"id": ministry_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Ministry not found")
-    
-    await db.ministries.update_one({"id": ministry_id}, {"$set": ministry.model_dump()})
-    updated = await db.ministries.find_one({"id": ministry_id}, {"_id": 0})
+    updated = await update_versioned(db.ministries, ministry_id, await externalize_request("ministries", ministry.model_dump()), if_match, "Ministry not found")
+    await publish_change("ministries", "update", ministry_id)
     return updated
 
 @api_router.delete("/ministries/{ministry_id}")
@@ -606,25 +2386,38 @@ async def delete_ministry(ministry_id: str, current_user: dict = Depends(require
     result = await db.ministries.delete_one({"id": ministry_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Ministry not found")
+    await publish_change("ministries", "delete", ministry_id)
     return {"message": "Ministry deleted"}
 
-@api_router.get("/news", response_model=List[NewsResponse])
-async def get_news(archive: bool = False):
+@api_router.get("/news", response_model=List[NewsResponse],
+                dependencies=[cache_policy("news")])
+async def get_news(
+    request: Request,
+    response: Response,
+    archive: bool = False,
+    after: Optional[str] = None,
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    fields: Optional[str] = None
+):
     if db is None:
         return []
+    fields = parse_fields(fields, NewsResponse.model_fields)
     query = {"is_archive": archive}
-    news = await db.news.find(query, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return news
+    fetch = lambda: fetch_page(db.news, query, NEWS_PROJECTION, "created_at", True, after, limit, fields)
+    return await cached_json(request, response, ["news:list"], page_builder(NEWS_LIST, fetch, fields))
 
-@api_router.get("/news/{news_id}", response_model=NewsResponse)
-async def get_news_item(news_id: str):
+@api_router.get("/news/{news_id}", response_model=NewsResponse,
+                dependencies=[cache_policy("news_item")])
+async def get_news_item(news_id: str, request: Request, response: Response):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
-    news = await db.news.find_one({"id": news_id}, {"_id": 0})
-    if not news:
-        raise HTTPException(status_code=404, detail="News not found")
-    return news
+    async def fetch():
+        news = await db.news.find_one({"id": news_id}, NEWS_PROJECTION)
+        if not news:
+            raise HTTPException(status_code=404, detail="News not found")
+        return news
+    return await cached_json(request, response, [f"news:{news_id}"], item_builder(NEWS_ITEM, fetch, versioned=True))
 
 @api_router.post("/news", response_model=NewsResponse)
 async def create_news(news: NewsCreate, current_user: dict = Depends(require_permission("can_manage_news"))):
@@ -636,24 +2429,22 @@ async def create_news(news: NewsCreate, current_user: dict = Depends(require_per
     
     news_doc = {
         "id": news_id,
-        **news.model_dump(),
-        "created_at": created_at
+        **await externalize_request("news", news.model_dump()),
+        "created_at": created_at,
+        "version": 1
     }
     await db.news.insert_one(news_doc)
+    await publish_change("news", "insert", news_doc["id"])
     news_doc.pop("_id", None)
     return news_doc
 
 @api_router.put("/news/{news_id}", response_model=NewsResponse)
-async def update_news(news_id: str, news: NewsCreate, current_user: dict = Depends(require_permission("can_manage_news"))):
+async def update_news(news_id: str, news: NewsCreate, if_match: Optional[str] = Header(None), current_user: dict = Depends(require_permission("can_manage_news"))):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
-    existing = await db.news.find_one({"id": news_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="News not found")
-    
-    await db.news.update_one({"id": news_id}, {"$set": news.model_dump()})
-    updated = await db.news.find_one({"id": news_id}, {"_id": 0})
+    updated = await update_versioned(db.news, news_id, await externalize_request("news", news.model_dump()), if_match, "News not found")
+    await publish_change("news", "update", news_id)
     return updated
 
 @api_router.delete("/news/{news_id}")
@@ -664,24 +2455,61 @@ async def delete_news(news_id: str, current_user: dict = Depends(require_permiss
     result = await db.news.delete_one({"id": news_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="News not found")
+    await publish_change("news", "delete", news_id)
     return {"message": "News deleted"}
 
-@api_router.get("/amendments", response_model=List[AmendmentResponse])
-async def get_amendments():
+@api_router.post("/news/batch", response_model=BatchResponse)
+async def batch_news(request: NewsBatchRequest, current_user: dict = Depends(require_permission("can_manage_news"))):
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    if any(operation.op == "delete" for operation in request.operations):
+        await require_permission("can_delete")(current_user)
+    
+    items = []
+    for operation in request.operations:
+        item = {"op": operation.op, "id": operation.id, "version": operation.version, "update": None}
+        if operation.op == "update":
+            if operation.data is None:
+                item["error"] = "data is required for update"
+            else:
+                try:
+                    item["update"] = {"$set": await externalize_fields("news", operation.data.model_dump())}
+                except ValueError as e:
+                    item["error"] = str(e)
+        elif operation.op in ("archive", "unarchive"):
+            item["update"] = {"$set": {"is_archive": operation.op == "archive"}}
+        items.append(item)
+    return {"results": await run_batch("news", items)}
+
+@api_router.get("/amendments", response_model=List[AmendmentResponse],
+                dependencies=[cache_policy("amendments")])
+async def get_amendments(
+    request: Request,
+    response: Response,
+    after: Optional[str] = None,
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    fields: Optional[str] = None
+):
     if db is None:
         return []
-    amendments = await db.amendments.find({}, {"_id": 0}).sort("created_at", -1).to_list(100)
-    return amendments
+    fields = parse_fields(fields, AmendmentResponse.model_fields)
+    fetch = lambda: fetch_page(
+        db.amendments, {}, AMENDMENT_PROJECTION, "created_at", True, after, limit, fields
+    )
+    return await cached_json(request, response, ["amendments:list"], page_builder(AMENDMENT_LIST, fetch, fields))
 
-@api_router.get("/amendments/{amendment_id}", response_model=AmendmentResponse)
-async def get_amendment(amendment_id: str):
+@api_router.get("/amendments/{amendment_id}", response_model=AmendmentResponse,
+                dependencies=[cache_policy("amendment")])
+async def get_amendment(amendment_id: str, request: Request, response: Response):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
-    amendment = await db.amendments.find_one({"id": amendment_id}, {"_id": 0})
-    if not amendment:
-        raise HTTPException(status_code=404, detail="Amendment not found")
-    return amendment
+    async def fetch():
+        amendment = await db.amendments.find_one({"id": amendment_id}, AMENDMENT_PROJECTION)
+        if not amendment:
+            raise HTTPException(status_code=404, detail="Amendment not found")
+        return amendment
+    return await cached_json(request, response, [f"amendments:{amendment_id}"], item_builder(AMENDMENT_ITEM, fetch, versioned=True))
 
 @api_router.post("/amendments", response_model=AmendmentResponse)
 async def create_amendment(amendment: AmendmentCreate, current_user: dict = Depends(require_permission("can_manage_legislation"))):
@@ -694,23 +2522,21 @@ async def create_amendment(amendment: AmendmentCreate, current_user: dict = Depe
     amendment_doc = {
         "id": amendment_id,
         **amendment.model_dump(),
-        "created_at": created_at
+        "created_at": created_at,
+        "version": 1
     }
     await db.amendments.insert_one(amendment_doc)
+    await publish_change("amendments", "insert", amendment_doc["id"])
     amendment_doc.pop("_id", None)
     return amendment_doc
 
 @api_router.put("/amendments/{amendment_id}", response_model=AmendmentResponse)
-async def update_amendment(amendment_id: str, amendment: AmendmentCreate, current_user: dict = Depends(require_permission("can_manage_legislation"))):
+async def update_amendment(amendment_id: str, amendment: AmendmentCreate, if_match: Optional[str] = Header(None), current_user: dict = Depends(require_permission("can_manage_legislation"))):
     if db is None:
         raise HTTPException(status_code=503, detail="Database not available")
     
-    existing = await db.amendments.find_one({"id": amendment_id})
-    if not existing:
-        raise HTTPException(status_code=404, detail="Amendment not found")
-    
-    await db.amendments.update_one({"id": amendment_id}, {"$set": amendment.model_dump()})
-    updated = await db.amendments.find_one({"id": amendment_id}, {"_id": 0})
+    updated = await update_versioned(db.amendments, amendment_id, amendment.model_dump(), if_match, "Amendment not found")
+    await publish_change("amendments", "update", amendment_id)
     return updated
 
 @api_router.delete("/amendments/{amendment_id}")
@@ -721,15 +2547,857 @@ async def delete_amendment(amendment_id: str, current_user: dict = Depends(requi
     result = await db.amendments.delete_one({"id": amendment_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Amendment not found")
+    await publish_change("amendments", "delete", amendment_id)
     return {"message": "Amendment deleted"}
 
+@api_router.post("/amendments/batch", response_model=BatchResponse)
+async def batch_amendments(request: AmendmentBatchRequest, current_user: dict = Depends(require_permission("can_manage_legislation"))):
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    if any(operation.op == "delete" for operation in request.operations):
+        await require_permission("can_delete")(current_user)
+    
+    items = []
+    for operation in request.operations:
+        item = {"op": operation.op, "id": operation.id, "version": operation.version, "update": None}
+        if operation.op == "update":
+            if operation.data is None:
+                item["error"] = "data is required for update"
+            else:
+                item["update"] = {"$set": operation.data.model_dump()}
+        elif operation.op == "set_status":
+            if not operation.status:
+                item["error"] = "status is required for set_status"
+            else:
+                item["update"] = {"$set": {"status": operation.status}}
+        items.append(item)
+    return {"results": await run_batch("amendments", items)}
+
 @api_router.post("/upload")
 async def upload_image(file: UploadFile = File(...), current_user: dict = Depends(get_current_user)):
-    contents = await file.read()
-    encoded = base64.b64encode(contents).decode()
-    mime_type = file.content_type or "image/png"
-    data_url = f"data:{mime_type};base64,{encoded}"
-    return {"url": data_url}
+    tmp_path, digest, size, head = await spool_upload(file)
+    try:
+        mime_type = sniff_image_type(head)
+        if mime_type is None:
+            raise HTTPException(status_code=415, detail="Unsupported image type")
+        path = media_path(digest)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    await register_blob(digest, mime_type, size)
+    
+    variants = await generate_variants(digest, mime_type)
+    return {
+        "url": f"{MEDIA_URL_PREFIX}{digest}",
+        "hash": digest,
+        "content_type": mime_type,
+        "size": size,
+        "variants": {name: f"{MEDIA_URL_PREFIX}{digest}?variant={name}" for name in variants}
+    }
+
+@api_router.get("/media/{digest}")
+async def get_media(digest: str, request: Request, variant: Optional[str] = None):
+    if not MEDIA_DIGEST_RE.match(digest) or (variant and variant not in IMAGE_VARIANTS):
+        raise HTTPException(status_code=404, detail="Media not found")
+    
+    etag = f'"{digest}-{variant}"' if variant else f'"{digest}"'
+    headers = {"Cache-Control": MEDIA_CACHE_CONTROL, "ETag": etag, "X-Content-Type-Options": "nosniff"}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    
+    meta = None
+    if db is not None:
+        meta = await db.media.find_one({"id": digest}, {"_id": 0, "content_type": 1, "variants": 1})
+    # Блобы, записанные до проверки типа, могли получить text/html или SVG из data: URL
+    content_type = meta["content_type"] if meta and meta.get("content_type") in IMAGE_CONTENT_TYPES else "application/octet-stream"
+    target = digest
+    if variant:
+        variant_digest = (meta or {}).get("variants", {}).get(variant)
+        if variant_digest:
+            target = variant_digest
+            content_type = "image/webp"
+        else:
+            # Варианта пока нет: отдаем оригинал, но без immutable, чтобы клиент потом получил вариант
+            headers["Cache-Control"] = "public, max-age=3600"
+    
+    path = media_path(target)
+    if not path.is_file():
+        raise HTTPException(status_code=404, detail="Media not found")
+    return FileResponse(path, media_type=content_type, headers=headers)
+
+def home_news_pipeline() -> list:
+    return [
+        {"$match": {"is_archive": False}},
+        {"$sort": {"created_at": -1, "id": -1}},
+        {"$limit": HOME_NEWS_LIMIT},
+        {"$project": {
+            "_id": 0, "id": 1, "title": 1, "image": 1, "created_at": 1,
+            "teaser": {"$substrCP": ["$content", 0, HOME_TEASER_LENGTH]}
+        }},
+    ]
+
+async def build_home_payload() -> dict:
+    leader_projection = {"_id": 0, **{field: 1 for field in HomeLeaderItem.model_fields}}
+    ministry_projection = {"_id": 0, **{field: 1 for field in HomeMinistryItem.model_fields}}
+    news, ministries, leadership, *counts = await asyncio.gather(
+        db.news.aggregate(home_news_pipeline()).to_list(HOME_NEWS_LIMIT),
+        db.ministries.find({}, ministry_projection)
+            .sort([("created_at", ASCENDING), ("id", ASCENDING)]).limit(HOME_MINISTRIES_LIMIT).to_list(HOME_MINISTRIES_LIMIT),
+        db.leadership.find({}, leader_projection)
+            .sort([("order", ASCENDING), ("id", ASCENDING)]).limit(HOME_LEADERSHIP_LIMIT).to_list(HOME_LEADERSHIP_LIMIT),
+        db.news.count_documents({"is_archive": False}),
+        # Без фильтра счетчик берется из метаданных коллекции, а не полным сканом
+        db.ministries.estimated_document_count(),
+        db.leadership.estimated_document_count(),
+        db.amendments.estimated_document_count(),
+    )
+    return HomeResponse(
+        news=news,
+        ministries=ministries,
+        leadership=leadership,
+        counts=HomeCounts(news=counts[0], ministries=counts[1], leadership=counts[2], amendments=counts[3])
+    ).model_dump()
+
+class HomeSnapshot:
+    def __init__(self):
+        self.entry: Optional[CachedResponse] = None
+        self.generation = 0
+        self.lock = asyncio.Lock()
+        self.tasks: set = set()
+
+    def invalidate(self, collection: str, op: str, doc_id: Optional[str]):
+        self.generation += 1
+        self.entry = None
+        # Пачка изменений дает одну пересборку: уже запланированная задача увидит новое поколение сама
+        if self.tasks:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        task = loop.create_task(self.rebuild())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def rebuild(self):
+        try:
+            while True:
+                generation = self.generation
+                await self.get()
+                if generation == self.generation:
+                    return
+        except Exception:
+            logger.exception("Failed to rebuild home snapshot")
+
+    def fresh(self) -> Optional[CachedResponse]:
+        entry = self.entry
+        if entry is not None and time.time() - entry.created_at <= HOME_SNAPSHOT_TTL:
+            return entry
+        return None
+
+    async def get(self) -> CachedResponse:
+        entry = self.fresh()
+        if entry is not None:
+            return entry
+        async with self.lock:
+            entry = self.fresh()
+            if entry is not None:
+                return entry
+            generation = self.generation
+            body = dump_json(await build_home_payload())
+            entry = CachedResponse(body=body, headers={"ETag": body_etag(body)}, created_at=time.time())
+            # Если во время сборки пришла запись, снимок устарел: отдаем его, но не сохраняем
+            if generation == self.generation:
+                self.entry = entry
+            return entry
+
+home_snapshot = HomeSnapshot()
+on_change("news", "ministries", "leadership", "amendments")(home_snapshot.invalidate)
+
+@api_router.get("/home", response_model=HomeResponse, dependencies=[cache_policy("home")])
+async def get_home(request: Request, response: Response):
+    if db is None:
+        return HomeResponse()
+    return conditional_json(request, response, await home_snapshot.get())
+
+def org_role(role_id) -> dict:
+    # Роль из подтянутых $lookup по ссылке; пустая ссылка дает null
+    return {"$ifNull": [
+        {"$arrayElemAt": [{"$filter": {"input": "$roles", "as": "role", "cond": {"$eq": ["$$role.id", role_id]}}}, 0]},
+        None,
+    ]}
+
+def org_ministry_stages() -> list:
+    # role_id министра и замов разрешаются в том же пайплайне, по индексу roles.id
+    deputy = {field: f"$$deputy.{field}" for field in OrgDeputy.model_fields if field != "role"}
+    minister = {field: f"$minister.{field}" for field in OrgMinister.model_fields if field not in ("role", "deputies")}
+    return [
+        {"$lookup": {"from": "roles", "localField": "minister.role_id", "foreignField": "id", "as": "minister_roles"}},
+        {"$lookup": {"from": "roles", "localField": "minister.deputies.role_id", "foreignField": "id", "as": "deputy_roles"}},
+        # От роли остаются только id и имя: права и код доступа дальше пайплайна не уходят
+        {"$addFields": {"roles": {"$map": {
+            "input": {"$concatArrays": ["$minister_roles", "$deputy_roles"]},
+            "as": "role",
+            "in": {"id": "$$role.id", "name": "$$role.name"},
+        }}}},
+        {"$project": {
+            "_id": 0, "id": 1, "name": 1, "logo": 1,
+            "staff": {"$ifNull": ["$staff", []]},
+            "minister": {"$cond": [
+                {"$ifNull": ["$minister", False]},
+                {
+                    **minister,
+                    "role": org_role("$minister.role_id"),
+                    "deputies": {"$map": {
+                        "input": {"$ifNull": ["$minister.deputies", []]},
+                        "as": "deputy",
+                        "in": {**deputy, "role": org_role("$$deputy.role_id")},
+                    }},
+                },
+                None,
+            ]},
+        }},
+    ]
+
+def org_chart_pipeline(ministry_id: Optional[str] = None) -> list:
+    if ministry_id is not None:
+        return [{"$match": {"id": ministry_id}}, {"$limit": 1}, *org_ministry_stages()]
+    # $facet отдает один документ даже без министерств, поэтому руководство подтягивается всегда.
+    # Сортировка до $facet, иначе индекс по created_at не используется
+    return [
+        {"$sort": {"created_at": 1, "id": 1}},
+        {"$facet": {"ministries": org_ministry_stages()}},
+        {"$lookup": {
+            "from": "leadership",
+            "pipeline": [
+                {"$sort": {"order": 1, "id": 1}},
+                {"$project": {"_id": 0, **{field: 1 for field in OrgLeader.model_fields}}},
+            ],
+            "as": "leadership",
+        }},
+    ]
+
+async def build_org_chart() -> dict:
+    result = await db.ministries.aggregate(org_chart_pipeline()).to_list(1)
+    return result[0] if result else {"leadership": [], "ministries": []}
+
+@api_router.get("/org-chart", response_model=OrgChartResponse,
+                dependencies=[cache_policy("org_chart")])
+async def get_org_chart(request: Request, response: Response):
+    if db is None:
+        return OrgChartResponse()
+    return await cached_json(request, response, ["ministries:list", "roles:list", "leadership:list"],
+                             item_builder(ORG_CHART, build_org_chart))
+
+@api_router.get("/org-chart/{ministry_id}", response_model=OrgMinistry,
+                dependencies=[cache_policy("org_chart")])
+async def get_ministry_org_chart(ministry_id: str, request: Request, response: Response):
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    
+    async def fetch():
+        result = await db.ministries.aggregate(org_chart_pipeline(ministry_id)).to_list(1)
+        if not result:
+            raise HTTPException(status_code=404, detail="Ministry not found")
+        return result[0]
+    return await cached_json(request, response, [f"ministries:{ministry_id}", "roles:list"], item_builder(ORG_MINISTRY, fetch))
+
+SEARCH_BACKEND = os.environ.get('SEARCH_BACKEND', 'auto')  # auto | mongo | memory
+SEARCH_TIMEOUT_MS = int(os.environ.get('SEARCH_TIMEOUT_MS', 300))
+# После ошибки $text в режиме auto ищем в памяти и пробуем $text снова через этот интервал
+SEARCH_RETRY_SECONDS = float(os.environ.get('SEARCH_RETRY_SECONDS', 300))
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+SEARCH_MAX_OFFSET = 500
+SEARCH_SNIPPET_LENGTH = int(os.environ.get('SEARCH_SNIPPET_LENGTH', 200))
+# коллекция -> (поле заголовка, поле текста); вес заголовка как в text-индексе
+SEARCH_COLLECTIONS = {
+    "news": ("title", "content"),
+    "amendments": ("title", "content"),
+    "ministries": ("name", "description"),
+}
+SEARCH_TITLE_WEIGHT = 10
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Упрощенный стеммер: отрезаем самые частые русские окончания, оставляя основу не короче 3 букв
+RUSSIAN_ENDINGS = sorted([
+    "иями", "ями", "ами", "иях", "ией", "иям", "ием", "ого", "его", "ому", "ему", "ыми", "ими",
+    "ать", "ять", "ить", "еть", "ует", "ают", "яют",
+    "ая", "яя", "ое", "ее", "ие", "ые", "ой", "ей", "ий", "ый", "ом", "ем", "ам", "ям", "ах", "ях",
+    "ую", "юю", "ов", "ев", "ью", "ия", "ья", "а", "я", "о", "е", "ы", "и", "у", "ю", "ь", "й",
+], key=len, reverse=True)
+
+def stem(word: str) -> str:
+    word = word.lower().replace("ё", "е")
+    if word.isdigit():
+        return word
+    for ending in RUSSIAN_ENDINGS:
+        if word.endswith(ending) and len(word) - len(ending) >= 3:
+            return word[:-len(ending)]
+    return word
+
+def query_stems(q: str) -> set:
+    return {stem(token) for token in TOKEN_RE.findall(q) if len(token) > 1 or token.isdigit()}
+
+def highlight(text: str, stems: set, length: Optional[int] = None):
+    # Подсветку отдаем смещениями, чтобы фронтенд не вставлял HTML из базы
+    text = text or ""
+    matches = [(m.start(), m.end()) for m in TOKEN_RE.finditer(text) if stem(m.group()) in stems]
+    if length is None or len(text) <= length:
+        return text, [list(match) for match in matches]
+    start = max(0, matches[0][0] - length // 3) if matches else 0
+    if start > 0:
+        space = text.find(" ", start, matches[0][0])
+        start = space + 1 if space != -1 else start
+    end = min(len(text), start + length)
+    prefix = "…" if start > 0 else ""
+    suffix = "…" if end < len(text) else ""
+    shift = len(prefix) - start
+    spans = [[s + shift, e + shift] for s, e in matches if s >= start and e <= end]
+    return f"{prefix}{text[start:end]}{suffix}", spans
+
+def search_hit(collection: str, doc: dict, stems: set, score: float) -> dict:
+    title_field, text_field = SEARCH_COLLECTIONS[collection]
+    title, title_highlights = highlight(doc.get(title_field), stems)
+    snippet, snippet_highlights = highlight(doc.get(text_field), stems, SEARCH_SNIPPET_LENGTH)
+    return {
+        "type": collection,
+        "id": doc["id"],
+        "title": title,
+        "title_highlights": title_highlights,
+        "snippet": snippet,
+        "snippet_highlights": snippet_highlights,
+        "score": round(score, 4),
+    }
+
+class InvertedIndex:
+    # Запасной поиск для баз без text-индексов: индекс строится в памяти процесса и обновляется через on_change.
+    # Изменения, пришедшие во время построения, копятся в pending и перечитываются в конце,
+    # иначе скан мог бы застать документ до записи и потерять ее
+    def __init__(self):
+        self.postings: Dict[str, Dict[tuple, float]] = {}
+        self.docs: Dict[tuple, dict] = {}
+        self.loaded = False
+        self.lock = asyncio.Lock()
+        self.pending: Optional[List[tuple]] = None
+        self.task: Optional[asyncio.Task] = None
+    
+    def add(self, collection: str, doc: dict):
+        key = (collection, doc["id"])
+        self.remove(collection, doc["id"])
+        title_field, text_field = SEARCH_COLLECTIONS[collection]
+        weights: Dict[str, float] = {}
+        for field, weight in ((title_field, SEARCH_TITLE_WEIGHT), (text_field, 1)):
+            for token in TOKEN_RE.findall(doc.get(field) or ""):
+                term = stem(token)
+                weights[term] = weights.get(term, 0) + weight
+        for term, weight in weights.items():
+            self.postings.setdefault(term, {})[key] = weight
+        self.docs[key] = {"id": doc["id"], title_field: doc.get(title_field), text_field: doc.get(text_field), "terms": list(weights)}
+    
+    def remove(self, collection: str, doc_id: str):
+        key = (collection, doc_id)
+        doc = self.docs.pop(key, None)
+        if not doc:
+            return
+        for term in doc["terms"]:
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.pop(key, None)
+                if not postings:
+                    del self.postings[term]
+    
+    async def load_collection(self, collection: str):
+        fields = SEARCH_COLLECTIONS[collection]
+        async for doc in db[collection].find({}, {"_id": 0, "id": 1, **{field: 1 for field in fields}}):
+            self.add(collection, doc)
+    
+    async def refresh(self, collection: str, doc_id: Optional[str]):
+        if doc_id is None:
+            for key in [key for key in self.docs if key[0] == collection]:
+                self.remove(*key)
+            await self.load_collection(collection)
+            return
+        fields = SEARCH_COLLECTIONS[collection]
+        doc = await db[collection].find_one({"id": doc_id}, {"_id": 0, "id": 1, **{field: 1 for field in fields}})
+        if doc:
+            self.add(collection, doc)
+        else:
+            self.remove(collection, doc_id)
+    
+    async def load(self):
+        async with self.lock:
+            if self.loaded:
+                return
+            self.postings, self.docs = {}, {}
+            self.pending = []
+            try:
+                for collection in SEARCH_COLLECTIONS:
+                    await self.load_collection(collection)
+                while self.pending:
+                    changes, self.pending = self.pending, []
+                    for collection, doc_id in dict.fromkeys(changes):
+                        await self.refresh(collection, doc_id)
+                self.loaded = True
+            finally:
+                self.pending = None
+            logger.info(f"Built in-memory search index: {len(self.docs)} documents, {len(self.postings)} terms")
+    
+    async def ready(self, timeout: float) -> bool:
+        # Построение продолжается в фоне, даже если запрос не дождался его в пределах бюджета
+        if self.loaded:
+            return True
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.load())
+        try:
+            await asyncio.wait_for(asyncio.shield(self.task), max(timeout, 0))
+        except asyncio.TimeoutError:
+            return False
+        return self.loaded
+    
+    def reset(self):
+        if self.pending is not None:
+            return
+        self.loaded = False
+        self.postings, self.docs = {}, {}
+    
+    def search(self, stems: set, collections: List[str]) -> List[tuple]:
+        total = len(self.docs) or 1
+        scores: Dict[tuple, float] = {}
+        for term in stems:
+            postings = self.postings.get(term, {})
+            if not postings:
+                continue
+            idf = 1 + math.log(total / len(postings))
+            for key, weight in postings.items():
+                if key[0] in collections:
+                    scores[key] = scores.get(key, 0) + weight * idf
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    
+    def snapshot(self) -> dict:
+        return {"loaded": self.loaded, "building": self.pending is not None, "documents": len(self.docs),
+                "terms": len(self.postings)}
+
+search_index = InvertedIndex()
+# retry_at - момент (time.monotonic), после которого режим auto снова пробует $text
+search_state = {"backend": SEARCH_BACKEND if SEARCH_BACKEND != "auto" else "mongo", "retry_at": 0.0}
+
+@on_change(*SEARCH_COLLECTIONS)
+async def refresh_search_index(collection: str, op: str, doc_id: Optional[str]):
+    if search_index.pending is not None:
+        search_index.pending.append((collection, doc_id))
+        return
+    if not search_index.loaded:
+        return
+    if doc_id is None:
+        search_index.reset()
+        return
+    await search_index.refresh(collection, doc_id)
+
+async def mongo_search_collection(collection: str, q: str, fetch_limit: int) -> List[tuple]:
+    fields = SEARCH_COLLECTIONS[collection]
+    cursor = db[collection].find(
+        {"$text": {"$search": q}},
+        {"_id": 0, "id": 1, **{field: 1 for field in fields}, "score": {"$meta": "textScore"}}
+    ).sort([("score", {"$meta": "textScore"})]).limit(fetch_limit).max_time_ms(SEARCH_TIMEOUT_MS)
+    return [(collection, doc) for doc in await cursor.to_list(fetch_limit)]
+
+async def mongo_search(q: str, collections: List[str], fetch_limit: int):
+    tasks = [asyncio.create_task(mongo_search_collection(collection, q, fetch_limit)) for collection in collections]
+    done, pending = await asyncio.wait(tasks, timeout=SEARCH_TIMEOUT_MS / 1000)
+    for task in pending:
+        task.cancel()
+    partial = bool(pending)
+    rows = []
+    for task in done:
+        error = task.exception()
+        if isinstance(error, ExecutionTimeout):
+            partial = True
+        elif error is not None:
+            raise error
+        else:
+            rows.extend(task.result())
+    rows.sort(key=lambda row: row[1]["score"], reverse=True)
+    return rows, partial
+
+@api_router.get("/search")
+async def search(
+    q: str = Query(..., min_length=2, max_length=200),
+    types: Optional[str] = None,
+    offset: int = Query(0, ge=0, le=SEARCH_MAX_OFFSET),
+    limit: int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT)
+):
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    collections = list(SEARCH_COLLECTIONS)
+    if types:
+        collections = [name.strip() for name in types.split(",") if name.strip() in SEARCH_COLLECTIONS]
+        if not collections:
+            raise HTTPException(status_code=400, detail=f"Unknown types, expected: {', '.join(SEARCH_COLLECTIONS)}")
+    stems = query_stems(q)
+    
+    started = time.perf_counter()
+    fetch_limit = offset + limit + 1
+    ranked = []
+    partial = False
+    backend = search_state["backend"]
+    if backend == "memory" and SEARCH_BACKEND == "auto" and time.monotonic() >= search_state["retry_at"]:
+        backend = "mongo"
+    if stems and backend == "mongo":
+        try:
+            rows, partial = await mongo_search(q, collections, fetch_limit)
+            ranked = [(collection, doc, doc["score"]) for collection, doc in rows]
+            if search_state["backend"] != "mongo":
+                logger.info("Text search is available again, dropping the in-memory index")
+                search_state["backend"] = "mongo"
+                search_index.reset()
+        except OperationFailure as e:
+            if SEARCH_BACKEND != "auto":
+                raise
+            # Нет text-индекса (или сервер его не поддерживает): ищем в памяти до следующей попытки
+            logger.warning(f"Text search unavailable, using the in-memory index for {SEARCH_RETRY_SECONDS:g}s: {e}")
+            search_state.update(backend="memory", retry_at=time.monotonic() + SEARCH_RETRY_SECONDS)
+            backend = "memory"
+    if stems and backend == "memory":
+        # Построение индекса укладываем в тот же бюджет, что и $text; не успели - отдаем partial
+        budget = SEARCH_TIMEOUT_MS / 1000 - (time.perf_counter() - started)
+        if await search_index.ready(budget):
+            ranked = [
+                (collection, search_index.docs[(collection, doc_id)], score)
+                for (collection, doc_id), score in search_index.search(stems, collections)[:fetch_limit]
+            ]
+        else:
+            partial = True
+    
+    page = ranked[offset:offset + limit]
+    return {
+        "query": q,
+        "backend": backend,
+        "results": [search_hit(collection, doc, stems, score) for collection, doc, score in page],
+        "offset": offset,
+        "limit": limit,
+        "has_more": len(ranked) > offset + limit,
+        "partial": partial,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2)
+    }
+
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 500))
+IMPORT_MAX_LINE_BYTES = int(os.environ.get('IMPORT_MAX_LINE_BYTES', 1024 * 1024))
+IMPORT_MAX_REPORTED_ERRORS = 100
+# коллекция -> (модель для проверки строки, право на импорт/экспорт); users не переносим из-за паролей
+PORTABLE_COLLECTIONS = {
+    "news": (NewsCreate, "can_manage_news"),
+    "amendments": (AmendmentCreate, "can_manage_legislation"),
+    "ministries": (MinistryCreate, "can_manage_ministries"),
+    "leadership": (LeadershipCreate, "can_manage_leadership"),
+    "roles": (RoleCreate, "can_manage_roles"),
+}
+
+async def portable_collection(collection: str, current_user: dict):
+    if collection not in PORTABLE_COLLECTIONS:
+        raise HTTPException(status_code=404, detail=f"Unknown collection, expected: {', '.join(PORTABLE_COLLECTIONS)}")
+    if db is None:
+        raise HTTPException(status_code=503, detail="Database not available")
+    model, permission = PORTABLE_COLLECTIONS[collection]
+    await require_permission(permission)(current_user)
+    return model
+
+def loads_json(line: bytes):
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+@api_router.get("/admin/export/{collection}")
+async def export_collection(collection: str, current_user: dict = Depends(get_current_user)):
+    await portable_collection(collection, current_user)
+    
+    async def rows():
+        async for doc in db[collection].find({}, {"_id": 0}).batch_size(IMPORT_BATCH_SIZE):
+            yield dump_json(doc) + b"\n"
+    
+    filename = f"{collection}-{datetime.now(timezone.utc).strftime('%Y%m%d-%H%M%S')}.ndjson"
+    return StreamingResponse(
+        rows(),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+async def import_operation(collection: str, model, row, mode: str, user_id: str):
+    if not isinstance(row, dict):
+        raise ValueError("row must be a JSON object")
+    await externalize_fields(collection, row)
+    data = model.model_validate(row).model_dump()
+    doc_id = row.get("id") or str(uuid.uuid4())
+    if not isinstance(doc_id, str):
+        raise ValueError("id must be a string")
+    # По created_at строятся сортировка и курсоры списков: число или объект их бы сломали
+    created_at = row.get("created_at") or datetime.now(timezone.utc).isoformat()
+    try:
+        datetime.fromisoformat(created_at)
+    except (TypeError, ValueError):
+        raise ValueError("created_at must be an ISO 8601 string")
+    on_insert = {"id": doc_id, "created_at": created_at}
+    if collection == "roles":
+        on_insert.update(access_code=generate_access_code(), created_by=user_id)
+    if mode == "insert":
+        return doc_id, InsertOne({**data, **on_insert, "version": 1})
+    return doc_id, UpdateOne({"id": doc_id}, {"$set": data, "$setOnInsert": on_insert, "$inc": {"version": 1}}, upsert=True)
+
+@api_router.post("/admin/import/{collection}")
+async def import_collection(
+    collection: str,
+    request: Request,
+    mode: str = Query("upsert", pattern="^(upsert|insert)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    model = await portable_collection(collection, current_user)
+    report = {"collection": collection, "mode": mode, "rows": 0, "inserted": 0, "updated": 0, "failed": 0, "errors": []}
+    
+    def record_error(line_no: int, doc_id: Optional[str], error: str):
+        report["failed"] += 1
+        if len(report["errors"]) < IMPORT_MAX_REPORTED_ERRORS:
+            report["errors"].append({"line": line_no, "id": doc_id, "error": error})
+    
+    batch: List[tuple] = []
+    written = False
+    
+    async def flush():
+        nonlocal written
+        if not batch:
+            return
+        operations = [operation for _, _, operation in batch]
+        written = True
+        try:
+            result = await db[collection].bulk_write(operations, ordered=False)
+            details = result.bulk_api_result
+        except BulkWriteError as e:
+            details = e.details
+            for error in details.get("writeErrors", []):
+                line_no, doc_id, _ = batch[error["index"]]
+                record_error(line_no, doc_id, error.get("errmsg", "write failed"))
+        report["inserted"] += details.get("nInserted", 0) + details.get("nUpserted", 0)
+        report["updated"] += details.get("nMatched", 0)
+        if collection == "roles":
+            # Права ролей могли измениться: как и PUT /roles, сбрасываем закешированных пользователей
+            for _, doc_id, _ in batch:
+                invalidate_principals(role_id=doc_id)
+        batch.clear()
+    
+    started = time.perf_counter()
+    buffer = b""
+    line_no = 0
+    
+    async def handle(line: bytes):
+        if not line.strip():
+            return
+        report["rows"] += 1
+        doc_id = None
+        try:
+            row = loads_json(line)
+            doc_id = row.get("id") if isinstance(row, dict) else None
+            doc_id, operation = await import_operation(collection, model, row, mode, current_user["id"])
+        except ValidationError as e:
+            record_error(line_no, doc_id, "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()))
+            return
+        except Exception as e:
+            record_error(line_no, doc_id, str(e))
+            return
+        batch.append((line_no, doc_id, operation))
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    
+    # Тело читаем потоком: в памяти только текущий пакет и недочитанная строка
+    try:
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                line_no += 1
+                await handle(line)
+            if len(buffer) > IMPORT_MAX_LINE_BYTES:
+                raise HTTPException(status_code=413, detail=f"Line {line_no + 1} is longer than {IMPORT_MAX_LINE_BYTES} bytes")
+        if buffer:
+            line_no += 1
+            await handle(buffer)
+        await flush()
+    finally:
+        # Импорт, прерванный 413 или обрывом соединения, уже записал часть пакетов
+        if written:
+            await publish_change(collection, "import", None)
+    elapsed = time.perf_counter() - started
+    report["elapsed_seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["rows"] / elapsed, 1) if elapsed else None
+    logger.info(f"Imported {collection}: {report['rows']} rows, {report['failed']} failed, {report['rows_per_second']} rows/s")
+    return report
+
+LIVE_COLLECTIONS = ("news", "amendments")
+
+class UpdateClient:
+    __slots__ = ("queue", "collections", "overflowed")
+    
+    def __init__(self, collections: set):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SSE_CLIENT_QUEUE)
+        self.collections = collections
+        self.overflowed = False
+
+class UpdateBroadcaster:
+    # id события - "<BOOT_ID>-<номер>": после перезапуска или переключения на другой воркер
+    # номера несравнимы, и клиент получает reset вместо повтора
+    def __init__(self, ring_size: int):
+        self.ring: deque = deque(maxlen=ring_size)
+        self.seq = 0
+        self.clients: set = set()
+        self.stats = {"published": 0, "replayed": 0, "resets": 0, "overflows": 0, "rejected": 0, "connections_total": 0}
+
+    def publish(self, collection: str, op: str, doc_id: Optional[str]):
+        self.seq += 1
+        data = {"op": op, "id": doc_id} if doc_id is not None else {"op": "reset"}
+        event = (self.seq, collection, format_sse(f"{BOOT_ID}-{self.seq}", collection, data))
+        self.ring.append(event)
+        self.stats["published"] += 1
+        for client in self.clients:
+            if collection not in client.collections or client.overflowed:
+                continue
+            try:
+                client.queue.put_nowait(event[2])
+            except asyncio.QueueFull:
+                # Медленный клиент: закрываем поток, переподключившись он дочитает из буфера
+                client.overflowed = True
+                self.stats["overflows"] += 1
+                client.queue.get_nowait()
+                client.queue.put_nowait(None)
+
+    def replay(self, last_event_id: str, collections: set) -> Optional[List[bytes]]:
+        # None - события после last_event_id потеряны, клиенту нужно перечитать списки
+        boot, _, seq = last_event_id.partition("-")
+        if boot != BOOT_ID or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq > self.seq:
+            return None
+        if seq < self.seq and (not self.ring or self.ring[0][0] > seq + 1):
+            return None
+        return [payload for number, collection, payload in self.ring if number > seq and collection in collections]
+
+    def subscribe(self, collections: set) -> UpdateClient:
+        client = UpdateClient(collections)
+        self.clients.add(client)
+        self.stats["connections_total"] += 1
+        return client
+
+    def unsubscribe(self, client: UpdateClient):
+        self.clients.discard(client)
+
+    def snapshot(self) -> dict:
+        return {"clients": len(self.clients), "max_clients": SSE_MAX_CLIENTS, "buffered": len(self.ring),
+                "last_event_id": f"{BOOT_ID}-{self.seq}", **self.stats}
+
+def format_sse(event_id: Optional[str], event: str, data: dict) -> bytes:
+    head = f"id: {event_id}\n" if event_id else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode()
+
+update_broadcaster = UpdateBroadcaster(SSE_RING_SIZE)
+# С change streams записи всех воркеров приходят из потока, и локальные события их бы задвоили
+on_change(*LIVE_COLLECTIONS, source="stream" if CHANGE_STREAMS_ENABLED else "local")(update_broadcaster.publish)
+
+@api_router.get("/stream/updates")
+async def stream_updates(
+    request: Request,
+    collections: Optional[str] = Query(None, description="Comma-separated subset of news,amendments"),
+    last_event_id: Optional[str] = Header(None)
+):
+    wanted = set(LIVE_COLLECTIONS)
+    if collections:
+        wanted = {name.strip() for name in collections.split(",") if name.strip()}
+        unknown = wanted - set(LIVE_COLLECTIONS)
+        if unknown or not wanted:
+            raise HTTPException(status_code=400, detail=f"Unknown collections: {', '.join(sorted(unknown)) or '-'}")
+    if len(update_broadcaster.clients) >= SSE_MAX_CLIENTS:
+        update_broadcaster.stats["rejected"] += 1
+        raise HTTPException(status_code=503, detail="Too many live connections", headers={"Retry-After": str(SSE_RETRY_MS // 1000 or 1)})
+    
+    async def events():
+        # Подписка создается внутри генератора: если клиент ушел до начала потока, снимать нечего.
+        # Подписываемся до повтора, чтобы не потерять события между ними
+        client = update_broadcaster.subscribe(wanted)
+        try:
+            backlog: List[bytes] = []
+            if last_event_id:
+                replayed = update_broadcaster.replay(last_event_id, wanted)
+                if replayed is None:
+                    update_broadcaster.stats["resets"] += 1
+                    backlog.append(format_sse(f"{BOOT_ID}-{update_broadcaster.seq}", "reset", {"collections": sorted(wanted)}))
+                else:
+                    update_broadcaster.stats["replayed"] += len(replayed)
+                    backlog.extend(replayed)
+                # Повтор уже содержит то, что успело попасть в очередь
+                while not client.queue.empty():
+                    payload = client.queue.get_nowait()
+                    if payload is not None and payload not in backlog:
+                        backlog.append(payload)
+            yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+            for payload in backlog:
+                yield payload
+            while True:
+                try:
+                    payload = await asyncio.wait_for(client.queue.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b": ping\n\n"
+                    continue
+                if payload is None:
+                    return
+                yield payload
+        finally:
+            update_broadcaster.unsubscribe(client)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache, no-transform",
+        # nginx иначе буферизует поток
+        "X-Accel-Buffering": "no",
+    })
+
+@api_router.get("/health/live")
+async def health_live():
+    return {"status": "ok"}
+
+@api_router.get("/health/ready")
+async def health_ready():
+    headers = {"Cache-Control": "no-store"}
+    pool = pool_monitor.snapshot()
+    report = {"status": "ready", "pool": pool}
+    if db is None:
+        return JSONResponse({"status": "unavailable", "reason": "database not configured"}, status_code=503, headers=headers)
+    
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=HEALTH_PING_TIMEOUT_MS / 1000)
+        report["ping_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    except asyncio.TimeoutError:
+        report.update(status="unavailable", reason=f"ping exceeded {HEALTH_PING_TIMEOUT_MS}ms")
+    except Exception as e:
+        logger.warning(f"Readiness ping failed: {e}")
+        report.update(status="unavailable", reason=f"ping failed: {type(e).__name__}")
+    
+    if report["status"] == "ready" and pool["utilization"] >= HEALTH_POOL_SATURATION and pool["waiting"] > 0:
+        report.update(status="unavailable", reason="connection pool saturated")
+    return JSONResponse(report, status_code=200 if report["status"] == "ready" else 503, headers=headers)
+
+@api_router.get("/admin/metrics")
+async def get_admin_metrics(current_user: dict = Depends(require_permission("can_manage_roles"))):
+    return {
+        "password_hashing": password_hasher.snapshot(),
+        "principal_cache": principal_cache.snapshot(),
+        "response_cache": response_cache.snapshot(),
+        "static_assets": static_assets.snapshot(),
+        "compression": compression_snapshot(),
+        "search": {"backend": search_state["backend"], "memory_index": search_index.snapshot()},
+        "mongo_pool": pool_monitor.snapshot(),
+        "auth_rate_limit": auth_limiter.snapshot(),
+        "change_streams": change_bus.snapshot(),
+        "live_updates": update_broadcaster.snapshot(),
+        "prerender": page_snapshots.snapshot()
+    }
 
 @api_router.get("/")
 async def root():
@@ -737,41 +3405,561 @@ async def root():
 
 app.include_router(api_router)
 
+class RouteMetrics:
+    __slots__ = ("method", "route", "requests", "latency", "response_bytes")
+    
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.requests = {}
+        self.latency = HTTP_LATENCY.labels(method, route)
+        self.response_bytes = HTTP_RESPONSE_BYTES.labels(method, route)
+
+class MetricsMiddleware:
+    # Дочерние метрики по (метод, шаблон маршрута) кешируются, чтобы не искать лейблы на каждый запрос
+    def __init__(self, app):
+        self.app = app
+        self.routes: Dict[tuple, RouteMetrics] = {}
+        self.in_flight = {}
+    
+    def route_metrics(self, method: str, route: str) -> RouteMetrics:
+        metrics = self.routes.get((method, route))
+        if metrics is None:
+            metrics = self.routes[(method, route)] = RouteMetrics(method, route)
+        return metrics
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        state = {"status": 500, "bytes": 0}
+        
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                state["bytes"] += len(message.get("body", b""))
+            await send(message)
+        
+        in_flight = self.in_flight.get(scope["method"])
+        if in_flight is None:
+            in_flight = self.in_flight[scope["method"]] = HTTP_IN_FLIGHT.labels(scope["method"])
+        started = time.perf_counter()
+        in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            in_flight.dec()
+            # Шаблон маршрута, а не путь: /api/news/{news_id}, иначе кардинальность лейблов не ограничена
+            route = scope.get("route")
+            metrics = self.route_metrics(scope["method"], getattr(route, "path", "unmatched"))
+            metrics.latency.observe(time.perf_counter() - started)
+            metrics.response_bytes.observe(state["bytes"])
+            counter = metrics.requests.get(state["status"])
+            if counter is None:
+                counter = metrics.requests[state["status"]] = HTTP_REQUESTS.labels(metrics.method, metrics.route, str(state["status"]))
+            counter.inc()
+
+class SnapshotCollector:
+    # Состояние пулов и очередей снимается только в момент запроса /metrics
+    def collect(self):
+        pool = pool_monitor.snapshot()
+        for name, help_text in (("open", "Open MongoDB connections"), ("checked_out", "MongoDB connections in use"),
+                                ("waiting", "Requests waiting for a MongoDB connection")):
+            family = GaugeMetricFamily(f"mongo_pool_{name}", help_text, labels=["address"])
+            for address, stats in pool["pools"].items():
+                family.add_metric([address], stats[name])
+            yield family
+        hashing = password_hasher.snapshot()
+        family = GaugeMetricFamily("password_hash_pending", "bcrypt jobs queued or running")
+        family.add_metric([], hashing.get("pending", 0))
+        yield family
+        for name, cache in (("response", response_cache), ("principal", principal_cache)):
+            for key, value in cache.snapshot().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    family = GaugeMetricFamily(f"{name}_cache_{key}", f"{name} cache {key}")
+                    family.add_metric([], value)
+                    yield family
+
+if METRICS_ENABLED:
+    prometheus_client.REGISTRY.register(SnapshotCollector())
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics are disabled")
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(prometheus_client.generate_latest(), media_type=prometheus_client.CONTENT_TYPE_LATEST)
+
 FRONTEND_DIR = Path(__file__).parent.parent / "frontend" / "build"
 
-if FRONTEND_DIR.exists():
-    logger.info(f"Frontend directory found at: {FRONTEND_DIR}")
+STATIC_IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+STATIC_INDEX_CACHE_CONTROL = os.environ.get('STATIC_INDEX_CACHE_CONTROL', 'no-cache')
+STATIC_DEFAULT_CACHE_CONTROL = os.environ.get('STATIC_DEFAULT_CACHE_CONTROL', 'public, max-age=3600')
+STATIC_PRECOMPRESS_MIN_BYTES = int(os.environ.get('STATIC_PRECOMPRESS_MIN_BYTES', 1024))
+STATIC_COMPRESSIBLE_TYPES = ("text/", "application/javascript", "application/json", "image/svg+xml")
+# CRA добавляет 8 hex-символов хеша содержимого: main.5dd10092.js
+FINGERPRINT_RE = re.compile(r"\.[0-9a-f]{8,}\.")
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+# Готовые HTML-снимки публичных страниц: заголовок, мета-теги, текст и ответы API для первого рендера
+PRERENDER_ENABLED = os.environ.get('PRERENDER_ENABLED', 'true').lower() == 'true'
+PRERENDER_CACHE_SIZE = int(os.environ.get('PRERENDER_CACHE_SIZE', 1000))
+# Как HOME_SNAPSHOT_TTL: предел устаревания HTML-снимков, если запись прошла через другой воркер
+PRERENDER_TTL = float(os.environ.get('PRERENDER_TTL', 300))
+PRERENDER_CACHE_CONTROL = os.environ.get('PRERENDER_CACHE_CONTROL', 'no-cache')
+# Абсолютный адрес сайта для og:image и canonical; без него эти теги не выводятся
+PUBLIC_BASE_URL = os.environ.get('PUBLIC_BASE_URL', '').rstrip('/')
+SITE_NAME = os.environ.get('SITE_NAME', 'Правительство штата Seattle')
+PRERENDER_DESCRIPTION_LENGTH = 200
+
+class StaticAsset(BaseModel):
+    path: str
+    file: Path
+    content_type: str
+    size: int
+    etag: str
+    cache_control: str
+    encodings: Dict[str, bytes] = {}
+
+# Индекс сборки фронтенда: строится один раз при старте, сжатые варианты держим в памяти
+class StaticAssets:
+    
+    def __init__(self, root: Path):
+        self.root = root
+        self.assets: Dict[str, StaticAsset] = {}
+    
+    def fingerprinted(self) -> set:
+        manifest_path = self.root / "asset-manifest.json"
+        if not manifest_path.is_file():
+            return set()
+        manifest = json.loads(manifest_path.read_text())
+        return {
+            path.lstrip("/") for path in manifest.get("files", {}).values()
+            if FINGERPRINT_RE.search(path)
+        }
+    
+    def compress(self, file: Path, data: bytes) -> Dict[str, bytes]:
+        encodings = {}
+        # Если сборка уже положила .br/.gz рядом с файлом, берем их
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            precompressed = file.with_name(file.name + suffix)
+            if precompressed.is_file():
+                encodings[encoding] = precompressed.read_bytes()
+        if "br" not in encodings and brotli is not None:
+            encodings["br"] = brotli.compress(data, quality=11)
+        if "gzip" not in encodings:
+            encodings["gzip"] = gzip.compress(data, compresslevel=9, mtime=0)
+        return {encoding: body for encoding, body in encodings.items() if len(body) < len(data)}
+    
+    def load(self):
+        fingerprinted = self.fingerprinted()
+        assets = {}
+        for file in sorted(self.root.rglob("*")):
+            if not file.is_file() or file.suffix in (".br", ".gz"):
+                continue
+            path = file.relative_to(self.root).as_posix()
+            data = file.read_bytes()
+            content_type = mimetypes.guess_type(path)[0] or "application/octet-stream"
+            if path == "index.html":
+                cache_control = STATIC_INDEX_CACHE_CONTROL
+            elif path in fingerprinted:
+                cache_control = STATIC_IMMUTABLE_CACHE_CONTROL
+            else:
+                cache_control = STATIC_DEFAULT_CACHE_CONTROL
+            encodings = {}
+            if content_type.startswith(STATIC_COMPRESSIBLE_TYPES) and len(data) >= STATIC_PRECOMPRESS_MIN_BYTES:
+                encodings = self.compress(file, data)
+            assets[path] = StaticAsset(
+                path=path,
+                file=file,
+                content_type=content_type,
+                size=len(data),
+                etag=f'"{hashlib.sha256(data).hexdigest()[:32]}"',
+                cache_control=cache_control,
+                encodings=encodings
+            )
+        self.assets = assets
+        compressed = sum(1 for asset in assets.values() if asset.encodings)
+        logger.info(f"Indexed {len(assets)} static assets from {self.root} ({compressed} precompressed)")
+    
+    def get(self, path: str) -> Optional[StaticAsset]:
+        return self.assets.get(path)
+    
+    def snapshot(self) -> dict:
+        return {
+            "assets": len(self.assets),
+            "bytes": sum(asset.size for asset in self.assets.values()),
+            "compressed_bytes": {
+                encoding: sum(len(asset.encodings[encoding]) for asset in self.assets.values() if encoding in asset.encodings)
+                for encoding in ("br", "gzip")
+            }
+        }
+
+def pick_encoding(accept_encoding: str, available) -> Optional[str]:
+    accepted = set()
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if params.strip().replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip().lower())
+    for encoding in ("br", "gzip"):
+        if encoding in available and (encoding in accepted or "*" in accepted):
+            return encoding
+    return None
+
+def parse_range(header: str, size: int):
+    match = RANGE_RE.fullmatch(header.strip())
+    # Несколько диапазонов и нераспознанные заголовки игнорируем: отдаем файл целиком
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        start, end = max(0, size - int(last)), size - 1
+    else:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, detail="Range not satisfiable", headers={"Content-Range": f"bytes */{size}"})
+    return start, end
+
+def _read_range(file: Path, start: int, length: int) -> bytes:
+    with open(file, "rb") as f:
+        f.seek(start)
+        return f.read(length)
+
+async def serve_asset(asset: StaticAsset, request: Request) -> Response:
+    headers = {"Cache-Control": asset.cache_control, "ETag": asset.etag, "Accept-Ranges": "bytes"}
+    if asset.encodings:
+        headers["Vary"] = "Accept-Encoding"
+    if etag_matches(request.headers.get("if-none-match"), asset.etag):
+        return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (if_range is None or if_range == asset.etag):
+        byte_range = parse_range(range_header, asset.size)
+        if byte_range:
+            start, end = byte_range
+            body = await asyncio.to_thread(_read_range, asset.file, start, end - start + 1)
+            headers["Content-Range"] = f"bytes {start}-{end}/{asset.size}"
+            return Response(body, status_code=206, media_type=asset.content_type, headers=headers)
+    
+    encoding = pick_encoding(request.headers.get("accept-encoding", ""), asset.encodings)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(asset.encodings[encoding], media_type=asset.content_type, headers=headers)
+    return FileResponse(asset.file, media_type=asset.content_type, headers=headers)
+
+static_assets = StaticAssets(FRONTEND_DIR)
+
+TITLE_RE = re.compile(r"<title>.*?</title>", re.S)
+META_DESCRIPTION_RE = re.compile(r'<meta name="description"[^>]*>')
+ROOT_DIV_RE = re.compile(r'<div id="root">\s*</div>')
+
+class PrerenderedPage(BaseModel):
+    path: str
+    body: bytes
+    etag: str
+    encodings: Dict[str, bytes] = {}
+    created_at: float
+
+def excerpt(text: str, length: int = PRERENDER_DESCRIPTION_LENGTH) -> str:
+    text = " ".join((text or "").split())
+    return text if len(text) <= length else text[:length].rsplit(" ", 1)[0] + "…"
+
+def paragraphs(text: str) -> str:
+    return "".join(f"<p>{html.escape(part)}</p>" for part in (text or "").split("\n") if part.strip())
+
+def absolute_url(url: Optional[str]) -> Optional[str]:
+    if not url:
+        return None
+    if url.startswith(("http://", "https://")):
+        return url
+    return f"{PUBLIC_BASE_URL}{url}" if PUBLIC_BASE_URL and url.startswith("/") else None
+
+def inline_json(data) -> str:
+    # Внутри <script> нельзя допустить "</script>" и разделители строк JS
+    return (dump_json(data).decode().replace("<", "\\u003c").replace(">", "\\u003e").replace("&", "\\u0026")
+            .replace("\u2028", "\\u2028").replace("\u2029", "\\u2029"))
+
+def render_document(template: str, path: str, page: dict) -> bytes:
+    title = f"{page['title']} — {SITE_NAME}"
+    description = html.escape(page["description"], quote=True)
+    head = [
+        f'<meta property="og:title" content="{html.escape(page["title"], quote=True)}"/>',
+        f'<meta property="og:description" content="{description}"/>',
+        f'<meta property="og:type" content="{page.get("type", "website")}"/>',
+        f'<meta property="og:site_name" content="{html.escape(SITE_NAME, quote=True)}"/>',
+    ]
+    image = absolute_url(page.get("image"))
+    if image:
+        head.append(f'<meta property="og:image" content="{html.escape(image, quote=True)}"/>')
+    if PUBLIC_BASE_URL:
+        head.append(f'<link rel="canonical" href="{html.escape(PUBLIC_BASE_URL + path, quote=True)}"/>')
+    head.append(f"<script>window.__INITIAL_STATE__={inline_json(page['state'])}</script>")
     
-    # Монтируем static из папки build/static
-    static_dir = FRONTEND_DIR / "static"
-    if static_dir.exists():
-        app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
-        logger.info(f"Static directory mounted from: {static_dir}")
+    document = TITLE_RE.sub(lambda m: f"<title>{html.escape(title)}</title>", template, count=1)
+    description_tag = f'<meta name="description" content="{description}"/>'
+    if META_DESCRIPTION_RE.search(document):
+        document = META_DESCRIPTION_RE.sub(lambda m: description_tag, document, count=1)
     else:
-        logger.warning(f"Static directory not found at: {static_dir}")
+        head.insert(0, description_tag)
+    document = document.replace("</head>", "".join(head) + "</head>", 1)
+    document = ROOT_DIV_RE.sub(lambda m: f'<div id="root">{page["html"]}</div>', document, count=1)
+    return document.encode()
+
+def complete_list(path: str, docs: List[dict], next_cursor: Optional[str]) -> dict:
+    # Обрезанный список в снимок не кладем: страница сама загрузит его целиком по курсору
+    return {} if next_cursor else {path: docs}
+
+async def render_news_list() -> dict:
+    current, current_next = await fetch_page(db.news, {"is_archive": False}, NEWS_PROJECTION, "created_at", True, None, LIST_DEFAULT_LIMIT, None)
+    archive, archive_next = await fetch_page(db.news, {"is_archive": True}, NEWS_PROJECTION, "created_at", True, None, LIST_DEFAULT_LIMIT, None)
+    items = "".join(
+        f'<li><a href="/news/{html.escape(item["id"])}">{html.escape(item["title"])}</a> '
+        f'<time datetime="{html.escape(item["created_at"])}">{html.escape(item["created_at"][:10])}</time></li>'
+        for item in current
+    )
+    return {
+        "title": "Новости",
+        "description": "Актуальные события, объявления и новости правительства штата Seattle.",
+        "image": next((item.get("image") for item in current if item.get("image")), None),
+        "html": f"<main><h1>Новости</h1><ul>{items}</ul></main>",
+        "state": {**complete_list("/news?archive=false", current, current_next),
+                  **complete_list("/news?archive=true", archive, archive_next)},
+    }
+
+async def render_news_item(news_id: str) -> Optional[dict]:
+    item = await db.news.find_one({"id": news_id}, NEWS_PROJECTION)
+    if not item:
+        return None
+    return {
+        "title": item["title"],
+        "description": excerpt(item.get("content", "")),
+        "image": item.get("image"),
+        "type": "article",
+        "html": (f'<main><article><h1>{html.escape(item["title"])}</h1>'
+                 f'<time datetime="{html.escape(item["created_at"])}">{html.escape(item["created_at"][:10])}</time>'
+                 f'{paragraphs(item.get("content", ""))}</article></main>'),
+        "state": {f"/news/{news_id}": item},
+    }
+
+async def render_ministries() -> dict:
+    ministries, next_cursor = await fetch_page(db.ministries, {}, MINISTRY_PROJECTION, "created_at", False, None, LIST_DEFAULT_LIMIT, None)
+    items = "".join(
+        f'<li><a href="/ministries/{html.escape(item["id"])}">{html.escape(item["name"])}</a></li>'
+        for item in ministries
+    )
+    return {
+        "title": "Министерства",
+        "description": "Министерства правительства штата Seattle, их руководители и состав.",
+        "image": None,
+        "html": f"<main><h1>Министерства</h1><ul>{items}</ul></main>",
+        "state": complete_list("/ministries", ministries, next_cursor),
+    }
+
+async def render_ministry(ministry_id: str) -> Optional[dict]:
+    ministry = await db.ministries.find_one({"id": ministry_id}, MINISTRY_PROJECTION)
+    if not ministry:
+        return None
+    minister = ministry.get("minister") or {}
+    people = ""
+    if minister.get("name"):
+        deputies = "".join(
+            f'<li>{html.escape(deputy["name"])}, {html.escape(deputy.get("position") or "")}</li>'
+            for deputy in minister.get("deputies") or []
+        )
+        people = f'<h2>Министр</h2><p>{html.escape(minister["name"])}</p>' + (f"<h2>Заместители</h2><ul>{deputies}</ul>" if deputies else "")
+    return {
+        "title": ministry["name"],
+        "description": excerpt(ministry.get("description", "")),
+        "image": ministry.get("logo") or minister.get("photo"),
+        "html": f'<main><h1>{html.escape(ministry["name"])}</h1>{paragraphs(ministry.get("description", ""))}{people}</main>',
+        "state": {f"/ministries/{ministry_id}": ministry},
+    }
+
+async def render_amendments() -> dict:
+    amendments, next_cursor = await fetch_page(db.amendments, {}, AMENDMENT_PROJECTION, "created_at", True, None, LIST_DEFAULT_LIMIT, None)
+    items = "".join(
+        f'<li>№{html.escape(item["number"])}: {html.escape(item["title"])} ({html.escape(item.get("status") or "")})</li>'
+        for item in amendments
+    )
+    return {
+        "title": "Законодательство",
+        "description": "Поправки и законодательные акты правительства штата Seattle.",
+        "image": None,
+        "html": f"<main><h1>Законодательство</h1><ul>{items}</ul></main>",
+        "state": complete_list("/amendments", amendments, next_cursor),
+    }
+
+# (шаблон пути, коллекция, функция рендера); пути без ведущего слэша, как в serve_spa
+PRERENDER_ROUTES = [
+    (re.compile(r"news"), "news", render_news_list),
+    (re.compile(r"news/([\w-]+)"), "news", render_news_item),
+    (re.compile(r"ministries"), "ministries", render_ministries),
+    (re.compile(r"ministries/([\w-]+)"), "ministries", render_ministry),
+    (re.compile(r"amendments"), "amendments", render_amendments),
+]
+
+def match_prerender(path: str):
+    for pattern, collection, render in PRERENDER_ROUTES:
+        match = pattern.fullmatch(path)
+        if match:
+            return collection, render, match.groups()
+    return None
+
+class PageSnapshots:
+    # Снимки живут в памяти процесса; запись в коллекцию пересобирает только затронутые страницы
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.pages: "OrderedDict[str, PrerenderedPage]" = OrderedDict()
+        self.building: Dict[str, asyncio.Task] = {}
+        self.tasks: set = set()
+        self.template: Optional[tuple] = None
+        self.invalidations = 0
+        self.stats = {"hits": 0, "misses": 0, "builds": 0, "regenerated": 0, "not_found": 0, "errors": 0}
+    
+    def load_template(self) -> Optional[str]:
+        index = static_assets.get("index.html")
+        if index is None:
+            return None
+        if self.template is None or self.template[0] != index.etag:
+            self.template = (index.etag, index.file.read_text(encoding="utf-8"))
+        return self.template[1]
+    
+    async def get(self, path: str) -> Optional[PrerenderedPage]:
+        path = path.strip("/")
+        page = self.pages.get(path)
+        if page is not None and time.time() - page.created_at > PRERENDER_TTL:
+            del self.pages[path]
+            page = None
+        if page is not None:
+            self.pages.move_to_end(path)
+            self.stats["hits"] += 1
+            return page
+        if match_prerender(path) is None or db is None:
+            return None
+        self.stats["misses"] += 1
+        # Одновременные запросы одной страницы ждут одну сборку
+        task = self.building.get(path)
+        if task is None:
+            task = self.building[path] = asyncio.create_task(self.build(path))
+            task.add_done_callback(lambda _: self.building.pop(path, None))
+        return await asyncio.shield(task)
+    
+    async def build(self, path: str) -> Optional[PrerenderedPage]:
+        collection, render, params = match_prerender(path)
+        invalidations = self.invalidations
+        try:
+            template = await asyncio.to_thread(self.load_template)
+            if template is None:
+                return None
+            content = await render(*params)
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"Prerender of /{path} failed: {e}")
+            return None
+        if content is None:
+            self.stats["not_found"] += 1
+            return None
+        body = render_document(template, f"/{path}", content)
+        encodings = {"gzip": gzip.compress(body, compresslevel=6, mtime=0)}
+        if brotli is not None:
+            encodings["br"] = brotli.compress(body, quality=5)
+        page = PrerenderedPage(
+            path=path,
+            body=body,
+            etag=f'"p-{hashlib.sha256(body).hexdigest()[:32]}"',
+            encodings={encoding: data for encoding, data in encodings.items() if len(data) < len(body)},
+            created_at=time.time()
+        )
+        self.stats["builds"] += 1
+        # Запись во время сборки могла сделать снимок устаревшим: отдаем, но не кешируем
+        if invalidations == self.invalidations:
+            self.pages[path] = page
+            self.pages.move_to_end(path)
+            while len(self.pages) > self.maxsize:
+                self.pages.popitem(last=False)
+        return page
+    
+    def invalidate(self, collection: str, op: str, doc_id: Optional[str]):
+        self.invalidations += 1
+        affected = []
+        for path in list(self.pages):
+            matched = match_prerender(path)
+            if matched is None or matched[0] != collection:
+                continue
+            # Списки зависят от любого документа коллекции, карточка - только от своего
+            if doc_id is None or not matched[2] or matched[2] == (doc_id,):
+                del self.pages[path]
+                affected.append(path)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        if affected:
+            task = loop.create_task(self.regenerate(affected))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+    
+    async def regenerate(self, paths: List[str]):
+        for path in paths:
+            if path not in self.pages and path not in self.building:
+                if await self.get(path) is not None:
+                    self.stats["regenerated"] += 1
+    
+    def snapshot(self) -> dict:
+        return {"enabled": PRERENDER_ENABLED, "pages": len(self.pages), "maxsize": self.maxsize,
+                "bytes": sum(len(page.body) for page in self.pages.values()), **self.stats}
+
+page_snapshots = PageSnapshots(PRERENDER_CACHE_SIZE)
+on_change("news", "ministries", "amendments")(page_snapshots.invalidate)
+
+def serve_snapshot(page: PrerenderedPage, request: Request) -> Response:
+    headers = {"Cache-Control": PRERENDER_CACHE_CONTROL, "ETag": page.etag, "Vary": "Accept-Encoding"}
+    if etag_matches(request.headers.get("if-none-match"), page.etag):
+        return Response(status_code=304, headers=headers)
+    encoding = pick_encoding(request.headers.get("accept-encoding", ""), page.encodings)
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        return Response(page.encodings[encoding], media_type="text/html; charset=utf-8", headers=headers)
+    return Response(page.body, media_type="text/html; charset=utf-8", headers=headers)
+
+if FRONTEND_DIR.exists():
+    logger.info(f"Frontend directory found at: {FRONTEND_DIR}")
     
     @app.get("/")
-    async def serve_frontend():
-        index_path = FRONTEND_DIR / "index.html"
-        if index_path.exists():
-            return FileResponse(index_path)
+    async def serve_frontend(request: Request):
+        index = static_assets.get("index.html")
+        if index:
+            return await serve_asset(index, request)
         return {"error": "index.html not found"}
     
     @app.get("/{full_path:path}")
-    async def serve_spa(full_path: str):
+    async def serve_spa(full_path: str, request: Request):
         # Не трогаем API
         if full_path.startswith("api/"):
             raise HTTPException(status_code=404, detail="Not found")
         
-        # Пробуем найти файл (картинки, js, css)
-        file_path = FRONTEND_DIR / full_path
-        if file_path.exists() and file_path.is_file():
-            return FileResponse(file_path)
+        # Файлы сборки (картинки, js, css) ищем только в индексе, без обращений к диску
+        asset = static_assets.get(full_path)
+        if asset:
+            return await serve_asset(asset, request)
+        
+        # Отсутствующий хешированный файл не подменяем index.html, иначе он закешируется как JS
+        if full_path.startswith("static/"):
+            raise HTTPException(status_code=404, detail="Not found")
         
-        # Все остальное отдаем index.html (для SPA)
-        index_path = FRONTEND_DIR / "index.html"
-        if index_path.exists():
-            return FileResponse(index_path)
+        # Публичные страницы отдаем готовым снимком с контентом, остальное - index.html (для SPA)
+        if PRERENDER_ENABLED:
+            page = await page_snapshots.get(full_path)
+            if page is not None:
+                return serve_snapshot(page, request)
+        index = static_assets.get("index.html")
+        if index:
+            return await serve_asset(index, request)
         
         raise HTTPException(status_code=404, detail="Not found")
 else:
@@ -785,6 +3973,123 @@ else:
             "docs": "/docs"
         }
 
+COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+COMPRESSION_BROTLI_LEVEL = int(os.environ.get('COMPRESSION_BROTLI_LEVEL', 4))
+# Уже сжатые форматы (картинки, WebP-варианты) и text/event-stream сюда не входят
+COMPRESSION_TYPES = os.environ.get(
+    'COMPRESSION_TYPES',
+    'application/json,application/x-ndjson,text/html,text/plain,text/css,text/csv,application/javascript,image/svg+xml'
+).split(',')
+
+compression_stats = {"compressed": 0, "skipped": 0, "bytes_in": 0, "bytes_out": 0}
+
+def compression_snapshot() -> dict:
+    ratio = compression_stats["bytes_out"] / compression_stats["bytes_in"] if compression_stats["bytes_in"] else 0
+    return {**compression_stats, "ratio": round(ratio, 3)}
+
+class CompressionResponder:
+    def __init__(self, middleware, encoding: str, send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start = None
+        self.passthrough = False
+        self.compressor = None
+    
+    def compress(self, chunk: bytes, finish: bool) -> bytes:
+        if self.compressor is None:
+            if self.encoding == "br":
+                self.compressor = brotli.Compressor(quality=self.middleware.brotli_level)
+            else:
+                self.compressor = zlib.compressobj(self.middleware.gzip_level, zlib.DEFLATED, 31)
+        if self.encoding == "br":
+            out = self.compressor.process(chunk)
+            return out + (self.compressor.finish() if finish else self.compressor.flush())
+        out = self.compressor.compress(chunk)
+        return out + self.compressor.flush(zlib.Z_FINISH if finish else zlib.Z_SYNC_FLUSH)
+    
+    async def __call__(self, message):
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start is None:
+            compressed = self.compress(body, finish=not more_body)
+            compression_stats["bytes_in"] += len(body)
+            compression_stats["bytes_out"] += len(compressed)
+            await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+            return
+        
+        start, self.start = self.start, None
+        headers = MutableHeaders(raw=start["headers"])
+        compressible = self.middleware.compressible(start["status"], headers)
+        if compressible:
+            headers.add_vary_header("Accept-Encoding")
+        if not compressible or (not more_body and len(body) < self.middleware.minimum_size):
+            self.passthrough = True
+            compression_stats["skipped"] += 1
+            await self.send(start)
+            await self.send(message)
+            return
+        
+        headers["Content-Encoding"] = self.encoding
+        # Сжатое представление не побайтно равно исходному, поэтому ETag становится слабым
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+        compressed = self.compress(body, finish=not more_body)
+        compression_stats["compressed"] += 1
+        compression_stats["bytes_in"] += len(body)
+        compression_stats["bytes_out"] += len(compressed)
+        if more_body:
+            del headers["Content-Length"]
+        else:
+            headers["Content-Length"] = str(len(compressed))
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": compressed, "more_body": more_body})
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, types: List[str] = (), gzip_level: int = 6, brotli_level: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.types = {content_type.strip() for content_type in types}
+        self.gzip_level = gzip_level
+        self.brotli_level = brotli_level
+        self.encodings = ("br", "gzip") if brotli is not None else ("gzip",)
+    
+    def compressible(self, status: int, headers: Headers) -> bool:
+        if status < 200 or status >= 300 or status in (204, 206):
+            return False
+        if "content-encoding" in headers or "no-transform" in headers.get("cache-control", ""):
+            return False
+        content_type = headers.get("content-type", "").split(";")[0].strip()
+        # Сжатый поток событий буферизуется до конца блока и теряет смысл
+        return content_type in self.types and content_type != "text/event-stream"
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = pick_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await self.app(scope, receive, CompressionResponder(self, encoding, send))
+
+compression_settings = {
+    "minimum_size": COMPRESSION_MIN_SIZE,
+    "types": COMPRESSION_TYPES,
+    "gzip_level": COMPRESSION_GZIP_LEVEL,
+    "brotli_level": COMPRESSION_BROTLI_LEVEL
+}
+
 CORS_ORIGINS = os.environ.get('CORS_ORIGINS', '*').split(',')
 app.add_middleware(
     CORSMiddleware,
@@ -792,15 +4097,125 @@ app.add_middleware(
     allow_origins=CORS_ORIGINS,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, **compression_settings)
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    if client:
-        client.close()
-        logger.info("MongoDB connection closed")
+def event_loop_impl() -> str:
+    return "uvloop" if sys.platform != "win32" and importlib.util.find_spec("uvloop") else "asyncio"
 
-if __name__ == "__main__":
+def http_impl() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+def shared_state_warnings(workers: int) -> List[str]:
+    # Все, что живет в памяти процесса, у каждого воркера свое
+    if workers <= 1:
+        return []
+    notes = []
+    if not CHANGE_STREAMS_ENABLED:
+        if RESPONSE_CACHE_BACKEND == "memory":
+            notes.append(f"response cache is per worker: after a write through another worker, responses and their "
+                         f"ETag/304 answers stay stale for up to {RESPONSE_CACHE_TTL + RESPONSE_CACHE_STALE_TTL:g}s "
+                         f"(RESPONSE_CACHE_TTL + RESPONSE_CACHE_STALE_TTL)")
+        if PRINCIPAL_CACHE_TTL > 0:
+            notes.append(f"role and user changes reach other workers' principal caches within PRINCIPAL_CACHE_TTL={PRINCIPAL_CACHE_TTL:g}s")
+        if JWT_EMBED_PERMISSIONS:
+            notes.append(f"permissions embedded in tokens are revoked on other workers only after JWT_CLAIMS_TTL={JWT_CLAIMS_TTL}s")
+        notes.append(f"/api/home and prerendered pages pick up other workers' writes only after "
+                     f"HOME_SNAPSHOT_TTL={HOME_SNAPSHOT_TTL:g}s / PRERENDER_TTL={PRERENDER_TTL:g}s")
+        notes.append("the in-memory search index never sees other workers' writes")
+        notes.append("live updates reach only clients connected to the worker that handled the write")
+    if RATE_LIMIT_BACKEND == "memory":
+        notes.append(f"auth rate limits are counted per worker, so effective limits are {workers}x; set RATE_LIMIT_BACKEND=mongo")
+    if METRICS_ENABLED:
+        notes.append("/metrics and /api/admin/metrics describe only the worker that answered")
+    return notes
+
+def run_server(host: str, port: int, workers: int, limit_concurrency: int, backlog: int, keepalive: int,
+               graceful_timeout: int = SERVER_GRACEFUL_TIMEOUT):
     import uvicorn
-    port = int(os.environ.get("PORT", 8000))
-    uvicorn.run("backend.server:app", host="0.0.0.0", port=port, reload=False)
+    loop, http = event_loop_impl(), http_impl()
+    logger.info(f"Starting {workers} worker(s) on {host}:{port} (loop={loop}, http={http})")
+    if workers > 1 and not CHANGE_STREAMS_ENABLED:
+        logger.error(f"Running {workers} workers without CHANGE_STREAMS_ENABLED: each worker serves its own cached copy "
+                     f"and sees other workers' writes only when it expires. Set CHANGE_STREAMS_ENABLED=true "
+                     f"(needs a replica set) or run a single worker")
+    for note in shared_state_warnings(workers):
+        logger.warning(f"Multi-worker: {note}")
+    # Приложение ищем под тем именем, под которым модуль уже загружен: при `-m` это __main__
+    # (в порожденных воркерах - __mp_main__, он же __main__), при импорте из точки входа - "server"
+    # или "backend.server". Другое имя выполнило бы модуль второй раз и повторно зарегистрировало метрики
+    uvicorn.run(
+        f"{__name__}:app",
+        host=host,
+        port=port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        limit_concurrency=limit_concurrency or None,
+        backlog=backlog,
+        timeout_keep_alive=keepalive,
+        timeout_graceful_shutdown=graceful_timeout or None,
+        reload=False,
+    )
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Seattle Government API")
+    subparsers = parser.add_subparsers(dest="command")
+    serve = subparsers.add_parser("serve", help="Run the API server (default)")
+    serve.add_argument("--host", default=SERVER_HOST)
+    serve.add_argument("--port", type=int, default=SERVER_PORT)
+    serve.add_argument("--workers", type=int, default=SERVER_WORKERS, help="Worker processes (WEB_CONCURRENCY)")
+    serve.add_argument("--limit-concurrency", type=int, default=SERVER_LIMIT_CONCURRENCY,
+                       help="Connections per worker before answering 503, 0 for no limit")
+    serve.add_argument("--backlog", type=int, default=SERVER_BACKLOG)
+    serve.add_argument("--keepalive", type=int, default=SERVER_KEEPALIVE, help="Keep-alive timeout in seconds")
+    serve.add_argument("--graceful-timeout", type=int, default=SERVER_GRACEFUL_TIMEOUT,
+                       help="Seconds to let open connections (live update streams) finish on shutdown, 0 to wait forever")
+    subparsers.add_parser("migrate-media", help="Move inline data: URLs into the media store")
+    subparsers.add_parser("ensure-indexes", help="Create all declared indexes")
+    subparsers.add_parser("normalize-documents", help="Backfill schema defaults into stored documents")
+    subparsers.add_parser("explain-queries", help="Show query plans for every query the server issues")
+    subparsers.add_parser("watch-changes", help="Print normalized change stream events (needs a replica set)")
+    args = parser.parse_args()
+    
+    if args.command not in (None, "serve"):
+        connect_mongo()
+    if args.command == "migrate-media":
+        result = asyncio.run(migrate_inline_media())
+        logger.info(f"Media migration finished: {result}")
+    elif args.command == "ensure-indexes":
+        asyncio.run(ensure_indexes())
+    elif args.command == "normalize-documents":
+        report = asyncio.run(normalize_documents())
+        if any(stats["invalid"] for stats in report.values()):
+            raise SystemExit(1)
+    elif args.command == "explain-queries":
+        report = asyncio.run(explain_queries())
+        for entry in report:
+            marker = "COLLSCAN" if entry["collscan"] else "ok"
+            shape = entry["query"] if entry["kind"] == "aggregate" else f"{entry['query']} sort={entry['sort']}"
+            print(f"[{marker}] {entry['collection']} {entry['kind']} {shape}: {' <- '.join(entry['stages'])}")
+        if any(entry["collscan"] for entry in report):
+            raise SystemExit(1)
+    elif args.command == "watch-changes":
+        async def watch_changes():
+            for collection in change_bus.collections:
+                on_change(collection, source="stream")(lambda collection, op, doc_id: print(f"{collection} {op} {doc_id or '*'}"))
+            await change_bus.start()
+            try:
+                await change_bus.task
+            finally:
+                await change_bus.stop()
+        try:
+            asyncio.run(watch_changes())
+        except KeyboardInterrupt:
+            pass
+    elif args.command == "serve":
+        run_server(args.host, args.port, args.workers, args.limit_concurrency, args.backlog, args.keepalive, args.graceful_timeout)
+    else:
+        run_server(SERVER_HOST, SERVER_PORT, SERVER_WORKERS, SERVER_LIMIT_CONCURRENCY, SERVER_BACKLOG, SERVER_KEEPALIVE)
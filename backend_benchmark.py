@@ -0,0 +1,955 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import struct
+import subprocess
+import sys
+import time
+import gzip
+import uuid
+import zlib
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def summarize(samples):
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 2),
+        "p95_ms": round(percentile(samples, 95) * 1000, 2),
+        "p99_ms": round(percentile(samples, 99) * 1000, 2),
+        "max_ms": round(max(samples) * 1000, 2) if samples else 0.0,
+    }
+
+
+ROOT_DIR = Path(__file__).parent
+REPORTS_DIR = ROOT_DIR / "test_reports" / "benchmarks"
+
+# name -> (weight, method, needs a real MongoDB); the in-memory stand-in lacks $substrCP,
+# $meta sorting and projected find_one_and_update, so /home, search and PUT are skipped there
+MIXED_WORKLOAD = {
+    "news_list": (30, "GET", False),
+    "news_item": (15, "GET", False),
+    "ministries_list": (8, "GET", False),
+    "ministry_item": (5, "GET", False),
+    "amendments_list": (6, "GET", False),
+    "leadership_list": (5, "GET", False),
+    "home": (8, "GET", True),
+    "search": (5, "GET", True),
+    "news_create": (4, "POST", False),
+    "news_update": (4, "PUT", True),
+    "news_delete": (2, "DELETE", False),
+    "login": (3, "POST", False),
+}
+
+SEARCH_TERMS = ["бюджет", "транспорт", "поправка", "совет", "министерство", "школы"]
+
+
+def png_bytes(width, height, rgb):
+    """Solid-colour PNG without external imaging libraries"""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(rgb) * width
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(row * height))
+        + chunk(b"IEND", b"")
+    )
+
+
+def rss_mb(pid):
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        return None
+    return None
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class BootedServer:
+    """Starts the API in a subprocess against a throwaway local MongoDB database or the in-memory stand-in"""
+
+    def __init__(self, mode, mongo_url="mongodb://localhost:27017", workers=1, env=None):
+        self.mode = mode
+        self.mongo_url = mongo_url
+        self.workers = workers
+        self.port = free_port()
+        self.db_name = f"bench_{uuid.uuid4().hex[:8]}"
+        self.extra_env = env or {}
+        self.process = None
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}/api"
+
+    def __enter__(self):
+        env = {
+            **os.environ,
+            "MONGO_URL": self.mongo_url,
+            "DB_NAME": self.db_name,
+            # The suite logs in far more often than the auth limiter allows for one user/IP
+            "RATE_LIMIT_IP_BURST": "1000000",
+            "RATE_LIMIT_IP_RATE": "1000000",
+            "RATE_LIMIT_USER_BURST": "1000000",
+            "RATE_LIMIT_USER_RATE": "1000000",
+            **self.extra_env,
+        }
+        if self.mode == "memory":
+            command = [sys.executable, str(Path(__file__).resolve()), "serve-memory", "--port", str(self.port)]
+        else:
+            command = [sys.executable, "-m", "backend.server", "serve",
+                       "--host", "127.0.0.1", "--port", str(self.port), "--workers", str(self.workers)]
+        self.process = subprocess.Popen(command, cwd=ROOT_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"Server exited with code {self.process.returncode}")
+            try:
+                if httpx.get(f"{self.base_url}/health/live", timeout=1).status_code == 200:
+                    return self
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError("Server did not become live within 60s")
+
+    def rss_mb(self):
+        # The launcher process plus its worker children
+        pids = [self.process.pid]
+        children = Path(f"/proc/{self.process.pid}/task/{self.process.pid}/children")
+        if children.exists():
+            pids += [int(pid) for pid in children.read_text().split()]
+        values = [rss_mb(pid) for pid in pids]
+        return round(sum(value for value in values if value), 1) if any(values) else None
+
+    def __exit__(self, *exc):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.mode == "mongo":
+            try:
+                from pymongo import MongoClient
+                MongoClient(self.mongo_url, serverSelectionTimeoutMS=2000).drop_database(self.db_name)
+            except Exception as e:
+                print(f"⚠️  Could not drop {self.db_name}: {e}")
+
+
+def serve_memory(port):
+    from mongomock_motor import AsyncMongoMockClient
+    import uvicorn
+    from backend import server
+
+    # connect_mongo() keeps an already assigned client, so the lifespan uses the stand-in
+    server.client = AsyncMongoMockClient()
+    server.db = server.client[server.DB_NAME]
+    uvicorn.run(server.app, host="127.0.0.1", port=port, log_level="warning")
+
+
+class APIBenchmark:
+    def __init__(self, base_url="http://localhost:8000/api", label="default"):
+        self.base_url = base_url.rstrip("/")
+        self.label = label
+        self.results = {}
+
+    async def read_news(self, client, requests_count, samples):
+        for _ in range(requests_count):
+            started = time.perf_counter()
+            response = await client.get(f"{self.base_url}/news")
+            response.raise_for_status()
+            samples.append(time.perf_counter() - started)
+
+    async def login_loop(self, client, username, password, stop, counters):
+        while not stop.is_set():
+            response = await client.post(
+                f"{self.base_url}/auth/login",
+                json={"username": username, "password": password}
+            )
+            counters[response.status_code] = counters.get(response.status_code, 0) + 1
+
+    async def bench_login_burst(self, username, password, logins=50, readers=4, reads=50):
+        """GET /api/news latency alone and while `logins` concurrent logins are in flight"""
+        limits = httpx.Limits(max_connections=logins + readers + 10)
+        async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+            baseline = []
+            await asyncio.gather(*(self.read_news(client, reads, baseline) for _ in range(readers)))
+
+            stop = asyncio.Event()
+            counters = {}
+            login_tasks = [
+                asyncio.create_task(self.login_loop(client, username, password, stop, counters))
+                for _ in range(logins)
+            ]
+            await asyncio.sleep(0.5)
+            under_load = []
+            started = time.perf_counter()
+            await asyncio.gather(*(self.read_news(client, reads, under_load) for _ in range(readers)))
+            elapsed = time.perf_counter() - started
+            stop.set()
+            await asyncio.gather(*login_tasks)
+
+        self.results["login_burst"] = {
+            "concurrent_logins": logins,
+            "news_baseline": summarize(baseline),
+            "news_under_login_burst": summarize(under_load),
+            "login_status_counts": {str(code): count for code, count in sorted(counters.items())},
+            "logins_per_second": round(sum(counters.values()) / elapsed, 2),
+        }
+        return self.results["login_burst"]
+
+    async def login(self, client, username, password):
+        response = await client.post(
+            f"{self.base_url}/auth/login",
+            json={"username": username, "password": password}
+        )
+        response.raise_for_status()
+        return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    async def edit_loop(self, client, headers, news_id, edits, use_if_match, samples, counters):
+        for i in range(edits):
+            while True:
+                request_headers = dict(headers)
+                if use_if_match:
+                    current = await client.get(f"{self.base_url}/news/{news_id}")
+                    request_headers["If-Match"] = f'"{current.json().get("version", 0)}"'
+                started = time.perf_counter()
+                response = await client.put(
+                    f"{self.base_url}/news/{news_id}",
+                    json={"title": f"Benchmark edit {i}", "content": "Concurrent editor benchmark"},
+                    headers=request_headers
+                )
+                samples.append(time.perf_counter() - started)
+                counters[response.status_code] = counters.get(response.status_code, 0) + 1
+                if response.status_code != 412:
+                    break
+
+    async def bench_concurrent_edits(self, username, password, editors=10, edits=20, use_if_match=False):
+        """PUT /api/news/{id} latency with `editors` admins editing the same item"""
+        async with httpx.AsyncClient(timeout=60) as client:
+            headers = await self.login(client, username, password)
+            created = await client.post(
+                f"{self.base_url}/news",
+                json={"title": "Benchmark", "content": "Concurrent editor benchmark"},
+                headers=headers
+            )
+            created.raise_for_status()
+            news_id = created.json()["id"]
+
+            samples = []
+            counters = {}
+            started = time.perf_counter()
+            await asyncio.gather(*(
+                self.edit_loop(client, headers, news_id, edits, use_if_match, samples, counters)
+                for _ in range(editors)
+            ))
+            elapsed = time.perf_counter() - started
+            await client.delete(f"{self.base_url}/news/{news_id}", headers=headers)
+
+        self.results["concurrent_edits"] = {
+            "editors": editors,
+            "if_match": use_if_match,
+            "write_latency": summarize(samples),
+            "status_counts": {str(code): count for code, count in sorted(counters.items())},
+            "writes_per_second": round(len(samples) / elapsed, 2),
+        }
+        return self.results["concurrent_edits"]
+
+    async def wire_bytes(self, client, path, encoding, samples):
+        started = time.perf_counter()
+        async with client.stream("GET", f"{self.base_url}{path}", headers={"Accept-Encoding": encoding}) as response:
+            response.raise_for_status()
+            size = 0
+            async for chunk in response.aiter_raw():
+                size += len(chunk)
+        samples.append(time.perf_counter() - started)
+        return size, response.headers.get("content-encoding", "identity")
+
+    def compression_cost(self, payload, rounds):
+        codecs = {"gzip-1": lambda data: gzip.compress(data, 1), "gzip-6": lambda data: gzip.compress(data, 6),
+                  "gzip-9": lambda data: gzip.compress(data, 9)}
+        if brotli is not None:
+            codecs.update({f"br-{quality}": (lambda data, q=quality: brotli.compress(data, quality=q)) for quality in (1, 4, 11)})
+        cost = {}
+        for name, codec in codecs.items():
+            started = time.process_time()
+            for _ in range(rounds):
+                compressed = codec(payload)
+            cost[name] = {
+                "bytes": len(compressed),
+                "ratio": round(len(compressed) / len(payload), 3),
+                "cpu_ms_per_request": round((time.process_time() - started) / rounds * 1000, 3),
+            }
+        return cost
+
+    async def bench_compression(self, paths, requests_count=20, rounds=50):
+        """Bytes on the wire per encoding and the CPU cost of compressing each payload"""
+        encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+        report = {}
+        async with httpx.AsyncClient(timeout=60) as client:
+            for path in paths:
+                identity = await client.get(f"{self.base_url}{path}", headers={"Accept-Encoding": "identity"})
+                identity.raise_for_status()
+                entry = {"payload_bytes": len(identity.content), "wire": {}}
+                for encoding in encodings:
+                    samples = []
+                    for _ in range(requests_count):
+                        size, served = await self.wire_bytes(client, path, encoding, samples)
+                    entry["wire"][encoding] = {"bytes": size, "served_as": served, "latency": summarize(samples)}
+                entry["cpu"] = self.compression_cost(identity.content, rounds)
+                report[path] = entry
+        self.results["compression"] = report
+        return report
+
+    def serialization_stage(self, items, rounds):
+        from backend.server import NEWS_LIST, dump_json
+
+        docs = [
+            {
+                "id": f"00000000-0000-0000-0000-{i:012d}",
+                "title": f"Заседание городского совета №{i}",
+                "content": "Городской совет рассмотрел поправки к бюджету и вопросы транспорта. " * 12,
+                "image": f"/api/media/{i:064x}",
+                "is_archive": False,
+                "created_at": f"2024-05-{i % 28 + 1:02d}T12:00:00+00:00",
+                "version": 1,
+            }
+            for i in range(items)
+        ]
+        paths = {
+            "validated": lambda: NEWS_LIST.dump_json(NEWS_LIST.validate_python(docs)),
+            "fast": lambda: dump_json(docs),
+        }
+        report = {}
+        for name, build in paths.items():
+            started = time.perf_counter()
+            for _ in range(rounds):
+                body = build()
+            elapsed = time.perf_counter() - started
+            report[name] = {
+                "bytes": len(body),
+                "us_per_list": round(elapsed / rounds * 1_000_000, 1),
+                "lists_per_second": round(rounds / elapsed, 1),
+            }
+        report["speedup"] = round(report["validated"]["us_per_list"] / report["fast"]["us_per_list"], 2)
+        return report
+
+    async def news_throughput(self, requests_count, concurrency, limit):
+        samples = []
+        counter = iter(range(requests_count))
+
+        async def worker(client):
+            # A unique query parameter bypasses the response cache so every request re-serializes the list
+            for n in counter:
+                started = time.perf_counter()
+                response = await client.get(f"{self.base_url}/news", params={"limit": limit, "bench": n})
+                response.raise_for_status()
+                samples.append(time.perf_counter() - started)
+
+        async with httpx.AsyncClient(timeout=60) as client:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+        return {"requests_per_second": round(len(samples) / elapsed, 2), "latency": summarize(samples)}
+
+    async def bench_serialization(self, items=100, rounds=2000, http_requests=0, concurrency=8):
+        """Validated (TypeAdapter) vs direct orjson serialization of a news list"""
+        report = {"items": items, "in_process": self.serialization_stage(items, rounds)}
+        if http_requests:
+            report["http"] = await self.news_throughput(http_requests, concurrency, items)
+        self.results["serialization"] = report
+        return report
+
+    async def org_chart_n_plus_one(self, db):
+        """What a client resolving role references itself does: one query per person"""
+        ministries = await db.ministries.find({}, {"_id": 0}).sort([("created_at", 1), ("id", 1)]).to_list(None)
+        queries = 1
+        for ministry in ministries:
+            minister = ministry.get("minister")
+            if not minister:
+                continue
+            for person in [minister, *minister.get("deputies", [])]:
+                if person.get("role_id"):
+                    person["role"] = await db.roles.find_one({"id": person["role_id"]}, {"_id": 0, "id": 1, "name": 1})
+                    queries += 1
+        leadership = await db.leadership.find({}, {"_id": 0}).sort([("order", 1), ("id", 1)]).to_list(None)
+        return {"leadership": leadership, "ministries": ministries}, queries + 1
+
+    async def bench_org_chart(self, mongo_url, ministries=40, deputies=4, roles=30, leaders=20, rounds=200):
+        """Single $lookup aggregation of the org chart vs resolving role references one query at a time"""
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from backend.server import org_chart_pipeline
+
+        client = AsyncIOMotorClient(mongo_url, serverSelectionTimeoutMS=3000)
+        db = client[f"bench_org_{uuid.uuid4().hex[:8]}"]
+        try:
+            role_ids = [str(uuid.uuid4()) for _ in range(roles)]
+            await db.roles.insert_many([
+                {"id": role_id, "name": f"Роль {i}", "access_code": uuid.uuid4().hex[:8], "permissions": {}}
+                for i, role_id in enumerate(role_ids)
+            ])
+            await db.ministries.insert_many([
+                {"id": str(uuid.uuid4()), "name": f"Министерство {i}", "description": "Описание", "created_at": f"2024-01-{i % 28 + 1:02d}",
+                 "minister": {"id": str(uuid.uuid4()), "name": f"Министр {i}", "role_id": random.choice(role_ids), "appointed_date": "2024-01-01",
+                              "deputies": [{"id": str(uuid.uuid4()), "name": f"Заместитель {i}.{d}", "position": "Заместитель",
+                                            "role_id": random.choice(role_ids), "appointed_date": "2024-01-01"} for d in range(deputies)]}}
+                for i in range(ministries)
+            ])
+            await db.leadership.insert_many([
+                {"id": str(uuid.uuid4()), "name": f"Имя {i}", "surname": f"Фамилия {i}", "position": "Советник",
+                 "appointed_date": "2024-01-01", "order": i, "created_at": "2024-01-01"}
+                for i in range(leaders)
+            ])
+            await db.roles.create_index("id", unique=True)
+            await db.ministries.create_index([("created_at", 1), ("id", 1)])
+
+            async def aggregation():
+                await db.ministries.aggregate(org_chart_pipeline()).to_list(1)
+                return 1
+
+            async def n_plus_one():
+                return (await self.org_chart_n_plus_one(db))[1]
+
+            report = {"ministries": ministries, "deputies_per_ministry": deputies, "roles": roles, "leaders": leaders}
+            for name, build in (("aggregation", aggregation), ("n_plus_one", n_plus_one)):
+                for _ in range(min(20, rounds)):
+                    await build()
+                samples = []
+                for _ in range(rounds):
+                    started = time.perf_counter()
+                    queries = await build()
+                    samples.append(time.perf_counter() - started)
+                report[name] = {**summarize(samples), "queries_per_build": queries}
+            report["speedup_p50"] = round(report["n_plus_one"]["p50_ms"] / report["aggregation"]["p50_ms"], 2) if report["aggregation"]["p50_ms"] else None
+        finally:
+            await client.drop_database(db.name)
+            client.close()
+        self.results["org_chart"] = report
+        return report
+
+    async def asgi_throughput(self, app, requests_count):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for _ in range(min(200, requests_count)):
+                await client.get("/api/items/1")
+            started = time.perf_counter()
+            for _ in range(requests_count):
+                response = await client.get("/api/items/1")
+                response.raise_for_status()
+            elapsed = time.perf_counter() - started
+        return {"us_per_request": round(elapsed / requests_count * 1_000_000, 1), "requests_per_second": round(requests_count / elapsed, 1)}
+
+    async def bench_metrics_overhead(self, requests_count=5000, rounds=3):
+        """Per-request cost of MetricsMiddleware on a trivial in-process route"""
+        from fastapi import FastAPI
+        from backend.server import METRICS_ENABLED, MetricsMiddleware
+
+        if not METRICS_ENABLED:
+            raise SystemExit("prometheus_client is not installed or METRICS_ENABLED=false")
+
+        def make_app(with_metrics):
+            app = FastAPI()
+
+            @app.get("/api/items/{item_id}")
+            async def item(item_id: str):
+                return {"id": item_id}
+
+            if with_metrics:
+                app.add_middleware(MetricsMiddleware)
+            return app
+
+        apps = {"baseline": make_app(False), "instrumented": make_app(True)}
+        runs = {name: [] for name in apps}
+        # Interleaved rounds, best of each, so drift in the machine's load doesn't favour one side
+        for _ in range(rounds):
+            for name, app in apps.items():
+                runs[name].append(await self.asgi_throughput(app, requests_count))
+        baseline, instrumented = (min(runs[name], key=lambda run: run["us_per_request"]) for name in apps)
+        self.results["metrics_overhead"] = {
+            "requests": requests_count,
+            "baseline": baseline,
+            "instrumented": instrumented,
+            "overhead_us_per_request": round(instrumented["us_per_request"] - baseline["us_per_request"], 1),
+        }
+        return self.results["metrics_overhead"]
+
+    async def seed(self, client, headers, news=2000, ministries=40, amendments=300, leaders=30, users=10, images=20):
+        """Realistic content volumes through the public upload and NDJSON import endpoints"""
+        started = time.perf_counter()
+        rng = random.Random(42)
+        image_urls = []
+        for i in range(images):
+            response = await client.post(
+                f"{self.base_url}/upload",
+                files={"file": (f"seed-{i}.png", png_bytes(640, 400, (rng.randrange(256), rng.randrange(256), 90)), "image/png")},
+                headers=headers,
+            )
+            response.raise_for_status()
+            image_urls.append(response.json()["url"])
+
+        paragraph = (
+            "Городской совет Сиэтла обсудил бюджет, транспорт и школы. Министерство представило поправка "
+            "к постановлению о благоустройстве, и депутаты задали вопросы о сроках и финансировании. "
+        )
+        base_date = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+        def stamp(i):
+            return (base_date + timedelta(minutes=i)).isoformat()
+
+        collections = {
+            "news": [
+                {"title": f"Новость {i}: {rng.choice(SEARCH_TERMS)}", "content": paragraph * rng.randint(3, 12),
+                 "image": rng.choice(image_urls) if image_urls else None, "is_archive": i % 10 == 0, "created_at": stamp(i)}
+                for i in range(news)
+            ],
+            "ministries": [
+                {"name": f"Министерство {i}", "description": paragraph * 2, "logo": rng.choice(image_urls) if image_urls else None,
+                 "created_at": stamp(i), "minister": {
+                     "name": f"Министр {i}", "photo": rng.choice(image_urls) if image_urls else None, "appointed_date": "2024-01-15",
+                     "deputies": [{"name": f"Заместитель {i}.{d}", "position": "Заместитель министра", "appointed_date": "2024-02-01",
+                                   "photo": rng.choice(image_urls) if image_urls else None} for d in range(rng.randint(2, 5))]}}
+                for i in range(ministries)
+            ],
+            "amendments": [
+                {"number": str(i + 1), "title": f"Поправка {i + 1} о {rng.choice(SEARCH_TERMS)}", "content": paragraph * 4, "created_at": stamp(i)}
+                for i in range(amendments)
+            ],
+            "leadership": [
+                {"name": f"Имя {i}", "surname": f"Фамилия {i}", "position": "Советник", "appointed_date": "2023-06-01",
+                 "photo": rng.choice(image_urls) if image_urls else None, "order": i}
+                for i in range(leaders)
+            ],
+        }
+        counts = {}
+        for collection, rows in collections.items():
+            body = "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode()
+            response = await client.post(f"{self.base_url}/admin/import/{collection}", content=body,
+                                         headers={**headers, "Content-Type": "application/x-ndjson"})
+            response.raise_for_status()
+            counts[collection] = response.json()["inserted"]
+
+        role = await client.post(f"{self.base_url}/roles", json={"name": "Редактор", "permissions": {"can_manage_news": True}},
+                                 headers=headers)
+        role.raise_for_status()
+        access_code = role.json()["access_code"]
+        credentials = []
+        for i in range(users):
+            username = f"editor{i}"
+            response = await client.post(f"{self.base_url}/auth/register", json={"username": username, "access_code": access_code})
+            response.raise_for_status()
+            credentials.append((username, access_code))
+        counts["users"] = users
+        counts["images"] = len(image_urls)
+        return {"counts": counts, "seconds": round(time.perf_counter() - started, 2)}, credentials
+
+    async def mixed_client(self, client, ops, weights, state, deadline, samples, statuses, rng):
+        while time.perf_counter() < deadline:
+            name = rng.choices(ops, weights)[0]
+            url, kwargs, method = self.mixed_request(name, state, rng)
+            if url is None:
+                continue
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, url, **kwargs)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "error"
+                response = None
+            samples.setdefault(name, []).append(time.perf_counter() - started)
+            key = f"{name}:{status}"
+            statuses[key] = statuses.get(key, 0) + 1
+            if name == "news_create" and response is not None and response.status_code == 200:
+                state["own_news"].append(response.json()["id"])
+
+    def mixed_request(self, name, state, rng):
+        base = self.base_url
+        headers = state["headers"]
+        if name == "news_list":
+            return f"{base}/news", {}, "GET"
+        if name == "news_item":
+            return f"{base}/news/{rng.choice(state['news_ids'])}", {}, "GET"
+        if name == "ministries_list":
+            return f"{base}/ministries", {}, "GET"
+        if name == "ministry_item":
+            return f"{base}/ministries/{rng.choice(state['ministry_ids'])}", {}, "GET"
+        if name == "amendments_list":
+            return f"{base}/amendments", {}, "GET"
+        if name == "leadership_list":
+            return f"{base}/leadership", {}, "GET"
+        if name == "home":
+            return f"{base}/home", {}, "GET"
+        if name == "search":
+            return f"{base}/search", {"params": {"q": rng.choice(SEARCH_TERMS)}}, "GET"
+        if name == "news_create":
+            return f"{base}/news", {"json": {"title": "Нагрузочный тест", "content": "Текст новости " * 50}, "headers": headers}, "POST"
+        if name == "news_update":
+            if not state["own_news"]:
+                return None, None, None
+            news_id = rng.choice(state["own_news"])
+            return f"{base}/news/{news_id}", {"json": {"title": "Обновлено", "content": "Текст " * 60}, "headers": headers}, "PUT"
+        if name == "news_delete":
+            if not state["own_news"]:
+                return None, None, None
+            return f"{base}/news/{state['own_news'].pop()}", {"headers": headers}, "DELETE"
+        if name == "login":
+            username, password = rng.choice(state["credentials"])
+            return f"{base}/auth/login", {"json": {"username": username, "password": password}}, "POST"
+        raise ValueError(name)
+
+    async def bench_mixed(self, username, password, concurrency=32, duration=30, seed_volumes=None,
+                          full_mongo=True, server=None):
+        """Seed, then run the weighted read/write/login mix with `concurrency` clients for `duration` seconds"""
+        limits = httpx.Limits(max_connections=concurrency + 8)
+        async with httpx.AsyncClient(timeout=60, limits=limits) as client:
+            register = await client.post(f"{self.base_url}/auth/register-governor",
+                                         json={"username": username, "password": password,
+                                               "governor_secret": os.environ.get("GOVERNOR_SECRET", "GOV-SEATTLE-2024")})
+            if register.status_code == 200:
+                headers = {"Authorization": f"Bearer {register.json()['access_token']}"}
+            else:
+                headers = await self.login(client, username, password)
+
+            seeded, credentials = (None, [])
+            if seed_volumes is not None:
+                seeded, credentials = await self.seed(client, headers, **seed_volumes)
+            credentials.append((username, password))
+
+            news_ids = [doc["id"] for doc in (await client.get(f"{self.base_url}/news", params={"limit": 1000})).json()]
+            ministry_ids = [doc["id"] for doc in (await client.get(f"{self.base_url}/ministries")).json()]
+            if not news_ids or not ministry_ids:
+                raise SystemExit("The database has no news or ministries; run with seeding enabled")
+
+            ops = [name for name, (_, _, needs_mongo) in MIXED_WORKLOAD.items() if full_mongo or not needs_mongo]
+            weights = [MIXED_WORKLOAD[name][0] for name in ops]
+            state = {"headers": headers, "news_ids": news_ids, "ministry_ids": ministry_ids,
+                     "credentials": credentials, "own_news": []}
+            samples, statuses = {}, {}
+            rss_before = server.rss_mb() if server else None
+            started = time.perf_counter()
+            deadline = started + duration
+            await asyncio.gather(*(
+                self.mixed_client(client, ops, weights, state, deadline, samples, statuses, random.Random(i))
+                for i in range(concurrency)
+            ))
+            elapsed = time.perf_counter() - started
+            rss_after = server.rss_mb() if server else None
+
+        total = sum(len(values) for values in samples.values())
+        errors = sum(count for key, count in statuses.items() if not key.endswith((":200", ":304")))
+        self.results["mixed"] = {
+            "concurrency": concurrency,
+            "duration_seconds": round(elapsed, 2),
+            "seed": seeded,
+            "requests": total,
+            "requests_per_second": round(total / elapsed, 2),
+            "error_responses": errors,
+            "overall": summarize([value for values in samples.values() for value in values]),
+            "operations": {name: {**summarize(values), "per_second": round(len(values) / elapsed, 2)}
+                           for name, values in sorted(samples.items())},
+            "status_counts": dict(sorted(statuses.items())),
+            "skipped_operations": sorted(set(MIXED_WORKLOAD) - set(ops)),
+            "server_rss_mb": {"before": rss_before, "after": rss_after},
+        }
+        return self.results["mixed"]
+
+    def print_summary(self):
+        print(f"\n📊 Benchmark results ({self.label})")
+        print("=" * 60)
+        print(json.dumps(self.results, indent=2, ensure_ascii=False))
+
+    def save(self, path=None):
+        revision = git_revision()
+        if path is None:
+            REPORTS_DIR.mkdir(parents=True, exist_ok=True)
+            stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+            path = REPORTS_DIR / f"{stamp}-{revision or 'unknown'}-{self.label}.json"
+        with open(path, "w") as f:
+            json.dump({
+                "label": self.label,
+                "base_url": self.base_url,
+                "revision": revision,
+                "timestamp": datetime.now().isoformat(),
+                "results": self.results,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"\n💾 Results saved to {path}")
+        return path
+
+
+def compare_reports(baseline_path, candidate_path):
+    """Print p50/p95/p99 and throughput deltas of two saved 'suite' reports"""
+    reports = []
+    for path in (baseline_path, candidate_path):
+        with open(path) as f:
+            reports.append(json.load(f))
+    baseline, candidate = (report["results"].get("mixed") for report in reports)
+    if not baseline or not candidate:
+        raise SystemExit("Both files must contain 'suite' (mixed workload) results")
+
+    def delta(old, new):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"{reports[0].get('revision')} ({reports[0]['label']}) -> {reports[1].get('revision')} ({reports[1]['label']})")
+    print(f"{'operation':<18}{'p50 ms':>18}{'p95 ms':>18}{'p99 ms':>18}{'req/s':>18}")
+    rows = [("overall", baseline["overall"], candidate["overall"], baseline["requests_per_second"], candidate["requests_per_second"])]
+    for name in sorted(set(baseline["operations"]) & set(candidate["operations"])):
+        old, new = baseline["operations"][name], candidate["operations"][name]
+        rows.append((name, old, new, old["per_second"], new["per_second"]))
+    for name, old, new, old_rate, new_rate in rows:
+        cells = [f"{new[key]:.1f} ({delta(old[key], new[key])})" for key in ("p50_ms", "p95_ms", "p99_ms")]
+        print(f"{name:<18}" + "".join(f"{cell:>18}" for cell in cells) + f"{f'{new_rate:.0f} ({delta(old_rate, new_rate)})':>18}")
+
+
+def run_suite(args):
+    seed_volumes = None if args.no_seed else {
+        "news": args.news, "ministries": args.ministries, "amendments": args.amendments,
+        "leaders": args.leaders, "users": args.users, "images": args.images,
+    }
+
+    def execute(benchmark, server=None):
+        if args.boot == "memory":
+            skipped = sorted(name for name, (_, _, needs_mongo) in MIXED_WORKLOAD.items() if needs_mongo)
+            print(f"ℹ️  The in-memory stand-in cannot run {', '.join(skipped)}; use --boot mongo for the full mix")
+        print(f"🚀 Running mixed workload against {benchmark.base_url} "
+              f"({args.concurrency} clients, {args.duration:.0f}s, boot={args.boot})")
+        asyncio.run(benchmark.bench_mixed(
+            args.username, args.password, args.concurrency, args.duration, seed_volumes,
+            full_mongo=args.boot != "memory", server=server
+        ))
+        benchmark.results["mixed"]["boot"] = args.boot
+        benchmark.results["mixed"]["workers"] = args.workers if args.boot == "mongo" else None
+        benchmark.print_summary()
+        benchmark.save(args.output)
+
+    if args.boot == "none":
+        execute(APIBenchmark(args.base_url, args.label))
+    else:
+        with BootedServer(args.boot, args.mongo_url, args.workers) as server:
+            execute(APIBenchmark(server.base_url, args.label), server)
+    return 0
+
+
+def run_scaling(args):
+    """The mixed workload against 1..N launcher workers, each run on a freshly seeded database"""
+    seed_volumes = {
+        "news": args.news, "ministries": args.ministries, "amendments": args.amendments,
+        "leaders": args.leaders, "users": args.users, "images": args.images,
+    }
+    benchmark = APIBenchmark(args.base_url, args.label)
+    runs = {}
+    for workers in args.workers:
+        with BootedServer("mongo", args.mongo_url, workers) as server:
+            benchmark.base_url = server.base_url
+            print(f"🚀 {workers} worker(s): {args.concurrency} clients for {args.duration:.0f}s")
+            runs[str(workers)] = asyncio.run(benchmark.bench_mixed(
+                args.username, args.password, args.concurrency, args.duration, seed_volumes, server=server
+            ))
+    del benchmark.results["mixed"]
+
+    baseline = runs[str(args.workers[0])]["requests_per_second"]
+    benchmark.results["scaling"] = {
+        "workers": args.workers,
+        "runs": runs,
+        "speedup": {workers: round(run["requests_per_second"] / baseline, 2) if baseline else None
+                    for workers, run in runs.items()},
+    }
+    print(f"\n{'workers':>8}{'req/s':>10}{'speedup':>10}{'p50 ms':>10}{'p99 ms':>10}{'rss MB':>10}")
+    for workers, run in runs.items():
+        print(f"{workers:>8}{run['requests_per_second']:>10.0f}{benchmark.results['scaling']['speedup'][workers]:>10}"
+              f"{run['overall']['p50_ms']:>10.1f}{run['overall']['p99_ms']:>10.1f}{str(run['server_rss_mb']['after']):>10}")
+    benchmark.save(args.output)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seattle Government API benchmarks")
+    parser.add_argument("--base-url", default="http://localhost:8000/api")
+    parser.add_argument("--label", default="default", help="e.g. 'before' / 'after'")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    subparsers = parser.add_subparsers(dest="scenario", required=True)
+
+    login_burst = subparsers.add_parser(
+        "login-burst",
+        help="GET /api/news p99 while concurrent logins are in flight. "
+             "Compare a server started with PASSWORD_HASH_WORKERS=0 (bcrypt on the event loop) "
+             "against the default worker pool. Raise RATE_LIMIT_IP_BURST and RATE_LIMIT_USER_BURST on the "
+             "server, otherwise most logins are rejected with 429 before reaching bcrypt."
+    )
+    login_burst.add_argument("--username", required=True)
+    login_burst.add_argument("--password", required=True)
+    login_burst.add_argument("--logins", type=int, default=50)
+    login_burst.add_argument("--readers", type=int, default=4)
+    login_burst.add_argument("--reads", type=int, default=50)
+
+    concurrent_edits = subparsers.add_parser(
+        "concurrent-edits",
+        help="PUT latency with several admins editing the same news item. "
+             "Run against builds before and after the single round-trip update path to compare."
+    )
+    concurrent_edits.add_argument("--username", required=True)
+    concurrent_edits.add_argument("--password", required=True)
+    concurrent_edits.add_argument("--editors", type=int, default=10)
+    concurrent_edits.add_argument("--edits", type=int, default=20)
+    concurrent_edits.add_argument("--if-match", action="store_true", help="Send If-Match and retry on 412")
+
+    compression = subparsers.add_parser(
+        "compression",
+        help="Bytes on the wire for identity/gzip/br responses and local CPU cost per compression level. "
+             "Compare a server started with COMPRESSION_ENABLED=false against the default."
+    )
+    compression.add_argument("--paths", nargs="+", default=["/news", "/amendments", "/ministries"])
+    compression.add_argument("--requests", type=int, default=20)
+    compression.add_argument("--rounds", type=int, default=50, help="Compression rounds per codec for the CPU measurement")
+
+    serialization = subparsers.add_parser(
+        "serialization",
+        help="Compare Pydantic-validated and direct orjson serialization of a news list in-process. "
+             "With --http-requests also measures GET /api/news throughput; run it against servers "
+             "started with READ_VALIDATION=true and false to compare both paths end to end."
+    )
+    serialization.add_argument("--items", type=int, default=100)
+    serialization.add_argument("--rounds", type=int, default=2000)
+    serialization.add_argument("--http-requests", type=int, default=0)
+    serialization.add_argument("--concurrency", type=int, default=8)
+
+    metrics_overhead = subparsers.add_parser(
+        "metrics-overhead",
+        help="In-process cost of the Prometheus middleware per request (no server needed)"
+    )
+    metrics_overhead.add_argument("--requests", type=int, default=5000)
+    metrics_overhead.add_argument("--rounds", type=int, default=3)
+
+    suite = subparsers.add_parser(
+        "suite",
+        help="Seed realistic volumes and run the mixed read/write/login workload. Results are saved to "
+             "test_reports/benchmarks/<time>-<git revision>-<label>.json unless --output is given."
+    )
+    suite.add_argument("--boot", choices=["none", "mongo", "memory"], default="none",
+                       help="'mongo' starts the API against a throwaway database on --mongo-url, 'memory' against "
+                            "an in-memory stand-in (mongomock-motor), 'none' uses --base-url as is")
+    suite.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    suite.add_argument("--workers", type=int, default=1, help="Server workers when booting against MongoDB")
+    suite.add_argument("--username", default="bench-governor")
+    suite.add_argument("--password", default="bench-password")
+    suite.add_argument("--concurrency", type=int, default=32)
+    suite.add_argument("--duration", type=float, default=30)
+    suite.add_argument("--no-seed", action="store_true", help="Use the data already in the database")
+    suite.add_argument("--news", type=int, default=2000)
+    suite.add_argument("--ministries", type=int, default=40)
+    suite.add_argument("--amendments", type=int, default=300)
+    suite.add_argument("--leaders", type=int, default=30)
+    suite.add_argument("--users", type=int, default=10)
+    suite.add_argument("--images", type=int, default=20)
+
+    scaling = subparsers.add_parser(
+        "scaling",
+        help="Run the mixed workload against 1..N launcher workers on a local MongoDB and report the speedup"
+    )
+    scaling.add_argument("--workers", type=lambda value: [int(item) for item in value.split(",")], default=[1, 2, 4],
+                         help="Comma-separated worker counts, e.g. 1,2,4,8")
+    scaling.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    scaling.add_argument("--username", default="bench-governor")
+    scaling.add_argument("--password", default="bench-password")
+    scaling.add_argument("--concurrency", type=int, default=64)
+    scaling.add_argument("--duration", type=float, default=30)
+    scaling.add_argument("--news", type=int, default=2000)
+    scaling.add_argument("--ministries", type=int, default=40)
+    scaling.add_argument("--amendments", type=int, default=300)
+    scaling.add_argument("--leaders", type=int, default=30)
+    scaling.add_argument("--users", type=int, default=10)
+    scaling.add_argument("--images", type=int, default=20)
+
+    org_chart = subparsers.add_parser(
+        "org-chart",
+        help="Time the /api/org-chart aggregation against N+1 role lookups on a throwaway database (needs MongoDB)"
+    )
+    org_chart.add_argument("--mongo-url", default=os.environ.get("MONGO_URL", "mongodb://localhost:27017"))
+    org_chart.add_argument("--ministries", type=int, default=40)
+    org_chart.add_argument("--deputies", type=int, default=4)
+    org_chart.add_argument("--roles", type=int, default=30)
+    org_chart.add_argument("--leaders", type=int, default=20)
+    org_chart.add_argument("--rounds", type=int, default=200)
+
+    compare = subparsers.add_parser("compare", help="Compare two saved suite reports")
+    compare.add_argument("baseline")
+    compare.add_argument("candidate")
+
+    serve = subparsers.add_parser("serve-memory", help=argparse.SUPPRESS)
+    serve.add_argument("--port", type=int, required=True)
+
+    args = parser.parse_args()
+    if args.scenario == "serve-memory":
+        serve_memory(args.port)
+        return 0
+    if args.scenario == "compare":
+        compare_reports(args.baseline, args.candidate)
+        return 0
+    if args.scenario == "suite":
+        return run_suite(args)
+    if args.scenario == "scaling":
+        return run_scaling(args)
+    benchmark = APIBenchmark(args.base_url, args.label)
+
+    print(f"🚀 Running '{args.scenario}' benchmark against {args.base_url}")
+    if args.scenario == "login-burst":
+        asyncio.run(benchmark.bench_login_burst(
+            args.username, args.password, args.logins, args.readers, args.reads
+        ))
+    elif args.scenario == "concurrent-edits":
+        asyncio.run(benchmark.bench_concurrent_edits(
+            args.username, args.password, args.editors, args.edits, args.if_match
+        ))
+    elif args.scenario == "compression":
+        asyncio.run(benchmark.bench_compression(args.paths, args.requests, args.rounds))
+    elif args.scenario == "metrics-overhead":
+        asyncio.run(benchmark.bench_metrics_overhead(args.requests, args.rounds))
+    elif args.scenario == "serialization":
+        asyncio.run(benchmark.bench_serialization(args.items, args.rounds, args.http_requests, args.concurrency))
+    elif args.scenario == "org-chart":
+        asyncio.run(benchmark.bench_org_chart(args.mongo_url, args.ministries, args.deputies, args.roles, args.leaders, args.rounds))
+
+    benchmark.print_summary()
+    if args.output:
+        benchmark.save(args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
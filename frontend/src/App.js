@@ -24,6 +24,7 @@ function App() {
             <Route path="/ministries" element={<Ministries />} />
             <Route path="/ministries/:id" element={<MinistryDetail />} />
             <Route path="/news" element={<News />} />
+            <Route path="/news/:id" element={<News />} />
             <Route path="/amendments" element={<Amendments />} />
             <Route path="/login" element={<Login />} />
             <Route path="/admin" element={<Admin />} />
@@ -19,7 +19,7 @@ import {
   SelectValue,
 } from '../ui/select';
 import { toast } from 'sonner';
-import { formatDate } from '../../lib/utils';
+import { fetchAllPages, formatDate, ifMatch, isEditConflict, EDIT_CONFLICT_MESSAGE } from '../../lib/utils';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -43,7 +43,7 @@ const AmendmentsManager = () => {
 
   const fetchAmendments = async () => {
     try {
-      const response = await axios.get(`${API}/amendments`);
+      const response = await fetchAllPages(`${API}/amendments`);
       setAmendments(response.data);
     } catch (error) {
       console.error('Failed to fetch amendments:', error);
@@ -82,7 +82,7 @@ const AmendmentsManager = () => {
     
     try {
       if (editMode && currentAmendment) {
-        await axios.put(`${API}/amendments/${currentAmendment.id}`, formData);
+        await axios.put(`${API}/amendments/${currentAmendment.id}`, formData, ifMatch(currentAmendment));
         toast.success('Поправка обновлена');
       } else {
         await axios.post(`${API}/amendments`, formData);
@@ -92,6 +92,12 @@ const AmendmentsManager = () => {
       setDialogOpen(false);
       fetchAmendments();
     } catch (error) {
+      if (isEditConflict(error)) {
+        toast.error(EDIT_CONFLICT_MESSAGE);
+        setDialogOpen(false);
+        fetchAmendments();
+        return;
+      }
       toast.error(error.response?.data?.detail || 'Ошибка сохранения');
     }
   };
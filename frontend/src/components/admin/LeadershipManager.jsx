@@ -11,7 +11,7 @@ import {
   DialogTitle,
 } from '../ui/dialog';
 import { toast } from 'sonner';
-import { formatDate, calculateDaysInPosition } from '../../lib/utils';
+import { fetchAllPages, formatDate, calculateDaysInPosition, ifMatch, isEditConflict, EDIT_CONFLICT_MESSAGE, mediaVariant } from '../../lib/utils';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -39,7 +39,7 @@ const LeadershipManager = () => {
 
   const fetchLeaders = async () => {
     try {
-      const response = await axios.get(`${API}/leadership`);
+      const response = await fetchAllPages(`${API}/leadership`);
       setLeaders(response.data);
     } catch (error) {
       console.error('Failed to fetch leaders:', error);
@@ -103,7 +103,7 @@ const LeadershipManager = () => {
     
     try {
       if (editMode && currentLeader) {
-        await axios.put(`${API}/leadership/${currentLeader.id}`, formData);
+        await axios.put(`${API}/leadership/${currentLeader.id}`, formData, ifMatch(currentLeader));
         toast.success('Данные обновлены');
       } else {
         await axios.post(`${API}/leadership`, formData);
@@ -113,6 +113,12 @@ const LeadershipManager = () => {
       setDialogOpen(false);
       fetchLeaders();
     } catch (error) {
+      if (isEditConflict(error)) {
+        toast.error(EDIT_CONFLICT_MESSAGE);
+        setDialogOpen(false);
+        fetchLeaders();
+        return;
+      }
       toast.error(error.response?.data?.detail || 'Ошибка сохранения');
     }
   };
@@ -171,7 +177,7 @@ const LeadershipManager = () => {
                 <div className="flex items-center gap-4">
                   <div className="w-16 h-16 rounded-lg bg-background flex items-center justify-center border border-white/10 overflow-hidden">
                     {leader.photo ? (
-                      <img src={leader.photo} alt="" className="w-full h-full object-cover" />
+                      <img src={mediaVariant(leader.photo, 'thumb')} alt="" className="w-full h-full object-cover" />
                     ) : (
                       <Users className="w-8 h-8 text-muted-foreground" />
                     )}
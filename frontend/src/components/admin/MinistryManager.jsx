@@ -14,6 +14,7 @@ import {
   DialogTitle,
 } from '../ui/dialog';
 import { toast } from 'sonner';
+import { fetchAllPages, ifMatch, isEditConflict, EDIT_CONFLICT_MESSAGE, mediaVariant } from '../../lib/utils';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -39,7 +40,7 @@ const MinistryManager = () => {
 
   const fetchMinistries = async () => {
     try {
-      const response = await axios.get(`${API}/ministries`);
+      const response = await fetchAllPages(`${API}/ministries`);
       setMinistries(response.data);
     } catch (error) {
       console.error('Failed to fetch ministries:', error);
@@ -152,7 +153,7 @@ const MinistryManager = () => {
       };
 
       if (editMode && currentMinistry) {
-        await axios.put(`${API}/ministries/${currentMinistry.id}`, payload);
+        await axios.put(`${API}/ministries/${currentMinistry.id}`, payload, ifMatch(currentMinistry));
         toast.success('Министерство обновлено');
       } else {
         await axios.post(`${API}/ministries`, payload);
@@ -162,6 +163,12 @@ const MinistryManager = () => {
       setDialogOpen(false);
       fetchMinistries();
     } catch (error) {
+      if (isEditConflict(error)) {
+        toast.error(EDIT_CONFLICT_MESSAGE);
+        setDialogOpen(false);
+        fetchMinistries();
+        return;
+      }
       console.error('Save failed:', error);
       toast.error('Ошибка сохранения');
     }
@@ -256,7 +263,7 @@ const MinistryManager = () => {
                 <div className="flex items-start gap-4">
                   <div className="w-12 h-12 rounded-lg bg-background flex items-center justify-center border border-white/10">
                     {ministry.logo ? (
-                      <img src={ministry.logo} alt="" className="w-8 h-8 object-contain" />
+                      <img src={mediaVariant(ministry.logo, 'thumb')} alt="" className="w-8 h-8 object-contain" />
                     ) : (
                       <Building2 className="w-6 h-6 text-primary" />
                     )}
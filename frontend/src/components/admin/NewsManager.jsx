@@ -13,7 +13,7 @@ import {
   DialogTitle,
 } from '../ui/dialog';
 import { toast } from 'sonner';
-import { formatDate } from '../../lib/utils';
+import { fetchAllPages, formatDate, ifMatch, isEditConflict, EDIT_CONFLICT_MESSAGE, mediaVariant } from '../../lib/utils';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -40,8 +40,8 @@ const NewsManager = () => {
   const fetchNews = async () => {
     try {
       const [newsRes, archiveRes] = await Promise.all([
-        axios.get(`${API}/news?archive=false`),
-        axios.get(`${API}/news?archive=true`)
+        fetchAllPages(`${API}/news?archive=false`),
+        fetchAllPages(`${API}/news?archive=true`)
       ]);
       setNews(newsRes.data);
       setArchiveNews(archiveRes.data);
@@ -97,7 +97,7 @@ const NewsManager = () => {
     
     try {
       if (editMode && currentNews) {
-        await axios.put(`${API}/news/${currentNews.id}`, formData);
+        await axios.put(`${API}/news/${currentNews.id}`, formData, ifMatch(currentNews));
         toast.success('Новость обновлена');
       } else {
         await axios.post(`${API}/news`, formData);
@@ -107,6 +107,12 @@ const NewsManager = () => {
       setDialogOpen(false);
       fetchNews();
     } catch (error) {
+      if (isEditConflict(error)) {
+        toast.error(EDIT_CONFLICT_MESSAGE);
+        setDialogOpen(false);
+        fetchNews();
+        return;
+      }
       console.error('Save failed:', error);
       toast.error('Ошибка сохранения');
     }
@@ -193,7 +199,7 @@ const NewsManager = () => {
                 <div className="flex items-start gap-4 flex-1">
                   {item.image && (
                     <img
-                      src={item.image}
+                      src={mediaVariant(item.image, 'thumb')}
                       alt=""
                       className="w-20 h-20 object-cover rounded-lg shrink-0"
                     />
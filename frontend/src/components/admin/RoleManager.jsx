@@ -14,7 +14,7 @@ import {
   DialogTitle,
 } from '../ui/dialog';
 import { toast } from 'sonner';
-import { formatDate } from '../../lib/utils';
+import { fetchAllPages, formatDate, ifMatch, isEditConflict, EDIT_CONFLICT_MESSAGE } from '../../lib/utils';
 import { useAuth } from '../../context/AuthContext';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
@@ -48,8 +48,8 @@ const RoleManager = () => {
   const fetchData = async () => {
     try {
       const [rolesRes, usersRes] = await Promise.all([
-        axios.get(`${API}/roles`),
-        axios.get(`${API}/users`)
+        fetchAllPages(`${API}/roles`),
+        fetchAllPages(`${API}/users`)
       ]);
       setRoles(rolesRes.data);
       setUsers(usersRes.data);
@@ -92,7 +92,7 @@ const RoleManager = () => {
     
     try {
       if (editMode && currentRole) {
-        await axios.put(`${API}/roles/${currentRole.id}`, formData);
+        await axios.put(`${API}/roles/${currentRole.id}`, formData, ifMatch(currentRole));
         toast.success('Роль обновлена');
       } else {
         const response = await axios.post(`${API}/roles`, formData);
@@ -102,6 +102,12 @@ const RoleManager = () => {
       setDialogOpen(false);
       fetchData();
     } catch (error) {
+      if (isEditConflict(error)) {
+        toast.error(EDIT_CONFLICT_MESSAGE);
+        setDialogOpen(false);
+        fetchData();
+        return;
+      }
       console.error('Save failed:', error);
       toast.error(error.response?.data?.detail || 'Ошибка сохранения');
     }
@@ -0,0 +1,35 @@
+import { useEffect, useRef } from 'react';
+
+const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
+
+// Подписка на /api/stream/updates. handlers: { news: ({ op, id }) => ..., amendments: ..., reset: () => ... }
+// op === 'reset' или событие reset означают, что изменения пропущены и список нужно перечитать.
+// EventSource сам переподключается и присылает Last-Event-ID, сервер досылает пропущенное.
+export function useLiveUpdates(collections, handlers) {
+  const handlersRef = useRef(handlers);
+  handlersRef.current = handlers;
+  const key = collections.join(',');
+
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+    const source = new EventSource(`${API}/stream/updates?collections=${key}`);
+    [...key.split(','), 'reset'].forEach((name) => {
+      source.addEventListener(name, (message) => {
+        const handler = handlersRef.current[name];
+        if (handler) handler(JSON.parse(message.data));
+      });
+    });
+    return () => source.close();
+  }, [key]);
+}
+
+// Новая или измененная запись встает на место по created_at (списки отсортированы по убыванию)
+export function upsertById(list, item) {
+  const rest = list.filter((entry) => entry.id !== item.id);
+  const index = rest.findIndex((entry) => entry.created_at < item.created_at);
+  return index === -1 ? [...rest, item] : [...rest.slice(0, index), item, ...rest.slice(index)];
+}
+
+export function removeById(list, id) {
+  return list.filter((entry) => entry.id !== id);
+}
@@ -1,5 +1,6 @@
 import { clsx } from "clsx";
 import { twMerge } from "tailwind-merge";
+import axios from "axios";
 
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
@@ -23,3 +24,43 @@ export function formatDate(dateString) {
     year: 'numeric'
   });
 }
+
+export const EDIT_CONFLICT_MESSAGE = 'Запись уже изменена другим администратором. Данные обновлены, повторите правку.';
+
+export function ifMatch(item) {
+  return { headers: { 'If-Match': `"${item?.version ?? 0}"` } };
+}
+
+export function isEditConflict(error) {
+  return error.response?.status === 412;
+}
+
+// Снимок страницы от сервера содержит ответы API для первого рендера: { '/news?archive=false': [...] }.
+// Каждый ответ используется один раз, дальше страница ходит в API как обычно.
+export function preloaded(path, load) {
+  const state = window.__INITIAL_STATE__;
+  if (state && Object.prototype.hasOwnProperty.call(state, path)) {
+    const data = state[path];
+    delete state[path];
+    return Promise.resolve(data);
+  }
+  return load().then((response) => response.data);
+}
+
+// Списки API отдаются страницами: следующую запрашиваем по X-Next-Cursor, пока он есть.
+// Результат в форме ответа axios, чтобы подходить для preloaded().
+export async function fetchAllPages(url) {
+  const items = [];
+  let after = null;
+  do {
+    const response = await axios.get(url, { params: after ? { after } : undefined });
+    items.push(...response.data);
+    after = response.headers['x-next-cursor'];
+  } while (after);
+  return { data: items };
+}
+
+export function mediaVariant(url, variant) {
+  if (!url || !url.includes('/api/media/') || url.includes('?')) return url;
+  return `${url}?variant=${variant}`;
+}
@@ -2,7 +2,8 @@ import React, { useEffect, useState } from 'react';
 import { motion } from 'framer-motion';
 import { Scale, Calendar, Search, FileText, CheckCircle, Clock } from 'lucide-react';
 import axios from 'axios';
-import { formatDate } from '../lib/utils';
+import { fetchAllPages, formatDate, preloaded } from '../lib/utils';
+import { useLiveUpdates, upsertById, removeById } from '../hooks/use-live-updates';
 import { Input } from '../components/ui/input';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
@@ -19,8 +20,7 @@ const Amendments = () => {
 
   const fetchAmendments = async () => {
     try {
-      const response = await axios.get(`${API}/amendments`);
-      setAmendments(response.data);
+      setAmendments(await preloaded('/amendments', () => fetchAllPages(`${API}/amendments`)));
     } catch (error) {
       console.error('Failed to fetch amendments:', error);
     } finally {
@@ -28,6 +28,31 @@ const Amendments = () => {
     }
   };
 
+  const applyAmendmentUpdate = async ({ op, id }) => {
+    if (op === 'reset') {
+      fetchAmendments();
+      return;
+    }
+    if (op === 'delete') {
+      setAmendments((list) => removeById(list, id));
+      setSelectedAmendment((selected) => (selected?.id === id ? null : selected));
+      return;
+    }
+    try {
+      const { data } = await axios.get(`${API}/amendments/${id}`);
+      setAmendments((list) => upsertById(list, data));
+      setSelectedAmendment((selected) => (selected?.id === id ? data : selected));
+    } catch (error) {
+      if (error.response?.status === 404) {
+        applyAmendmentUpdate({ op: 'delete', id });
+      } else {
+        console.error('Failed to apply amendment update:', error);
+      }
+    }
+  };
+
+  useLiveUpdates(['amendments'], { amendments: applyAmendmentUpdate, reset: fetchAmendments });
+
   const filteredAmendments = amendments.filter(
     (item) =>
       item.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
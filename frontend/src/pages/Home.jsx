@@ -3,7 +3,7 @@ import { Link } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { Building2, Newspaper, Scale, ChevronRight, Users, Mail, Clock, CreditCard } from 'lucide-react';
 import axios from 'axios';
-import { calculateDaysInPosition } from '../lib/utils';
+import { calculateDaysInPosition, mediaVariant } from '../lib/utils';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -14,6 +14,7 @@ const Home = () => {
   const [news, setNews] = useState([]);
   const [ministries, setMinistries] = useState([]);
   const [leadership, setLeadership] = useState([]);
+  const [counts, setCounts] = useState({});
 
   useEffect(() => {
     fetchData();
@@ -21,14 +22,11 @@ const Home = () => {
 
   const fetchData = async () => {
     try {
-      const [newsRes, ministriesRes, leadershipRes] = await Promise.all([
-        axios.get(`${API}/news`),
-        axios.get(`${API}/ministries`),
-        axios.get(`${API}/leadership`)
-      ]);
-      setNews(newsRes.data.slice(0, 3));
-      setMinistries(ministriesRes.data.slice(0, 4));
-      setLeadership(leadershipRes.data);
+      const response = await axios.get(`${API}/home`);
+      setNews(response.data.news);
+      setMinistries(response.data.ministries);
+      setLeadership(response.data.leadership);
+      setCounts(response.data.counts);
     } catch (error) {
       console.error('Failed to fetch data:', error);
     }
@@ -142,7 +140,7 @@ const Home = () => {
                     <div className={`${idx === 0 ? 'w-32 h-32' : 'w-24 h-24'} rounded-lg overflow-hidden bg-background-paper border border-white/10 mb-4`}>
                       {leader.photo ? (
                         <img
-                          src={leader.photo}
+                          src={mediaVariant(leader.photo, 'thumb')}
                           alt={`${leader.name} ${leader.surname}`}
                           className="w-full h-full object-cover"
                         />
@@ -227,10 +225,10 @@ const Home = () => {
             className="grid grid-cols-2 md:grid-cols-4 gap-6 mt-16"
           >
             {[
-              { icon: Building2, label: 'Министерств', value: ministries.length || '—' },
-              { icon: Users, label: 'Руководителей', value: leadership.length || '—' },
-              { icon: Scale, label: 'Поправок', value: '—' },
-              { icon: Newspaper, label: 'Новостей', value: news.length || '—' },
+              { icon: Building2, label: 'Министерств', value: counts.ministries || ministries.length || '—' },
+              { icon: Users, label: 'Руководителей', value: counts.leadership || leadership.length || '—' },
+              { icon: Scale, label: 'Поправок', value: counts.amendments || '—' },
+              { icon: Newspaper, label: 'Новостей', value: counts.news || news.length || '—' },
             ].map((stat, idx) => (
               <motion.div
                 key={idx}
@@ -284,7 +282,7 @@ const Home = () => {
                     </span>
                   </div>
                   <h3 className="font-subheading text-lg text-white mb-3">{item.title}</h3>
-                  <p className="text-muted-foreground text-sm line-clamp-3">{item.content}</p>
+                  <p className="text-muted-foreground text-sm line-clamp-3">{item.teaser}</p>
                 </motion.div>
               ))}
             </motion.div>
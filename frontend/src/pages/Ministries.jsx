@@ -2,7 +2,7 @@ import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { Building2, User, ChevronRight, Users } from 'lucide-react';
-import axios from 'axios';
+import { fetchAllPages, mediaVariant, preloaded } from '../lib/utils';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -16,8 +16,7 @@ const Ministries = () => {
 
   const fetchMinistries = async () => {
     try {
-      const response = await axios.get(`${API}/ministries`);
-      setMinistries(response.data);
+      setMinistries(await preloaded('/ministries', () => fetchAllPages(`${API}/ministries`)));
     } catch (error) {
       console.error('Failed to fetch ministries:', error);
     } finally {
@@ -92,7 +91,7 @@ const Ministries = () => {
                     <div className="w-16 h-16 bg-background rounded-lg flex items-center justify-center mb-6 border border-white/10 group-hover:border-primary/30 transition-colors">
                       {ministry.logo ? (
                         <img
-                          src={ministry.logo}
+                          src={mediaVariant(ministry.logo, 'thumb')}
                           alt={ministry.name}
                           className="w-12 h-12 object-contain img-desaturate"
                         />
@@ -114,7 +113,7 @@ const Ministries = () => {
                       <div className="flex items-center gap-3 pt-4 border-t border-white/5">
                         {ministry.minister.photo ? (
                           <img
-                            src={ministry.minister.photo}
+                            src={mediaVariant(ministry.minister.photo, 'thumb')}
                             alt={ministry.minister.name}
                             className="w-10 h-10 rounded-full object-cover border border-white/10"
                           />
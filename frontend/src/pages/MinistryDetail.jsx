@@ -3,7 +3,7 @@ import { useParams, Link } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { Building2, User, ArrowLeft, Calendar, Phone, Users, Clock } from 'lucide-react';
 import axios from 'axios';
-import { calculateDaysInPosition, formatDate } from '../lib/utils';
+import { calculateDaysInPosition, formatDate, mediaVariant, preloaded } from '../lib/utils';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
@@ -18,8 +18,7 @@ const MinistryDetail = () => {
 
   const fetchMinistry = async () => {
     try {
-      const response = await axios.get(`${API}/ministries/${id}`);
-      setMinistry(response.data);
+      setMinistry(await preloaded(`/ministries/${id}`, () => axios.get(`${API}/ministries/${id}`)));
     } catch (error) {
       console.error('Failed to fetch ministry:', error);
     } finally {
@@ -82,7 +81,7 @@ const MinistryDetail = () => {
             {/* Logo */}
             <div className="w-24 h-24 bg-background rounded-lg flex items-center justify-center border border-white/10 shrink-0">
               {ministry.logo ? (
-                <img src={ministry.logo} alt={ministry.name} className="w-16 h-16 object-contain" />
+                <img src={mediaVariant(ministry.logo, 'thumb')} alt={ministry.name} className="w-16 h-16 object-contain" />
               ) : (
                 <Building2 className="w-12 h-12 text-primary" />
               )}
@@ -126,7 +125,7 @@ const MinistryDetail = () => {
                     <div className="w-32 h-32 rounded-lg overflow-hidden bg-background border border-white/10 shrink-0">
                       {ministry.minister.photo ? (
                         <img
-                          src={ministry.minister.photo}
+                          src={mediaVariant(ministry.minister.photo, 'card')}
                           alt={ministry.minister.name}
                           className="w-full h-full object-cover"
                         />
@@ -188,7 +187,7 @@ const MinistryDetail = () => {
                         <div className="w-16 h-16 rounded-lg overflow-hidden bg-background border border-white/10 shrink-0">
                           {deputy.photo ? (
                             <img
-                              src={deputy.photo}
+                              src={mediaVariant(deputy.photo, 'thumb')}
                               alt={deputy.name}
                               className="w-full h-full object-cover"
                             />
@@ -1,12 +1,16 @@
 import React, { useEffect, useState } from 'react';
+import { useNavigate, useParams } from 'react-router-dom';
 import { motion } from 'framer-motion';
 import { Newspaper, Calendar, ChevronRight, Archive } from 'lucide-react';
 import axios from 'axios';
-import { formatDate } from '../lib/utils';
+import { fetchAllPages, formatDate, mediaVariant, preloaded } from '../lib/utils';
+import { useLiveUpdates, upsertById, removeById } from '../hooks/use-live-updates';
 
 const API = `${process.env.REACT_APP_BACKEND_URL}/api`;
 
 const News = () => {
+  const { id } = useParams();
+  const navigate = useNavigate();
   const [news, setNews] = useState([]);
   const [archiveNews, setArchiveNews] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -17,14 +21,29 @@ const News = () => {
     fetchNews();
   }, []);
 
+  useEffect(() => {
+    if (!id || selectedNews?.id === id) return;
+    preloaded(`/news/${id}`, () => axios.get(`${API}/news/${id}`))
+      .then((item) => {
+        setSelectedNews(item);
+        setActiveTab(item.is_archive ? 'archive' : 'news');
+      })
+      .catch((error) => console.error('Failed to fetch news item:', error));
+  }, [id]);
+
+  const selectNews = (item) => {
+    setSelectedNews(item);
+    navigate(item ? `/news/${item.id}` : '/news', { replace: true });
+  };
+
   const fetchNews = async () => {
     try {
-      const [newsRes, archiveRes] = await Promise.all([
-        axios.get(`${API}/news?archive=false`),
-        axios.get(`${API}/news?archive=true`)
+      const [newsData, archiveData] = await Promise.all([
+        preloaded('/news?archive=false', () => fetchAllPages(`${API}/news?archive=false`)),
+        preloaded('/news?archive=true', () => fetchAllPages(`${API}/news?archive=true`))
       ]);
-      setNews(newsRes.data);
-      setArchiveNews(archiveRes.data);
+      setNews(newsData);
+      setArchiveNews(archiveData);
     } catch (error) {
       console.error('Failed to fetch news:', error);
     } finally {
@@ -32,6 +51,33 @@ const News = () => {
     }
   };
 
+  const applyNewsUpdate = async ({ op, id }) => {
+    if (op === 'reset') {
+      fetchNews();
+      return;
+    }
+    if (op === 'delete') {
+      setNews((list) => removeById(list, id));
+      setArchiveNews((list) => removeById(list, id));
+      setSelectedNews((selected) => (selected?.id === id ? null : selected));
+      return;
+    }
+    try {
+      const { data } = await axios.get(`${API}/news/${id}`);
+      setNews((list) => (data.is_archive ? removeById(list, id) : upsertById(list, data)));
+      setArchiveNews((list) => (data.is_archive ? upsertById(list, data) : removeById(list, id)));
+      setSelectedNews((selected) => (selected?.id === id ? data : selected));
+    } catch (error) {
+      if (error.response?.status === 404) {
+        applyNewsUpdate({ op: 'delete', id });
+      } else {
+        console.error('Failed to apply news update:', error);
+      }
+    }
+  };
+
+  useLiveUpdates(['news'], { news: applyNewsUpdate, reset: fetchNews });
+
   const currentNews = activeTab === 'news' ? news : archiveNews;
 
   const containerVariants = {
@@ -73,7 +119,7 @@ const News = () => {
         <div className="max-w-7xl mx-auto">
           <div className="flex gap-4 mb-8">
             <button
-              onClick={() => { setActiveTab('news'); setSelectedNews(null); }}
+              onClick={() => { setActiveTab('news'); selectNews(null); }}
               className={`px-6 py-3 rounded-sm font-medium transition-colors ${
                 activeTab === 'news'
                   ? 'bg-primary text-black'
@@ -84,7 +130,7 @@ const News = () => {
               Новости ({news.length})
             </button>
             <button
-              onClick={() => { setActiveTab('archive'); setSelectedNews(null); }}
+              onClick={() => { setActiveTab('archive'); selectNews(null); }}
               className={`px-6 py-3 rounded-sm font-medium transition-colors ${
                 activeTab === 'archive'
                   ? 'bg-primary text-black'
@@ -125,7 +171,7 @@ const News = () => {
                     <motion.div
                       key={item.id}
                       variants={itemVariants}
-                      onClick={() => setSelectedNews(item)}
+                      onClick={() => selectNews(item)}
                       className={`news-card bg-background-paper p-6 rounded-md cursor-pointer ${
                         selectedNews?.id === item.id ? 'border-l-primary bg-white/5' : ''
                       }`}
@@ -177,7 +223,7 @@ const News = () => {
                 >
                   {selectedNews.image && (
                     <img
-                      src={selectedNews.image}
+                      src={mediaVariant(selectedNews.image, 'full')}
                       alt={selectedNews.title}
                       className="w-full h-48 object-cover"
                     />
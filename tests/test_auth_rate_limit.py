@@ -0,0 +1,74 @@
+import asyncio
+
+import server
+
+
+def login(api, password):
+    return api.post("/api/auth/login", json={"username": "governor", "password": password})
+
+
+def test_user_is_locked_out_after_threshold(api, governor):
+    codes = [login(api, "wrong").status_code for _ in range(server.AUTH_LOCKOUT_USER_THRESHOLD)]
+    assert codes == [401] * server.AUTH_LOCKOUT_USER_THRESHOLD
+
+    response = login(api, "secret-pw")
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+    assert server.auth_limiter.rejections == {"login:user_lockout": 1}
+
+
+def test_success_resets_user_failures(api, governor, monkeypatch):
+    monkeypatch.setattr(server, "RATE_LIMIT_USER_BURST", 100)
+    for _ in range(server.AUTH_LOCKOUT_USER_THRESHOLD - 1):
+        assert login(api, "wrong").status_code == 401
+    assert login(api, "secret-pw").status_code == 200
+    for _ in range(server.AUTH_LOCKOUT_USER_THRESHOLD - 1):
+        assert login(api, "wrong").status_code == 401
+    assert login(api, "secret-pw").status_code == 200
+
+
+def test_memory_failures_decay_after_window(clock):
+    backend = server.MemoryRateLimitBackend(100)
+
+    async def scenario():
+        for _ in range(4):
+            assert await backend.register_failure("login:user:x", 5) == 0
+        clock.now += server.AUTH_FAILURE_WINDOW + 1
+        # The count restarted, so this is failure #1 rather than #5
+        assert await backend.register_failure("login:user:x", 5) == 0
+        for _ in range(3):
+            await backend.register_failure("login:user:x", 5)
+        assert await backend.register_failure("login:user:x", 5) == server.AUTH_LOCKOUT_BASE
+        assert await backend.locked_for("login:user:x") == server.AUTH_LOCKOUT_BASE
+
+    asyncio.run(scenario())
+
+
+def test_failures_within_window_keep_escalating(clock):
+    backend = server.MemoryRateLimitBackend(100)
+
+    async def scenario():
+        for _ in range(5):
+            lockout = await backend.register_failure("k", 5)
+        assert lockout == server.AUTH_LOCKOUT_BASE
+        clock.now += lockout + 1
+        assert await backend.locked_for("k") == 0
+        assert await backend.register_failure("k", 5) == server.AUTH_LOCKOUT_BASE * 2
+
+    asyncio.run(scenario())
+
+
+def test_ip_key_survives_success_but_decays(clock):
+    limiter = server.AuthRateLimiter(server.MemoryRateLimitBackend(100))
+    keys = {"ip": "login:ip:10.0.0.1", "user": "login:user:alice"}
+
+    async def scenario():
+        await limiter.failure(keys)
+        await limiter.success(keys)
+        assert "login:user:alice" not in limiter.backend.failures
+        assert limiter.backend.failures["login:ip:10.0.0.1"][0] == 1
+        clock.now += server.AUTH_FAILURE_WINDOW + 1
+        await limiter.failure({"ip": keys["ip"]})
+        assert limiter.backend.failures["login:ip:10.0.0.1"][0] == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,61 @@
+import pytest
+
+PERMISSIONS = {
+    "can_manage_ministries": False, "can_manage_news": True, "can_manage_legislation": False,
+    "can_manage_roles": False, "can_manage_leadership": False, "can_delete": False,
+}
+
+
+def create_news(api, headers, title):
+    response = api.post("/api/news", json={"title": title, "content": "text"}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def batch(api, headers, *operations):
+    return api.post("/api/news/batch", json={"operations": list(operations)}, headers=headers)
+
+
+@pytest.fixture
+def editor(api, governor):
+    role = api.post("/api/roles", json={"name": "Editor", "permissions": PERMISSIONS}, headers=governor).json()
+    token = api.post("/api/auth/register", json={"username": "editor", "access_code": role["access_code"]}).json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_each_operation_gets_its_own_result(api, governor):
+    first, second = create_news(api, governor, "First"), create_news(api, governor, "Second")
+    response = batch(api, governor,
+                     {"op": "update", "id": first["id"], "version": first["version"], "data": {"title": "Edited", "content": "new"}},
+                     {"op": "archive", "id": second["id"], "version": second["version"] + 5},
+                     {"op": "update", "id": second["id"]},
+                     {"op": "delete", "id": first["id"]},
+                     {"op": "unarchive", "id": "missing"})
+    assert response.status_code == 200, response.text
+    results = response.json()["results"]
+    assert [result["status"] for result in results] == ["ok", "conflict", "invalid", "duplicate", "not_found"]
+    assert results[0]["version"] == first["version"] + 1
+    assert results[1]["version"] == second["version"]
+    assert api.get(f"/api/news/{first['id']}").json()["title"] == "Edited"
+    assert api.get(f"/api/news/{second['id']}").json()["is_archive"] is False
+
+
+def test_deletes_need_the_delete_permission(api, governor, editor):
+    news = create_news(api, governor, "First")
+    assert batch(api, editor, {"op": "delete", "id": news["id"]}).status_code == 403
+    assert batch(api, editor, {"op": "archive", "id": news["id"]}).status_code == 200
+    assert batch(api, governor, {"op": "delete", "id": news["id"]}).json()["results"][0]["status"] == "ok"
+    assert api.get(f"/api/news/{news['id']}").status_code == 404
+
+
+def test_amendment_status_batch(api, governor):
+    response = api.post("/api/amendments", headers=governor, json={
+        "number": "A-1", "title": "Tax", "content": "text", "status": "draft"
+    })
+    assert response.status_code == 200, response.text
+    amendment_id = response.json()["id"]
+    response = api.post("/api/amendments/batch", headers=governor, json={"operations": [
+        {"op": "set_status", "id": amendment_id, "status": "adopted"},
+    ]})
+    assert response.json()["results"][0]["status"] == "ok"
+    assert api.get(f"/api/amendments/{amendment_id}").json()["status"] == "adopted"
@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+import backend_benchmark as bench
+
+
+def mixed(p50, rate):
+    stats = {"count": 100, "p50_ms": p50, "p95_ms": p50 * 2, "p99_ms": p50 * 3, "max_ms": p50 * 4}
+    return {"overall": stats, "requests_per_second": rate,
+            "operations": {"news_list": {**stats, "per_second": rate / 2}}}
+
+
+def test_percentiles_use_nearest_rank():
+    samples = [index / 1000 for index in range(1, 101)]
+    assert bench.percentile(samples, 50) == 0.05
+    assert bench.percentile(samples, 99) == 0.099
+    assert bench.percentile([], 50) == 0.0
+    assert bench.summarize(samples)["p95_ms"] == 95.0
+
+
+def test_saved_reports_compare_by_operation(tmp_path, capsys):
+    paths = []
+    for label, (p50, rate) in (("before", (10.0, 200.0)), ("after", (5.0, 300.0))):
+        benchmark = bench.APIBenchmark(label=label)
+        benchmark.results["mixed"] = mixed(p50, rate)
+        paths.append(benchmark.save(tmp_path / f"{label}.json"))
+    assert json.loads(paths[0].read_text())["label"] == "before"
+
+    bench.compare_reports(*paths)
+    out = capsys.readouterr().out
+    overall = next(line for line in out.splitlines() if line.startswith("overall"))
+    assert "5.0 (-50.0%)" in overall and "300 (+50.0%)" in overall
+    assert any(line.startswith("news_list") for line in out.splitlines())
+
+
+def test_compare_needs_mixed_results(tmp_path):
+    path = tmp_path / "login.json"
+    path.write_text(json.dumps({"label": "x", "results": {"login_burst": {}}}))
+    with pytest.raises(SystemExit):
+        bench.compare_reports(path, path)
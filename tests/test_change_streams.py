@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+import server
+
+
+class FakeStream:
+    """Replays canned change events the way a Motor change stream hands them out."""
+
+    def __init__(self, events, resume_after):
+        self.events = list(events)
+        self.alive = True
+        self.resume_token = resume_after
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def try_next(self):
+        if self.events:
+            event = self.events.pop(0)
+            self.resume_token = event["_id"]
+            return event
+        await asyncio.sleep(0.01)
+        return None
+
+
+def change(seq, op, collection, key=None, doc_id=None):
+    event = {"_id": {"t": seq}, "operationType": op, "ns": {"coll": collection}}
+    if key is not None:
+        event["documentKey"] = {"_id": key}
+    if doc_id is not None:
+        event["fullDocument"] = {"id": doc_id}
+    return event
+
+
+@pytest.fixture
+def published(monkeypatch):
+    events = []
+    original = server.publish_change
+
+    async def record(collection, op, doc_id=None, source="local"):
+        events.append((collection, op, doc_id, source))
+        await original(collection, op, doc_id, source=source)
+
+    monkeypatch.setattr(server, "publish_change", record)
+    return events
+
+
+def test_delete_is_addressed_by_the_id_seen_on_insert():
+    bus = server.ChangeStreamBus("test", ("news",))
+    key = ObjectId()
+    assert bus.normalize(change(1, "insert", "news", key, "n1")) == ("news", "insert", "n1")
+    assert bus.normalize(change(2, "delete", "news", key)) == ("news", "delete", "n1")
+    assert bus.normalize(change(3, "delete", "news", key)) == ("news", "delete", None)
+    assert bus.stats["unresolved_deletes"] == 1
+
+
+def test_ids_of_existing_documents_are_loaded_at_start(db):
+    keys = asyncio.run(db.news.insert_many([{"id": "n1"}, {"id": "n2"}])).inserted_ids
+    bus = server.ChangeStreamBus("test", ("news",))
+    asyncio.run(bus.load_ids())
+    assert bus.normalize(change(1, "delete", "news", keys[1])) == ("news", "delete", "n2")
+
+
+def test_update_of_a_vanished_document_falls_back_to_the_known_id():
+    bus = server.ChangeStreamBus("test", ("news",))
+    key = ObjectId()
+    bus.normalize(change(1, "insert", "news", key, "n1"))
+    assert bus.normalize(change(2, "replace", "news", key)) == ("news", "update", "n1")
+    assert bus.normalize(change(3, "drop", "news")) == ("news", "drop", None)
+    assert bus.ids["news"] == {}
+
+
+def test_stream_delete_invalidates_only_that_item(api, governor, db, published, monkeypatch):
+    ids = [api.post("/api/news", json={"title": t, "content": "x"}, headers=governor).json()["id"] for t in "AB"]
+    for news_id in ids:
+        api.get(f"/api/news/{news_id}")
+    cached = set(server.response_cache.backend.entries)
+    assert {f"/api/news/{news_id}?" for news_id in ids} <= cached
+
+    docs = asyncio.run(db.news.find({}, {"_id": 1, "id": 1}).to_list(None))
+    keys = {doc["id"]: doc["_id"] for doc in docs}
+    bus = server.ChangeStreamBus("test", ("news",))
+    stream = FakeStream([change(1, "delete", "news", keys[ids[0]])], None)
+    monkeypatch.setattr(db, "watch", lambda *args, **kwargs: stream, raising=False)
+
+    async def run():
+        await bus.start()
+        await asyncio.sleep(0.05)
+        await bus.stop()
+
+    asyncio.run(run())
+    assert ("news", "delete", ids[0], "stream") in published
+    remaining = set(server.response_cache.backend.entries)
+    assert f"/api/news/{ids[0]}?" not in remaining
+    assert f"/api/news/{ids[1]}?" in remaining
+    assert asyncio.run(db.change_stream_state.find_one({"_id": "test"}))["token"] == {"t": 1}
+
+
+def test_lost_history_reloads_ids_and_flushes(db, published, monkeypatch):
+    asyncio.run(db.change_stream_state.insert_one({"_id": "test", "token": {"t": 0}}))
+    key = asyncio.run(db.news.insert_one({"id": "n1"})).inserted_id
+    bus = server.ChangeStreamBus("test", ("news",))
+    calls = []
+
+    def watch(pipeline, full_document, resume_after, max_await_time_ms):
+        calls.append(resume_after)
+        if len(calls) == 1:
+            raise OperationFailure("history lost", code=286)
+        return FakeStream([change(1, "delete", "news", key)], resume_after)
+
+    monkeypatch.setattr(db, "watch", watch, raising=False)
+
+    async def run():
+        await bus.start()
+        await asyncio.sleep(0.05)
+        await bus.stop()
+
+    asyncio.run(run())
+    assert calls[:2] == [{"t": 0}, None]
+    assert ("news", "resync", None, "stream") in published
+    assert ("news", "delete", "n1", "stream") in published
+    assert bus.stats["history_lost"] == 1
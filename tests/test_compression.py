@@ -0,0 +1,79 @@
+import asyncio
+import gzip
+
+from starlette.datastructures import Headers
+
+import server
+
+
+def seed_news(db, count):
+    asyncio.run(db.news.insert_many([
+        {"id": f"n{index:03d}", "title": f"Title {index}", "content": "Repeated body text. " * 20,
+         "is_archive": False, "created_at": f"2024-01-01T00:00:{index % 60:02d}+00:00"}
+        for index in range(count)
+    ]))
+
+
+def test_large_json_is_gzipped_with_a_weak_etag(api, db):
+    seed_news(db, 30)
+    response = api.get("/api/news", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"].startswith('W/"')
+    assert len(response.json()) == 30
+
+    assert int(response.headers["Content-Length"]) < len(response.content)
+
+    # The weak tag the client got back still revalidates
+    again = api.get("/api/news", headers={"Accept-Encoding": "gzip", "If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_small_or_unaccepted_responses_are_left_alone(api, db):
+    seed_news(db, 1)
+    small = api.get("/api/news", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    seed_news(db, 30)
+    identity = api.get("/api/news", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+
+
+def test_streamed_export_is_compressed_chunk_by_chunk(api, db, governor):
+    seed_news(db, 50)
+    response = api.get("/api/admin/export/news", headers={**governor, "Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert len(response.text.strip().splitlines()) == 50
+
+
+def test_compressible_rules():
+    middleware = server.CompressionMiddleware(None, types=["application/json", "text/event-stream"])
+    json_headers = Headers({"content-type": "application/json"})
+    assert middleware.compressible(200, json_headers)
+    assert not middleware.compressible(206, json_headers)
+    assert not middleware.compressible(304, json_headers)
+    assert not middleware.compressible(200, Headers({"content-type": "text/event-stream"}))
+    assert not middleware.compressible(200, Headers({"content-type": "application/json", "cache-control": "no-transform"}))
+    assert not middleware.compressible(200, Headers({"content-type": "application/json", "content-encoding": "br"}))
+    assert not middleware.compressible(200, Headers({"content-type": "image/webp"}))
+
+
+def test_responder_output_is_valid_gzip():
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def scenario():
+        middleware = server.CompressionMiddleware(None, minimum_size=10, types=["text/plain"])
+        responder = server.CompressionResponder(middleware, "gzip", send)
+        await responder({"type": "http.response.start", "status": 200,
+                         "headers": [(b"content-type", b"text/plain"), (b"content-length", b"9999")]})
+        await responder({"type": "http.response.body", "body": b"a" * 500, "more_body": True})
+        await responder({"type": "http.response.body", "body": b"b" * 500, "more_body": False})
+
+    asyncio.run(scenario())
+    body = b"".join(message.get("body", b"") for message in sent[1:])
+    assert gzip.decompress(body) == b"a" * 500 + b"b" * 500
+    assert b"content-length" not in dict(sent[0]["headers"])
@@ -0,0 +1,79 @@
+import asyncio
+
+import server
+from tests.conftest import reset_state
+
+
+def create_news(api, headers, title="Budget", content="Budget approved"):
+    response = api.post("/api/news", json={"title": title, "content": content}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_list_returns_etag_and_304(api, governor):
+    create_news(api, governor)
+    first = api.get("/api/news")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == server.CACHE_CONTROL_POLICIES["news"]
+
+    again = api.get("/api/news", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["ETag"] == etag
+
+
+def test_write_changes_list_etag(api, governor):
+    create_news(api, governor)
+    etag = api.get("/api/news").headers["ETag"]
+    create_news(api, governor, title="Second")
+    response = api.get("/api/news", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(response.json()) == 2
+
+
+def test_etag_is_the_same_in_another_worker(api, governor):
+    create_news(api, governor)
+    etag = api.get("/api/news").headers["ETag"]
+    # A fresh process has no counters or cache; the tag depends only on the data
+    reset_state()
+    response = api.get("/api/news", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_write_from_another_process_is_not_hidden_by_304(api, db, governor):
+    create_news(api, governor)
+    etag = api.get("/api/news").headers["ETag"]
+    # Written by a CLI or another worker: nothing was published in this process
+    asyncio.run(db.news.update_many({}, {"$set": {"title": "Edited elsewhere"}}))
+    reset_state()
+    response = api.get("/api/news", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()[0]["title"] == "Edited elsewhere"
+
+
+def test_query_string_is_part_of_the_representation(api, governor):
+    create_news(api, governor)
+    create_news(api, governor, title="Second")
+    full = api.get("/api/news").headers["ETag"]
+    page = api.get("/api/news?limit=1")
+    assert page.headers["ETag"] != full
+    assert api.get("/api/news?limit=1", headers={"If-None-Match": full}).status_code == 200
+
+
+def test_home_snapshot_etag_follows_its_body(api, monkeypatch):
+    payload = {"news": [], "ministries": [], "leadership": [], "counts": {"news": 0}}
+
+    async def build():
+        return dict(payload)
+
+    monkeypatch.setattr(server, "build_home_payload", build)
+    etag = api.get("/api/home").headers["ETag"]
+    assert api.get("/api/home", headers={"If-None-Match": etag}).status_code == 304
+
+    payload["counts"] = {"news": 1}
+    server.home_snapshot.invalidate("news", "insert", "n1")
+    response = api.get("/api/home", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["counts"] == {"news": 1}
@@ -0,0 +1,67 @@
+import asyncio
+
+import jwt
+import pytest
+
+import server
+from tests.conftest import reset_state
+
+PERMISSIONS = {
+    "can_manage_ministries": False, "can_manage_news": True, "can_manage_legislation": False,
+    "can_manage_roles": False, "can_manage_leadership": False, "can_delete": False,
+}
+NEWS = {"title": "Hello", "content": "World"}
+
+
+@pytest.fixture
+def editor(api, governor, monkeypatch):
+    monkeypatch.setattr(server, "JWT_EMBED_PERMISSIONS", True)
+    role = api.post("/api/roles", json={"name": "Editor", "permissions": PERMISSIONS}, headers=governor).json()
+    token = api.post("/api/auth/register", json={"username": "editor", "access_code": role["access_code"]}).json()["access_token"]
+    return role, {"Authorization": f"Bearer {token}"}, token
+
+
+def test_token_carries_permissions_with_their_own_expiry(editor):
+    _, _, token = editor
+    claims = jwt.decode(token, options={"verify_signature": False})
+    assert claims["perms"]["can_manage_news"] is True
+    assert 0 < claims["perms_exp"] - claims["iat"] <= server.JWT_CLAIMS_TTL
+
+
+def test_local_revocation_is_immediate(api, db, governor, editor):
+    role, headers, _ = editor
+    assert api.post("/api/news", json=NEWS, headers=headers).status_code == 200
+    update = {"name": "Editor", "permissions": {**PERMISSIONS, "can_manage_news": False}}
+    assert api.put(f"/api/roles/{role['id']}", json=update, headers=governor).status_code == 200
+    assert api.post("/api/news", json=NEWS, headers=headers).status_code == 403
+
+
+def test_revocation_missed_by_this_process_expires_with_the_claims(api, db, editor, clock):
+    role, headers, _ = editor
+    # Another worker (or a restart) changed the role: nothing was revoked here
+    asyncio.run(db.roles.update_one({"id": role["id"]}, {"$set": {"permissions.can_manage_news": False}}))
+    reset_state()
+    assert api.post("/api/news", json=NEWS, headers=headers).status_code == 200
+
+    clock.now += server.JWT_CLAIMS_TTL + server.PRINCIPAL_CACHE_TTL + 1
+    assert api.post("/api/news", json=NEWS, headers=headers).status_code == 403
+
+
+def test_deleted_user_loses_access_after_claims_expire(api, db, editor, clock):
+    _, headers, _ = editor
+    asyncio.run(db.users.delete_one({"username": "editor"}))
+    reset_state()
+    clock.now += server.JWT_CLAIMS_TTL + 1
+    assert api.get("/api/auth/me", headers=headers).status_code == 401
+
+
+def test_revocations_are_dropped_once_no_claims_can_predate_them(db, clock):
+    server.invalidate_principals(user_id="u1")
+    server.invalidate_principals(role_id="r1")
+    clock.now += server.JWT_CLAIMS_TTL / 2
+    server.invalidate_principals(user_id="u1")
+    assert list(server.principal_revocations) == ["role:r1", "user:u1"]
+
+    clock.now += server.JWT_CLAIMS_TTL / 2
+    server.invalidate_principals(user_id="u2")
+    assert list(server.principal_revocations) == ["user:u1", "user:u2"]
@@ -0,0 +1,71 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import server
+
+ADDRESS = ("db", 27017)
+
+
+@pytest.fixture
+def monitor(monkeypatch):
+    monitor = server.PoolMonitor()
+    monkeypatch.setattr(server, "pool_monitor", monitor)
+    return monitor
+
+
+def event():
+    return SimpleNamespace(address=ADDRESS)
+
+
+def test_pool_monitor_tracks_checkouts(monitor):
+    for _ in range(3):
+        monitor.connection_created(event())
+        monitor.connection_check_out_started(event())
+        monitor.connection_checked_out(event())
+    monitor.connection_checked_in(event())
+    monitor.connection_check_out_started(event())
+    pool = monitor.snapshot()
+    assert pool["pools"]["db:27017"] == {"open": 3, "checked_out": 2, "waiting": 1, "checkouts": 3,
+                                         "checkout_failures": 0, "cleared": 0}
+    assert pool["utilization"] == round(2 / server.MONGO_MAX_POOL_SIZE, 3)
+
+
+def test_live_never_touches_the_database(api, monkeypatch):
+    monkeypatch.setattr(server, "db", None)
+    assert api.get("/api/health/live").json() == {"status": "ok"}
+
+
+def test_ready_when_ping_succeeds(api, monitor):
+    response = api.get("/api/health/ready")
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "ready"
+    assert response.headers["Cache-Control"] == "no-store"
+
+
+def test_not_ready_without_database(api, monkeypatch):
+    monkeypatch.setattr(server, "db", None)
+    assert api.get("/api/health/ready").status_code == 503
+
+
+def test_not_ready_when_ping_is_slow(api, db, monitor, monkeypatch):
+    async def slow_ping(*args, **kwargs):
+        await asyncio.sleep(1)
+
+    monkeypatch.setattr(server, "HEALTH_PING_TIMEOUT_MS", 10)
+    monkeypatch.setattr(db, "command", slow_ping)
+    response = api.get("/api/health/ready")
+    assert response.status_code == 503
+    assert "ping exceeded" in response.json()["reason"]
+
+
+def test_not_ready_when_the_pool_is_saturated(api, monitor, monkeypatch):
+    monkeypatch.setattr(server, "MONGO_MAX_POOL_SIZE", 2)
+    for _ in range(2):
+        monitor.connection_check_out_started(event())
+        monitor.connection_checked_out(event())
+    monitor.connection_check_out_started(event())
+    response = api.get("/api/health/ready")
+    assert response.status_code == 503
+    assert response.json()["reason"] == "connection pool saturated"
@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+import server
+
+
+@pytest.fixture
+def home_pipeline(monkeypatch):
+    # mongomock has no $substrCP: the teaser is the whole content here
+    original = server.home_news_pipeline
+
+    def pipeline():
+        stages = original()
+        stages[-1]["$project"]["teaser"] = "$content"
+        return stages
+
+    monkeypatch.setattr(server, "home_news_pipeline", pipeline)
+
+
+def seed(db):
+    news = [{"id": f"n{index}", "title": f"News {index}", "content": f"Body {index}", "is_archive": index == 4,
+             "created_at": f"2024-01-0{index + 1}T00:00:00+00:00"} for index in range(5)]
+    leaders = [{"id": f"l{order}", "name": "N", "surname": "S", "position": "P", "appointed_date": "2024-01-01",
+                "order": order, "passport_number": None} for order in (2, 0, 1)]
+    ministries = [{"id": f"m{index}", "name": f"Ministry {index}", "description": "secret",
+                   "created_at": f"2024-01-0{index + 1}"} for index in range(6)]
+
+    async def insert():
+        await db.news.insert_many(news)
+        await db.leadership.insert_many(leaders)
+        await db.ministries.insert_many(ministries)
+        await db.amendments.insert_one({"id": "a1", "title": "A", "content": "", "created_at": "2024-01-01"})
+
+    asyncio.run(insert())
+
+
+def test_home_returns_every_section_in_one_response(api, db, home_pipeline):
+    seed(db)
+    body = api.get("/api/home").json()
+    assert [item["id"] for item in body["news"]] == ["n3", "n2", "n1"]
+    assert body["news"][0]["teaser"] == "Body 3"
+    assert [item["id"] for item in body["ministries"]] == ["m0", "m1", "m2", "m3"]
+    assert "description" not in body["ministries"][0]
+    assert [item["id"] for item in body["leadership"]] == ["l0", "l1", "l2"]
+    assert body["counts"] == {"news": 4, "ministries": 6, "leadership": 3, "amendments": 1}
+
+
+def test_home_follows_writes(api, db, governor, home_pipeline):
+    seed(db)
+    api.get("/api/home")
+    response = api.post("/api/news", json={"title": "Fresh", "content": "Now"}, headers=governor)
+    assert response.status_code == 200
+    body = api.get("/api/home").json()
+    assert body["news"][0]["title"] == "Fresh"
+    assert body["counts"]["news"] == 5
+
+
+def test_concurrent_requests_share_one_build(db, monkeypatch):
+    builds = []
+
+    async def build():
+        builds.append(1)
+        await asyncio.sleep(0.01)
+        return server.HomeResponse().model_dump()
+
+    monkeypatch.setattr(server, "build_home_payload", build)
+
+    async def scenario():
+        entries = await asyncio.gather(*(server.home_snapshot.get() for _ in range(5)))
+        assert len({entry.body for entry in entries}) == 1
+
+    asyncio.run(scenario())
+    assert len(builds) == 1
+
+
+def test_burst_of_changes_coalesces_into_one_rebuild(db, monkeypatch):
+    builds = []
+
+    async def build():
+        builds.append(1)
+        await asyncio.sleep(0.01)
+        return server.HomeResponse().model_dump()
+
+    monkeypatch.setattr(server, "build_home_payload", build)
+    snapshot = server.home_snapshot
+
+    async def scenario():
+        for index in range(20):
+            snapshot.invalidate("news", "insert", f"n{index}")
+        assert len(snapshot.tasks) == 1
+        await asyncio.sleep(0)
+        # A change during the rebuild makes the same task build once more
+        snapshot.invalidate("news", "update", "n0")
+        await asyncio.gather(*snapshot.tasks)
+        assert not snapshot.tasks and snapshot.fresh() is not None
+
+    asyncio.run(scenario())
+    assert len(builds) == 2
@@ -0,0 +1,55 @@
+import asyncio
+
+import server
+
+
+def create_news(api, headers):
+    response = api.post("/api/news", json={"title": "Budget", "content": "Budget approved"}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def update_news(api, headers, news_id, if_match):
+    return api.put(f"/api/news/{news_id}", json={"title": "Budget v2", "content": "Amended"},
+                   headers={**headers, "If-Match": if_match})
+
+
+def test_item_etag_is_the_version_accepted_by_if_match(api, governor):
+    news = create_news(api, governor)
+    etag = api.get(f"/api/news/{news['id']}").headers["ETag"]
+    assert etag == '"1"'
+
+    response = update_news(api, governor, news["id"], etag)
+    assert response.status_code == 200
+    assert response.json()["version"] == 2
+
+    fresh = api.get(f"/api/news/{news['id']}")
+    assert fresh.headers["ETag"] == '"2"'
+    assert api.get(f"/api/news/{news['id']}", headers={"If-None-Match": '"2"'}).status_code == 304
+
+
+def test_stale_if_match_is_rejected(api, governor):
+    news = create_news(api, governor)
+    assert update_news(api, governor, news["id"], '"1"').status_code == 200
+    assert update_news(api, governor, news["id"], '"1"').status_code == 412
+
+
+def test_weak_etag_is_accepted(api, governor):
+    news = create_news(api, governor)
+    assert update_news(api, governor, news["id"], 'W/"1"').status_code == 200
+
+
+def test_foreign_etag_fails_the_precondition(api, governor):
+    news = create_news(api, governor)
+    list_etag = api.get("/api/news").headers["ETag"]
+    assert update_news(api, governor, news["id"], list_etag).status_code == 412
+    assert update_news(api, governor, "missing", list_etag).status_code == 404
+
+
+def test_maintenance_writes_bump_the_version(api, db, governor):
+    news = create_news(api, governor)
+    asyncio.run(db.news.update_one({"id": news["id"]}, {"$unset": {"is_archive": ""}}))
+    asyncio.run(server.normalize_documents())
+    doc = asyncio.run(db.news.find_one({"id": news["id"]}))
+    assert doc["is_archive"] is False
+    assert doc["version"] == 2
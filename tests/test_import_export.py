@@ -0,0 +1,66 @@
+import json
+
+import server
+
+PERMISSIONS = {
+    "can_manage_ministries": False, "can_manage_news": True, "can_manage_legislation": False,
+    "can_manage_roles": False, "can_manage_leadership": False, "can_delete": False,
+}
+
+
+def ndjson(*rows):
+    return "\n".join(row if isinstance(row, str) else json.dumps(row) for row in rows).encode()
+
+
+def import_rows(api, headers, collection, body, **params):
+    return api.post(f"/api/admin/import/{collection}", content=body, params=params,
+                    headers={**headers, "Content-Type": "application/x-ndjson"})
+
+
+def test_import_then_export_round_trips(api, governor):
+    body = ndjson({"id": "n1", "title": "One", "content": "First", "created_at": "2024-01-01T00:00:00+00:00"},
+                  {"id": "n2", "title": "Two", "content": "Second"})
+    report = import_rows(api, governor, "news", body).json()
+    assert (report["rows"], report["inserted"], report["failed"]) == (2, 2, 0)
+
+    exported = api.get("/api/admin/export/news", headers=governor)
+    rows = [json.loads(line) for line in exported.text.splitlines()]
+    assert {row["id"] for row in rows} == {"n1", "n2"}
+    assert all(row["version"] == 1 for row in rows)
+
+    report = import_rows(api, governor, "news", body).json()
+    assert (report["inserted"], report["updated"]) == (0, 2)
+
+
+def test_invalid_created_at_is_rejected_per_row(api, governor):
+    body = ndjson({"id": "n1", "title": "One", "content": "x", "created_at": 1700000000},
+                  {"id": "n2", "title": "Two", "content": "x", "created_at": "yesterday"},
+                  {"id": "n3", "title": "Three", "content": "x", "created_at": "2024-05-01T10:00:00Z"})
+    report = import_rows(api, governor, "news", body).json()
+    assert report["inserted"] == 1
+    assert [(error["line"], error["error"]) for error in report["errors"]] == [
+        (1, "created_at must be an ISO 8601 string"),
+        (2, "created_at must be an ISO 8601 string"),
+    ]
+
+
+def test_aborted_import_still_invalidates_caches(api, governor, monkeypatch):
+    monkeypatch.setattr(server, "IMPORT_BATCH_SIZE", 1)
+    monkeypatch.setattr(server, "IMPORT_MAX_LINE_BYTES", 200)
+    assert api.get("/api/news").json() == []
+
+    body = ndjson({"id": "n1", "title": "One", "content": "First"}, "x" * 500)
+    assert import_rows(api, governor, "news", body).status_code == 413
+    assert [news["id"] for news in api.get("/api/news").json()] == ["n1"]
+
+
+def test_role_import_revokes_cached_permissions(api, governor):
+    role = api.post("/api/roles", json={"name": "Editor", "permissions": PERMISSIONS}, headers=governor).json()
+    registered = api.post("/api/auth/register", json={"username": "editor", "access_code": role["access_code"]})
+    editor = {"Authorization": f"Bearer {registered.json()['access_token']}"}
+    news = {"title": "Hello", "content": "World"}
+    assert api.post("/api/news", json=news, headers=editor).status_code == 200
+
+    revoked = {"id": role["id"], "name": "Editor", "permissions": {**PERMISSIONS, "can_manage_news": False}}
+    assert import_rows(api, governor, "roles", ndjson(revoked)).json()["updated"] == 1
+    assert api.post("/api/news", json=news, headers=editor).status_code == 403
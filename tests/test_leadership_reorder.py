@@ -0,0 +1,35 @@
+import server
+
+
+def create_leader(api, headers, name, order=0):
+    response = api.post("/api/leadership", headers=headers, json={
+        "name": name, "surname": "S", "position": "Minister", "appointed_date": "2024-01-01", "order": order
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def orders(api):
+    return {leader["id"]: leader["order"] for leader in api.get("/api/leadership").json()}
+
+
+def test_reorder_sets_order_to_list_position(api, governor):
+    ids = [create_leader(api, governor, name) for name in ("A", "B", "C")]
+    response = api.patch("/api/leadership/reorder", headers=governor, json={"ids": ids[::-1]})
+    assert response.status_code == 200, response.text
+    assert orders(api) == {ids[2]: 0, ids[1]: 1, ids[0]: 2}
+
+
+def test_partial_list_is_rejected(api, governor):
+    ids = [create_leader(api, governor, name, order) for order, name in enumerate("ABC")]
+    response = api.patch("/api/leadership/reorder", headers=governor, json={"ids": [ids[2], ids[0]]})
+    assert response.status_code == 400
+    assert orders(api) == {ids[0]: 0, ids[1]: 1, ids[2]: 2}
+
+
+def test_duplicate_or_unknown_ids_are_rejected(api, governor):
+    ids = [create_leader(api, governor, name) for name in ("A", "B")]
+    duplicated = api.patch("/api/leadership/reorder", headers=governor, json={"ids": [ids[0], ids[1], ids[0]]})
+    unknown = api.patch("/api/leadership/reorder", headers=governor, json={"ids": [ids[0], "missing"]})
+    assert duplicated.status_code == 400
+    assert unknown.status_code == 400
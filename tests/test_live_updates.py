@@ -0,0 +1,86 @@
+import asyncio
+import json
+
+import server
+
+
+def events():
+    parsed = []
+    for seq, collection, payload in server.update_broadcaster.ring:
+        fields = dict(line.split(": ", 1) for line in payload.decode().strip().split("\n"))
+        parsed.append((fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def create_news(api, headers, title):
+    response = api.post("/api/news", json={"title": title, "content": "text"}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def test_delete_is_broadcast_with_its_id(api, governor):
+    news_id = create_news(api, governor, "Budget")
+    assert api.delete(f"/api/news/{news_id}", headers=governor).status_code == 200
+    assert events()[-1] == ("news", {"op": "delete", "id": news_id})
+
+
+def test_batch_publishes_one_event_per_document(api, governor):
+    first = create_news(api, governor, "First")
+    second = create_news(api, governor, "Second")
+    before = len(events())
+    response = api.post("/api/news/batch", headers=governor, json={"operations": [
+        {"op": "archive", "id": first},
+        {"op": "delete", "id": second},
+        {"op": "delete", "id": "missing"},
+    ]})
+    assert response.status_code == 200, response.text
+    assert [result["status"] for result in response.json()["results"]] == ["ok", "ok", "not_found"]
+    assert events()[before:] == [
+        ("news", {"op": "update", "id": first}),
+        ("news", {"op": "delete", "id": second}),
+    ]
+
+
+def test_stream_delete_reaches_clients_as_an_id():
+    bus = server.ChangeStreamBus("test", server.LIVE_COLLECTIONS)
+    bus.normalize({"operationType": "insert", "ns": {"coll": "news"}, "documentKey": {"_id": 7},
+                   "fullDocument": {"id": "n7"}})
+    event = bus.normalize({"operationType": "delete", "ns": {"coll": "news"}, "documentKey": {"_id": 7}})
+    server.update_broadcaster.publish(*event)
+    assert events()[-1] == ("news", {"op": "delete", "id": "n7"})
+
+
+def test_replay_after_last_event_id(db):
+    broadcaster = server.update_broadcaster
+    broadcaster.publish("news", "insert", "a")
+    last = f"{server.BOOT_ID}-{broadcaster.seq}"
+    broadcaster.publish("amendments", "update", "b")
+    broadcaster.publish("news", "delete", "a")
+
+    replayed = broadcaster.replay(last, {"news"})
+    assert len(replayed) == 1 and b'"op": "delete"' in replayed[0]
+    assert broadcaster.replay(f"other-{broadcaster.seq}", {"news"}) is None
+    assert broadcaster.replay(f"{server.BOOT_ID}-{broadcaster.seq + 5}", {"news"}) is None
+
+
+def test_subscription_lives_only_while_the_stream_is_iterated(db):
+    broadcaster = server.update_broadcaster
+    broadcaster.publish("news", "insert", "a")
+    last = f"{server.BOOT_ID}-{broadcaster.seq}"
+    broadcaster.publish("news", "update", "a")
+
+    async def scenario():
+        # A client that disconnects before the body starts never subscribes
+        abandoned = await server.stream_updates(None, collections=None, last_event_id=None)
+        assert not broadcaster.clients
+        del abandoned
+
+        response = await server.stream_updates(None, collections="news", last_event_id=last)
+        body = response.body_iterator
+        assert (await body.__anext__()).startswith(b"retry:")
+        assert len(broadcaster.clients) == 1
+        assert b'"op": "update"' in await body.__anext__()
+        await body.aclose()
+        assert not broadcaster.clients
+
+    asyncio.run(scenario())
@@ -0,0 +1,116 @@
+import asyncio
+import base64
+import hashlib
+
+import server
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 32
+DATA_URL = "data:image/png;base64," + base64.b64encode(PNG).decode()
+DIGEST = hashlib.sha256(PNG).hexdigest()
+
+
+def test_data_url_is_stored_once_by_content_hash(db):
+    async def scenario():
+        first = await server.externalize_media(DATA_URL)
+        second = await server.externalize_media(DATA_URL)
+        return first, second, await db.media.count_documents({})
+
+    first, second, registered = asyncio.run(scenario())
+    assert first == second == f"{server.MEDIA_URL_PREFIX}{DIGEST}"
+    assert server.media_path(DIGEST).read_bytes() == PNG
+    assert registered == 1
+
+
+def test_plain_urls_are_left_alone(db):
+    assert asyncio.run(server.externalize_media("https://example.org/a.png")) == "https://example.org/a.png"
+    assert asyncio.run(server.externalize_media("data:image/png,not-base64")) == "data:image/png,not-base64"
+
+
+def test_migration_moves_nested_images_and_bumps_version(db):
+    asyncio.run(db.ministries.insert_one({
+        "id": "m1", "name": "Finance", "logo": DATA_URL, "version": 2,
+        "minister": {"photo": DATA_URL, "deputies": [{"photo": DATA_URL}, {"photo": None}]},
+    }))
+    assert asyncio.run(server.migrate_inline_media())["ministries"] == 1
+
+    doc = asyncio.run(db.ministries.find_one({"id": "m1"}))
+    url = f"{server.MEDIA_URL_PREFIX}{DIGEST}"
+    assert doc["logo"] == doc["minister"]["photo"] == doc["minister"]["deputies"][0]["photo"] == url
+    assert doc["minister"]["deputies"][1]["photo"] is None
+    assert doc["version"] == 3
+    # A second run finds nothing left to move
+    assert asyncio.run(server.migrate_inline_media())["ministries"] == 0
+
+
+def test_media_is_served_immutable_with_etag(api):
+    asyncio.run(server.store_blob(PNG, "image/png"))
+    response = api.get(f"/api/media/{DIGEST}")
+    assert response.status_code == 200
+    assert response.content == PNG
+    assert response.headers["content-type"] == "image/png"
+    assert response.headers["Cache-Control"] == server.MEDIA_CACHE_CONTROL
+
+    again = api.get(f"/api/media/{DIGEST}", headers={"If-None-Match": response.headers["ETag"]})
+    assert again.status_code == 304
+
+
+def test_unknown_or_malformed_digest_is_404(api):
+    assert api.get("/api/media/not-a-digest").status_code == 404
+    assert api.get(f"/api/media/{'0' * 64}").status_code == 404
+
+
+HTML = b"<html><script>alert(document.cookie)</script></html>"
+HTML_DATA_URL = "data:text/html;base64," + base64.b64encode(HTML).decode()
+
+
+def test_declared_type_is_ignored_for_images(db):
+    url = asyncio.run(server.externalize_media("data:text/html;base64," + base64.b64encode(PNG).decode()))
+    assert url.endswith(DIGEST)
+    assert asyncio.run(db.media.find_one({"id": DIGEST}))["content_type"] == "image/png"
+
+
+def test_migrated_non_image_is_served_as_a_download(api, db):
+    asyncio.run(db.news.insert_one({"id": "n1", "title": "T", "content": "", "image": HTML_DATA_URL,
+                                    "created_at": "2024-01-01T00:00:00+00:00"}))
+    asyncio.run(server.migrate_inline_media())
+    url = asyncio.run(db.news.find_one({"id": "n1"}))["image"]
+    response = api.get(url)
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+
+
+def test_blob_registered_with_an_unsafe_type_is_not_served_as_it(api, db):
+    digest = hashlib.sha256(HTML).hexdigest()
+    server.media_path(digest).parent.mkdir(parents=True, exist_ok=True)
+    server.media_path(digest).write_bytes(HTML)
+    asyncio.run(db.media.insert_one({"id": digest, "content_type": "text/html"}))
+    response = api.get(f"/api/media/{digest}")
+    assert response.headers["content-type"] == "application/octet-stream"
+    assert response.headers["X-Content-Type-Options"] == "nosniff"
+
+
+def test_writes_externalize_images_and_reject_other_inline_data(api, governor):
+    created = api.post("/api/news", json={"title": "T", "content": "", "image": DATA_URL}, headers=governor)
+    assert created.status_code == 200, created.text
+    assert created.json()["image"] == f"{server.MEDIA_URL_PREFIX}{DIGEST}"
+
+    news_id = created.json()["id"]
+    rejected = api.put(f"/api/news/{news_id}", json={"title": "T", "content": "", "image": HTML_DATA_URL}, headers=governor)
+    assert rejected.status_code == 400
+    ministry = api.post("/api/ministries", headers=governor, json={"name": "Finance", "description": "", "logo": HTML_DATA_URL})
+    assert ministry.status_code == 400
+
+    batch = api.post("/api/news/batch", headers=governor, json={"operations": [
+        {"op": "update", "id": news_id, "data": {"title": "T", "content": "", "image": HTML_DATA_URL}},
+    ]})
+    assert batch.json()["results"][0]["status"] == "invalid"
+
+
+def test_import_rejects_non_image_inline_data_per_row(api, governor):
+    body = "\n".join([
+        '{"id": "n1", "title": "ok", "content": "", "image": "%s"}' % DATA_URL,
+        '{"id": "n2", "title": "bad", "content": "", "image": "%s"}' % HTML_DATA_URL,
+    ]).encode()
+    report = api.post("/api/admin/import/news", content=body,
+                      headers={**governor, "Content-Type": "application/x-ndjson"}).json()
+    assert (report["inserted"], report["failed"]) == (1, 1)
@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+from prometheus_client import REGISTRY
+
+import server
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_requests_are_labelled_by_route_template(api):
+    labels = {"method": "GET", "route": "/api/news/{news_id}", "status": "404"}
+    before = sample("http_requests_total", **labels)
+    api.get("/api/news/first-missing")
+    api.get("/api/news/second-missing")
+    assert sample("http_requests_total", **labels) == before + 2
+
+    exposition = api.get("/metrics").text
+    assert 'route="/api/news/{news_id}"' in exposition
+    assert "first-missing" not in exposition
+
+
+def test_latency_and_size_histograms_are_observed(api):
+    labels = {"method": "GET", "route": "/api/health/live"}
+    count = sample("http_request_duration_seconds_count", **labels)
+    size = sample("http_response_bytes_sum", **labels)
+    body = api.get("/api/health/live").content
+    assert sample("http_request_duration_seconds_count", **labels) == count + 1
+    assert sample("http_response_bytes_sum", **labels) == size + len(body)
+
+
+def test_snapshot_gauges_are_exported(api):
+    exposition = api.get("/metrics").text
+    assert "password_hash_pending" in exposition
+    assert "response_cache_hits" in exposition
+
+
+def test_metrics_token(api, monkeypatch):
+    monkeypatch.setattr(server, "METRICS_TOKEN", "scrape-me")
+    assert api.get("/metrics").status_code == 401
+    assert api.get("/metrics", headers={"Authorization": "Bearer scrape-me"}).status_code == 200
+
+
+def test_mongo_commands_are_timed_by_collection():
+    listener = server.CommandMetrics()
+    labels = {"collection": "news", "command": "find"}
+    count = sample("mongo_command_duration_seconds_count", **labels)
+    failures = sample("mongo_command_failures_total", **labels)
+    started = SimpleNamespace(command={"find": "news"}, command_name="find", request_id=1, connection_id=("db", 1))
+    listener.started(started)
+    listener.failed(SimpleNamespace(command_name="find", request_id=1, connection_id=("db", 1), duration_micros=1500))
+    assert sample("mongo_command_duration_seconds_count", **labels) == count + 1
+    assert sample("mongo_command_failures_total", **labels) == failures + 1
+    assert not listener.pending
+
+
+def test_unanswered_commands_do_not_accumulate():
+    listener = server.CommandMetrics(limit=3)
+    for request_id in range(5):
+        listener.started(SimpleNamespace(command={"find": "news"}, command_name="find", request_id=request_id,
+                                         connection_id=("db", 1)))
+    assert [key[0] for key in listener.pending] == [2, 3, 4]
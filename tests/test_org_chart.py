@@ -0,0 +1,55 @@
+import asyncio
+
+import server
+
+# mongomock resolves localField only on scalar paths, so deputies (an array) are not checked here;
+# the full chart uses $facet and a pipeline $lookup, which mongomock does not run either
+MINISTRY = {
+    "id": "m1", "name": "Finance", "created_at": "2024-01-01", "description": "not in the chart",
+    "minister": {"name": "Ann", "position": "Minister", "role_id": "r1",
+                 "deputies": [{"name": "Bob", "position": "Deputy", "role_id": None}]},
+}
+
+
+def seed(db):
+    async def insert():
+        await db.roles.insert_one({"id": "r1", "name": "Minister of Finance", "access_code": "SECRET",
+                                   "permissions": {"can_delete": True}, "created_at": "2024-01-01",
+                                   "created_by": "governor"})
+        await db.ministries.insert_one(dict(MINISTRY))
+        await db.ministries.insert_one({"id": "m2", "name": "Vacant", "created_at": "2024-01-02"})
+
+    asyncio.run(insert())
+
+
+def test_ministry_chart_resolves_the_minister_role(api, db):
+    seed(db)
+    chart = api.get("/api/org-chart/m1").json()
+    assert chart["minister"]["role"] == {"id": "r1", "name": "Minister of Finance"}
+    assert chart["minister"]["deputies"] == [{"name": "Bob", "position": "Deputy", "role": None}]
+    assert chart["staff"] == []
+    assert "description" not in chart
+    assert "SECRET" not in api.get("/api/org-chart/m1").text
+
+
+def test_ministry_without_minister(api, db):
+    seed(db)
+    assert api.get("/api/org-chart/m2").json()["minister"] is None
+    assert api.get("/api/org-chart/missing").status_code == 404
+
+
+def test_role_rename_reaches_the_cached_chart(api, db, governor):
+    seed(db)
+    assert api.get("/api/org-chart/m1").json()["minister"]["role"]["name"] == "Minister of Finance"
+    response = api.put("/api/roles/r1", json={"name": "Treasurer", "permissions": {}}, headers=governor)
+    assert response.status_code == 200, response.text
+    assert api.get("/api/org-chart/m1").json()["minister"]["role"]["name"] == "Treasurer"
+
+
+def test_full_chart_sorts_before_facet_and_loads_leadership_in_order():
+    pipeline = server.org_chart_pipeline()
+    assert pipeline[0] == {"$sort": {"created_at": 1, "id": 1}}
+    assert "$facet" in pipeline[1]
+    leadership = pipeline[2]["$lookup"]
+    assert leadership["from"] == "leadership"
+    assert leadership["pipeline"][0] == {"$sort": {"order": 1, "id": 1}}
@@ -0,0 +1,69 @@
+import asyncio
+import re
+
+import server
+
+
+def seed_news(db, count, created_at="2024-01-01T00:00:00+00:00"):
+    docs = [{"id": f"n{index:02d}", "title": f"T{index}", "content": "body", "is_archive": False,
+             "created_at": created_at, "version": 0} for index in range(count)]
+    asyncio.run(db.news.insert_many(docs))
+
+
+def walk(api, path, limit):
+    ids, after = [], None
+    while True:
+        params = {"limit": limit, **({"after": after} if after else {})}
+        response = api.get(path, params=params)
+        assert response.status_code == 200, response.text
+        ids += [doc["id"] for doc in response.json()]
+        after = response.headers.get("X-Next-Cursor")
+        if not after:
+            return ids
+
+
+def test_cursor_walks_every_document_once_even_with_equal_sort_keys(api, db):
+    seed_news(db, 7)
+    ids = walk(api, "/api/news", 3)
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == len(set(ids)) == 7
+
+
+def test_cursor_survives_inserts_before_it(api, db):
+    seed_news(db, 4)
+    first = api.get("/api/news", params={"limit": 2})
+    after = first.headers["X-Next-Cursor"]
+    asyncio.run(db.news.insert_one({"id": "n99", "title": "new", "content": "", "is_archive": False,
+                                    "created_at": "2025-01-01T00:00:00+00:00"}))
+    rest = api.get("/api/news", params={"limit": 10, "after": after}).json()
+    assert [doc["id"] for doc in rest] == ["n01", "n00"]
+
+
+def test_last_page_has_no_cursor(api, db):
+    seed_news(db, 2)
+    response = api.get("/api/news", params={"limit": 2})
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_fields_limit_the_returned_keys(api, db):
+    seed_news(db, 2)
+    docs = api.get("/api/news", params={"fields": "title"}).json()
+    assert all(set(doc) <= {"id", "title", "created_at"} and "content" not in doc for doc in docs)
+
+
+def test_bad_fields_and_cursors_are_rejected(api, db):
+    assert api.get("/api/news", params={"fields": "password"}).status_code == 400
+    assert api.get("/api/news", params={"after": "no-separator"}).status_code == 400
+    assert api.get("/api/news", params={"after": "2024-01-01T00:00:00+00:00,n01"}).status_code == 400
+    assert api.get("/api/leadership", params={"after": server.encode_cursor("first", "l1")}).status_code == 400
+
+
+def test_cursor_is_opaque_and_url_safe(api, db):
+    seed_news(db, 3)
+    after = api.get("/api/news", params={"limit": 1}).headers["X-Next-Cursor"]
+    assert re.fullmatch(r"[A-Za-z0-9_-]+", after)
+    assert server.parse_cursor(after) == ("2024-01-01T00:00:00+00:00", "n02")
+    # The cursor goes into a query string as is, without encoding "+"
+    response = api.get(f"/api/news?limit=5&after={after}")
+    assert [doc["id"] for doc in response.json()] == ["n01", "n00"]
+    assert api.get("/api/news", params={"limit": server.LIST_MAX_LIMIT + 1}).status_code == 422
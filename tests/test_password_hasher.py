@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+import server
+
+
+def test_hash_and_verify_run_off_the_event_loop(db):
+    loop_thread = threading.get_ident()
+    threads = []
+
+    def record(value):
+        threads.append(threading.get_ident())
+        return value
+
+    hasher = server.PasswordHasher(workers=1, queue_limit=4)
+
+    async def scenario():
+        assert await hasher.run(record, "ok") == "ok"
+
+    asyncio.run(scenario())
+    hasher.shutdown()
+    assert threads and threads[0] != loop_thread
+    assert hasher.stats["completed"] == 1
+
+
+def test_bcrypt_round_trip(db):
+    async def scenario():
+        hashed = await server.hash_password("secret-pw")
+        return await server.verify_password("secret-pw", hashed), await server.verify_password("wrong", hashed)
+
+    assert asyncio.run(scenario()) == (True, False)
+
+
+def test_full_queue_is_rejected_with_retry_after(db):
+    release = threading.Event()
+    hasher = server.PasswordHasher(workers=1, queue_limit=1)
+
+    async def scenario():
+        busy = asyncio.get_running_loop().create_task(hasher.run(release.wait))
+        await asyncio.sleep(0)
+        with pytest.raises(HTTPException) as error:
+            await hasher.run(lambda: None)
+        release.set()
+        await busy
+        return error.value
+
+    error = asyncio.run(scenario())
+    hasher.shutdown()
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == str(server.PASSWORD_HASH_RETRY_AFTER)
+    assert hasher.stats["rejected"] == 1
+    assert hasher.pending == 0
+
+
+def test_inline_mode_without_workers(db):
+    hasher = server.PasswordHasher(workers=0, queue_limit=1)
+    assert asyncio.run(hasher.run(threading.get_ident)) == threading.get_ident()
+
+
+def test_hasher_recreates_its_pool_after_shutdown(db):
+    hasher = server.PasswordHasher(workers=1, queue_limit=4)
+
+    async def scenario():
+        return await hasher.run(str.upper, "ok")
+
+    assert asyncio.run(scenario()) == "OK"
+    hasher.shutdown()
+    assert hasher.executor is None
+    assert asyncio.run(scenario()) == "OK"
+    hasher.shutdown()
+    assert hasher.stats["completed"] == 2
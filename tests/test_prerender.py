@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+import server
+
+TEMPLATE = ('<html><head><title>App</title><meta name="description" content="SPA"/></head>'
+            '<body><div id="root"></div></body></html>')
+
+
+@pytest.fixture
+def template(tmp_path, monkeypatch, db):
+    (tmp_path / "index.html").write_text(TEMPLATE)
+    assets = server.StaticAssets(tmp_path)
+    assets.load()
+    monkeypatch.setattr(server, "static_assets", assets)
+    monkeypatch.setattr(server, "PUBLIC_BASE_URL", "https://gov.example")
+
+
+def create_news(api, headers, title, content):
+    response = api.post("/api/news", json={"title": title, "content": content, "image": "/api/media/abc"},
+                        headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def test_news_page_is_rendered_with_content_and_meta(api, governor, template):
+    news_id = create_news(api, governor, "Budget <2025>", "First line\nSecond </script> line")
+    response = api.get(f"/news/{news_id}")
+    html = response.text
+    assert response.headers["content-type"].startswith("text/html")
+    assert f"<title>Budget &lt;2025&gt; — {server.SITE_NAME}</title>" in html
+    assert '<meta property="og:type" content="article"/>' in html
+    assert '<meta property="og:image" content="https://gov.example/api/media/abc"/>' in html
+    assert f'<link rel="canonical" href="https://gov.example/news/{news_id}"/>' in html
+    assert "<p>First line</p><p>Second &lt;/script&gt; line</p>" in html
+    # The inlined state cannot close the script tag early
+    assert html.count("</script>") == 1
+    assert html.count('name="description"') == 1
+
+
+def test_snapshot_is_reused_and_revalidated(api, governor, template):
+    news_id = create_news(api, governor, "Budget", "Text")
+    first = api.get(f"/news/{news_id}")
+    api.get(f"/news/{news_id}")
+    assert server.page_snapshots.stats["builds"] == 1
+    assert api.get(f"/news/{news_id}", headers={"If-None-Match": first.headers["ETag"]}).status_code == 304
+
+
+def test_write_replaces_the_affected_pages_only(api, governor, template):
+    news_id = create_news(api, governor, "Budget", "Text")
+    api.get(f"/news/{news_id}")
+    api.get("/news")
+    api.get("/ministries")
+    response = api.put(f"/api/news/{news_id}", json={"title": "Budget revised", "content": "Text"}, headers=governor)
+    assert response.status_code == 200, response.text
+    assert "ministries" in server.page_snapshots.pages
+    assert "Budget revised" in api.get(f"/news/{news_id}").text
+    assert "Budget revised" in api.get("/news").text
+
+
+def test_unknown_item_falls_back_to_the_spa(api, template):
+    response = api.get("/news/missing")
+    assert response.status_code == 200
+    assert response.text == TEMPLATE
+    assert server.page_snapshots.stats["not_found"] == 1
+
+
+def test_inline_json_escapes_html_and_line_separators():
+    assert server.inline_json({"a": "</script>&\u2028"}) == '{"a":"\\u003c/script\\u003e\\u0026\\u2028"}'
+
+
+def test_truncated_lists_are_left_for_the_client_to_load(db, monkeypatch):
+    monkeypatch.setattr(server, "LIST_DEFAULT_LIMIT", 1)
+    docs = [{"id": f"m{index}", "name": f"Ministry {index}", "description": "", "created_at": f"2024-01-0{index + 1}"}
+            for index in range(2)]
+    asyncio.run(db.ministries.insert_many(docs))
+    page = asyncio.run(server.render_ministries())
+    assert "Ministry 0" in page["html"]
+    assert page["state"] == {}
+    monkeypatch.setattr(server, "LIST_DEFAULT_LIMIT", 2)
+    assert [item["id"] for item in asyncio.run(server.render_ministries())["state"]["/ministries"]] == ["m0", "m1"]
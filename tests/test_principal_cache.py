@@ -0,0 +1,54 @@
+import pytest
+
+import server
+
+PERMISSIONS = {
+    "can_manage_ministries": False, "can_manage_news": True, "can_manage_legislation": False,
+    "can_manage_roles": False, "can_manage_leadership": False, "can_delete": False,
+}
+NEWS = {"title": "Hello", "content": "World"}
+
+
+@pytest.fixture
+def editor(api, governor):
+    role = api.post("/api/roles", json={"name": "Editor", "permissions": PERMISSIONS}, headers=governor).json()
+    token = api.post("/api/auth/register", json={"username": "editor", "access_code": role["access_code"]}).json()["access_token"]
+    return role, {"Authorization": f"Bearer {token}"}
+
+
+def test_repeated_requests_resolve_the_principal_once(api, editor):
+    _, headers = editor
+    server.principal_cache.clear()
+    for _ in range(3):
+        assert api.post("/api/news", json=NEWS, headers=headers).status_code == 200
+    stats = server.principal_cache.snapshot()
+    assert stats["size"] == 1
+    assert stats["hits"] >= 2
+
+
+def test_role_change_applies_to_the_next_request(api, governor, editor):
+    role, headers = editor
+    assert api.post("/api/news", json=NEWS, headers=headers).status_code == 200
+    revoked = {**PERMISSIONS, "can_manage_news": False}
+    response = api.put(f"/api/roles/{role['id']}", json={"name": "Editor", "permissions": revoked}, headers=governor)
+    assert response.status_code == 200, response.text
+    assert api.post("/api/news", json=NEWS, headers=headers).status_code == 403
+
+
+def test_deleted_user_is_rejected_at_once(api, db, governor, editor):
+    _, headers = editor
+    assert api.post("/api/news", json=NEWS, headers=headers).status_code == 200
+    user = next(user for user in api.get("/api/users", headers=governor).json() if user["username"] == "editor")
+    assert api.delete(f"/api/users/{user['id']}", headers=governor).status_code == 200
+    assert api.post("/api/news", json=NEWS, headers=headers).status_code == 401
+
+
+def test_cache_entries_expire(clock):
+    cache = server.TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    clock.now += 11
+    assert cache.get("a") is None
+    for key in "abc":
+        cache.set(key, key)
+    assert cache.get("a") is None and cache.stats["evictions"] == 1
@@ -0,0 +1,92 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockCollection
+from pymongo.errors import OperationFailure
+
+import server
+
+
+def shape(value):
+    """Replace every literal in a filter with a placeholder, keeping the structure."""
+    if isinstance(value, dict):
+        return {key: shape(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [shape(item) for item in value]
+    return "?"
+
+
+def registered_find_shapes():
+    return [(collection, shape(query)) for collection, query, _ in server.QUERY_SHAPES]
+
+
+def test_cursor_pages_use_a_registered_shape(api, governor, monkeypatch):
+    for title in ("One", "Two", "Three"):
+        api.post("/api/news", json={"title": title, "content": "x"}, headers=governor)
+    issued = []
+    original = AsyncMongoMockCollection.find
+
+    def find(self, *args, **kwargs):
+        issued.append((self.name, shape(args[0] if args else {})))
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncMongoMockCollection, "find", find)
+    first = api.get("/api/news?limit=1")
+    second = api.get(f"/api/news?limit=1&after={first.headers['X-Next-Cursor']}")
+    assert second.status_code == 200
+    assert second.json()[0]["title"] == "Two"
+    news_queries = [query for collection, query in issued if collection == "news"]
+    assert any("$and" in query for query in news_queries)
+    for query in news_queries:
+        assert ("news", query) in registered_find_shapes()
+
+
+def test_every_list_shape_has_a_cursor_variant():
+    shapes = registered_find_shapes()
+    for collection, query, sort in server.QUERY_SHAPES:
+        if sort and "$and" not in query:
+            cursor = server.keyset_filter(query, sort[0][0], sort[0][1] == server.DESCENDING, "v", "id")
+            assert (collection, shape(cursor)) in shapes
+
+
+def test_aggregations_and_counts_are_registered():
+    names = {(collection, name) for collection, name, _ in server.AGGREGATION_SHAPES}
+    assert ("news", "home news") in names
+    assert ("ministries", "org chart") in names
+    pipelines = {collection: [] for collection, _, _ in server.AGGREGATION_SHAPES}
+    for collection, _, pipeline in server.AGGREGATION_SHAPES:
+        pipelines[collection].append(pipeline())
+    assert server.home_news_pipeline() in pipelines["news"]
+    assert server.count_pipeline({"is_archive": False}) in pipelines["news"]
+    assert server.count_pipeline({"role": "x"}) in pipelines["users"]
+
+
+def test_winning_plans_are_found_inside_aggregation_stages():
+    explain = {"stages": [
+        {"$cursor": {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}}}},
+        {"$facet": {"ministries": [{"$lookup": {}}]}},
+    ]}
+    plans = server.winning_plans(explain)
+    assert [server.plan_stages(plan) for plan in plans] == [["FETCH", "IXSCAN"]]
+    assert server.winning_plans({"queryPlanner": {"winningPlan": {"stage": "COLLSCAN"}}}) == [{"stage": "COLLSCAN"}]
+
+
+def test_indexes_are_provisioned_at_startup(db):
+    asyncio.run(server.ensure_indexes())
+    for collection, models in server.INDEXES.items():
+        names = set(asyncio.run(db[collection].index_information()))
+        assert {model.document["name"] for model in models} <= names, collection
+
+
+def test_one_failing_index_does_not_stop_the_rest(db, monkeypatch, caplog):
+    create_indexes = AsyncMongoMockCollection.create_indexes
+
+    async def flaky(self, models, *args, **kwargs):
+        if self.name == "news" and models[0].document["name"] == "text_search":
+            raise OperationFailure("language override unsupported")
+        return await create_indexes(self, models, *args, **kwargs)
+
+    monkeypatch.setattr(AsyncMongoMockCollection, "create_indexes", flaky)
+    asyncio.run(server.ensure_indexes())
+    assert "Failed to build index news.text_search" in caplog.text
+    assert "is_archive_created_at_id" in asyncio.run(db.news.index_information())
+    assert "order_id" in asyncio.run(db.leadership.index_information())
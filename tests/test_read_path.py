@@ -0,0 +1,39 @@
+import asyncio
+
+import server
+from tests.conftest import reset_state
+
+LEGACY = {"id": "old", "title": "Legacy", "content": "Body", "created_at": "2023-01-01T00:00:00+00:00",
+          "is_archive": False, "internal_note": "not for the public"}
+
+
+def test_fast_path_matches_the_validated_response(api, db, governor, monkeypatch):
+    api.post("/api/news", json={"title": "Hello", "content": "World"}, headers=governor)
+    fast = api.get("/api/news").json()
+    monkeypatch.setattr(server, "READ_VALIDATION", True)
+    reset_state()
+    assert api.get("/api/news").json() == fast
+    assert set(fast[0]) == set(server.NewsResponse.model_fields)
+
+
+def test_projection_keeps_extra_fields_out(api, db):
+    asyncio.run(db.news.insert_one(dict(LEGACY)))
+    doc = api.get("/api/news/old").json()
+    assert "internal_note" not in doc and "_id" not in doc
+
+
+def test_normalize_fills_defaults_for_the_fast_path(api, db):
+    asyncio.run(db.news.insert_one({key: value for key, value in LEGACY.items() if key != "is_archive"}))
+    report = asyncio.run(server.normalize_documents())
+    assert report["news"] == {"checked": 1, "updated": 1, "invalid": 0}
+    doc = asyncio.run(db.news.find_one({"id": "old"}, {"_id": 0}))
+    assert doc["is_archive"] is False and doc["image"] is None and doc["version"] == 1
+
+
+def test_normalize_reports_documents_that_do_not_fit(db):
+    asyncio.run(db.news.insert_one({"id": "broken", "content": "no title", "created_at": "2023-01-01"}))
+    assert asyncio.run(server.normalize_documents())["news"]["invalid"] == 1
+
+
+def test_dump_json_keeps_non_ascii_readable():
+    assert server.dump_json({"title": "Бюджет"}).decode() == '{"title":"Бюджет"}'
@@ -0,0 +1,69 @@
+import asyncio
+import gc
+
+import server
+
+
+def test_stale_entry_is_served_while_a_kept_task_refreshes_it(db, clock):
+    cache = server.ResponseCache(server.MemoryResponseCacheBackend(10), ttl=10, stale_ttl=60)
+    bodies = iter([b'"v1"', b'"v2"'])
+    release = asyncio.Event()
+
+    async def build():
+        body = next(bodies)
+        if body == b'"v2"':
+            await release.wait()
+        return body, {}
+
+    async def scenario():
+        assert (await cache.get_or_build("k", ["news:list"], build)).body == b'"v1"'
+        clock.now += 30
+        assert (await cache.get_or_build("k", ["news:list"], build)).body == b'"v1"'
+        assert cache.stats["stale_hits"] == 1
+        assert len(cache.tasks) == 1
+        gc.collect()
+        release.set()
+        await asyncio.gather(*cache.tasks)
+        await asyncio.sleep(0)
+        assert not cache.tasks and not cache.refreshing
+        assert (await cache.get_or_build("k", ["news:list"], build)).body == b'"v2"'
+
+    asyncio.run(scenario())
+
+
+def test_failed_refresh_is_logged_and_released(db, clock, caplog):
+    cache = server.ResponseCache(server.MemoryResponseCacheBackend(10), ttl=10, stale_ttl=60)
+    calls = []
+
+    async def build():
+        calls.append(1)
+        if len(calls) > 1:
+            raise RuntimeError("database went away")
+        return b'"v1"', {}
+
+    async def scenario():
+        await cache.get_or_build("k", [], build)
+        clock.now += 30
+        await cache.get_or_build("k", [], build)
+        await asyncio.gather(*cache.tasks)
+        await asyncio.sleep(0)
+        assert not cache.tasks and not cache.refreshing
+
+    asyncio.run(scenario())
+    assert "Background refresh failed for k" in caplog.text
+
+
+def test_expired_entry_is_rebuilt_inline(db, clock):
+    cache = server.ResponseCache(server.MemoryResponseCacheBackend(10), ttl=10, stale_ttl=60)
+    bodies = iter([b"1", b"2"])
+
+    async def build():
+        return next(bodies), {}
+
+    async def scenario():
+        await cache.get_or_build("k", [], build)
+        clock.now += 100
+        assert (await cache.get_or_build("k", [], build)).body == b"2"
+        assert cache.stats["misses"] == 2 and not cache.tasks
+
+    asyncio.run(scenario())
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from pymongo.errors import OperationFailure
+
+import server
+
+
+@pytest.fixture
+def no_text_index(monkeypatch):
+    calls = []
+
+    async def mongo_search(q, collections, fetch_limit):
+        calls.append(q)
+        raise OperationFailure("text index required for $text query", code=27)
+
+    monkeypatch.setattr(server, "SEARCH_BACKEND", "auto")
+    monkeypatch.setattr(server, "mongo_search", mongo_search)
+    return calls
+
+
+def create_news(api, headers, title, content="text"):
+    response = api.post("/api/news", json={"title": title, "content": content}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def test_falls_back_to_memory_and_retries_text_after_cooldown(api, governor, clock, no_text_index):
+    create_news(api, governor, "Бюджет утвержден")
+    response = api.get("/api/search", params={"q": "бюджет"}).json()
+    assert response["backend"] == "memory"
+    assert [hit["title"] for hit in response["results"]] == ["Бюджет утвержден"]
+    assert len(no_text_index) == 1
+
+    # Within the cooldown $text is not tried again
+    api.get("/api/search", params={"q": "бюджет"})
+    assert len(no_text_index) == 1
+
+    clock.now += server.SEARCH_RETRY_SECONDS + 1
+    api.get("/api/search", params={"q": "бюджет"})
+    assert len(no_text_index) == 2
+
+
+def test_text_search_recovers_after_cooldown(api, governor, clock, no_text_index, monkeypatch):
+    create_news(api, governor, "Бюджет утвержден")
+    api.get("/api/search", params={"q": "бюджет"})
+    assert server.search_index.loaded
+
+    async def mongo_search(q, collections, fetch_limit):
+        return [], False
+
+    monkeypatch.setattr(server, "mongo_search", mongo_search)
+    clock.now += server.SEARCH_RETRY_SECONDS + 1
+    assert api.get("/api/search", params={"q": "бюджет"}).json()["backend"] == "mongo"
+    assert server.search_state["backend"] == "mongo"
+    assert not server.search_index.loaded
+
+
+def test_memory_search_respects_the_latency_budget(db, monkeypatch):
+    release = asyncio.Event()
+    load_collection = server.search_index.load_collection
+
+    async def slow_load(collection):
+        await release.wait()
+        await load_collection(collection)
+
+    monkeypatch.setattr(server.search_index, "load_collection", slow_load)
+
+    async def scenario():
+        assert not await server.search_index.ready(0.01)
+        assert server.search_index.snapshot()["building"]
+        # The build keeps running and a later request can use it
+        release.set()
+        assert await server.search_index.ready(1)
+
+    asyncio.run(scenario())
+
+
+def test_write_during_build_is_not_lost(db, monkeypatch):
+    asyncio.run(db.news.insert_one({"id": "n1", "title": "Старый заголовок", "content": ""}))
+    scanned, release = asyncio.Event(), asyncio.Event()
+    load_collection = server.search_index.load_collection
+
+    async def paused_load(collection):
+        await load_collection(collection)
+        if collection == "news":
+            scanned.set()
+            await release.wait()
+
+    monkeypatch.setattr(server.search_index, "load_collection", paused_load)
+
+    async def scenario():
+        build = asyncio.create_task(server.search_index.load())
+        await scanned.wait()
+        # The scan already read the old title; this write lands before the build finishes
+        await db.news.update_one({"id": "n1"}, {"$set": {"title": "Новый заголовок"}})
+        await server.publish_change("news", "update", "n1")
+        await db.news.insert_one({"id": "n2", "title": "Новый документ", "content": ""})
+        await server.publish_change("news", "insert", "n2")
+        release.set()
+        await build
+
+    asyncio.run(scenario())
+    assert server.search_index.docs[("news", "n1")]["title"] == "Новый заголовок"
+    assert ("news", "n2") in server.search_index.docs
+    assert not server.search_index.search({server.stem("старый")}, ["news"])
+
+
+def test_collection_reset_during_build_rescans_it(db, monkeypatch):
+    asyncio.run(db.news.insert_one({"id": "n1", "title": "Первый", "content": ""}))
+    scanned, release = asyncio.Event(), asyncio.Event()
+    load_collection = server.search_index.load_collection
+
+    async def paused_load(collection):
+        await load_collection(collection)
+        if collection == "news" and not scanned.is_set():
+            scanned.set()
+            await release.wait()
+
+    monkeypatch.setattr(server.search_index, "load_collection", paused_load)
+
+    async def scenario():
+        build = asyncio.create_task(server.search_index.load())
+        await scanned.wait()
+        await db.news.delete_many({})
+        await db.news.insert_one({"id": "n2", "title": "Второй", "content": ""})
+        await server.publish_change("news", "import", None)
+        release.set()
+        await build
+
+    asyncio.run(scenario())
+    assert server.search_index.loaded
+    assert [key for key in server.search_index.docs if key[0] == "news"] == [("news", "n2")]
+
+
+def test_russian_word_forms_share_a_stem():
+    assert server.stem("бюджета") == server.stem("бюджетом") == server.stem("Бюджет")
+    assert server.query_stems("о бюджете 2024") == {server.stem("бюджете"), "2024"}
+
+
+def test_highlights_are_offsets_into_the_snippet():
+    text = "Вступление. " * 30 + "Новый бюджет принят."
+    snippet, spans = server.highlight(text, {server.stem("бюджет")}, 60)
+    assert snippet.startswith("…")
+    assert [snippet[start:end] for start, end in spans] == ["бюджет"]
+
+
+def test_memory_ranking_prefers_title_matches(api, governor, no_text_index):
+    create_news(api, governor, "Погода", content="Обсуждали бюджет")
+    create_news(api, governor, "Бюджет", content="Подробности")
+    response = api.get("/api/search", params={"q": "бюджет", "types": "news"}).json()
+    assert [hit["title"] for hit in response["results"]] == ["Бюджет", "Погода"]
+    assert api.get("/api/search", params={"q": "бюджет", "types": "users"}).status_code == 400
@@ -0,0 +1,70 @@
+import asyncio
+import importlib
+import logging
+
+import uvicorn
+
+import server
+
+
+def test_single_worker_has_no_shared_state_warnings():
+    assert server.shared_state_warnings(1) == []
+
+
+def test_multi_worker_warnings_cover_every_stale_component(monkeypatch):
+    monkeypatch.setattr(server, "CHANGE_STREAMS_ENABLED", False)
+    notes = " ".join(server.shared_state_warnings(4))
+    for component in ("ETag/304", "HOME_SNAPSHOT_TTL", "PRERENDER_TTL", "PRINCIPAL_CACHE_TTL",
+                      "search index", "live updates"):
+        assert component in notes
+
+
+def test_change_streams_silence_cache_warnings(monkeypatch):
+    monkeypatch.setattr(server, "CHANGE_STREAMS_ENABLED", True)
+    monkeypatch.setattr(server, "RATE_LIMIT_BACKEND", "mongo")
+    monkeypatch.setattr(server, "METRICS_ENABLED", False)
+    assert server.shared_state_warnings(4) == []
+
+
+def test_launcher_logs_an_error_without_change_streams(monkeypatch, caplog):
+    calls = []
+    monkeypatch.setattr(uvicorn, "run", lambda app, **options: calls.append((app, options)))
+    monkeypatch.setattr(server, "CHANGE_STREAMS_ENABLED", False)
+    with caplog.at_level(logging.WARNING, logger=server.logger.name):
+        server.run_server("127.0.0.1", 8001, 2, 0, 128, 5)
+    # The import string names the module already loaded, so workers get this very app
+    module, _, attribute = calls[0][0].partition(":")
+    assert getattr(importlib.import_module(module), attribute) is server.app
+    assert calls[0][1]["workers"] == 2
+    assert any(record.levelno == logging.ERROR and "CHANGE_STREAMS_ENABLED" in record.message
+               for record in caplog.records)
+
+
+def test_home_snapshot_expires_after_ttl(db, monkeypatch):
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return {"counts": {"news": len(builds)}}
+
+    monkeypatch.setattr(server, "build_home_payload", build)
+
+    async def scenario():
+        first = await server.home_snapshot.get()
+        assert await server.home_snapshot.get() is first
+        first.created_at -= server.HOME_SNAPSHOT_TTL + 1
+        second = await server.home_snapshot.get()
+        assert second is not first
+        return second
+
+    assert b'"news":2' in asyncio.run(scenario()).body
+    assert len(builds) == 2
+
+
+def test_prerendered_page_expires_after_ttl(db):
+    page = server.PrerenderedPage(path="news", body=b"<html></html>", etag='"p-1"',
+                                  created_at=server.time.time() - server.PRERENDER_TTL - 1)
+    server.page_snapshots.pages["news"] = page
+    # Without a built frontend there is no template, so the stale page is simply dropped
+    assert asyncio.run(server.page_snapshots.get("/news")) is None
+    assert "news" not in server.page_snapshots.pages
@@ -0,0 +1,67 @@
+import gzip
+import json
+
+import pytest
+
+import server
+
+SCRIPT = b"console.log('state');\n" * 200
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch, db):
+    (tmp_path / "static" / "js").mkdir(parents=True)
+    (tmp_path / "static" / "js" / "main.5dd10092.js").write_bytes(SCRIPT)
+    (tmp_path / "index.html").write_text('<html><head><title>App</title></head><body><div id="root"></div></body></html>')
+    (tmp_path / "robots.txt").write_text("User-agent: *\n")
+    (tmp_path / "asset-manifest.json").write_text(json.dumps({"files": {"main.js": "/static/js/main.5dd10092.js"}}))
+    assets = server.StaticAssets(tmp_path)
+    assets.load()
+    monkeypatch.setattr(server, "static_assets", assets)
+    return assets
+
+
+def test_cache_control_depends_on_fingerprint(api, build):
+    assert api.get("/static/js/main.5dd10092.js").headers["Cache-Control"] == server.STATIC_IMMUTABLE_CACHE_CONTROL
+    assert api.get("/robots.txt").headers["Cache-Control"] == server.STATIC_DEFAULT_CACHE_CONTROL
+    assert api.get("/").headers["Cache-Control"] == server.STATIC_INDEX_CACHE_CONTROL
+
+
+def test_precompressed_body_is_served_for_accepting_clients(api, build):
+    response = api.get("/static/js/main.5dd10092.js", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.headers["Vary"] == "Accept-Encoding"
+    assert response.content == SCRIPT  # httpx decodes it
+    assert build.get("static/js/main.5dd10092.js").encodings["gzip"] == gzip.compress(SCRIPT, compresslevel=9, mtime=0)
+
+    plain = api.get("/static/js/main.5dd10092.js", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers
+    assert plain.content == SCRIPT
+
+
+def test_etag_and_range(api, build):
+    etag = api.get("/static/js/main.5dd10092.js").headers["ETag"]
+    assert api.get("/static/js/main.5dd10092.js", headers={"If-None-Match": etag}).status_code == 304
+
+    part = api.get("/static/js/main.5dd10092.js", headers={"Range": "bytes=0-9", "Accept-Encoding": "identity"})
+    assert part.status_code == 206
+    assert part.content == SCRIPT[:10]
+    assert part.headers["Content-Range"] == f"bytes 0-9/{len(SCRIPT)}"
+    assert api.get("/static/js/main.5dd10092.js", headers={"Range": f"bytes={len(SCRIPT)}-"}).status_code == 416
+
+
+def test_missing_hashed_file_is_404_not_index(api, build):
+    assert api.get("/static/js/main.00000000.js").status_code == 404
+
+
+def test_client_routes_fall_back_to_index(api, build):
+    response = api.get("/admin/settings")
+    assert response.status_code == 200
+    assert b'<div id="root">' in response.content
+
+
+def test_accept_encoding_parsing():
+    assert server.pick_encoding("gzip, br", {"br": b"", "gzip": b""}) == "br"
+    assert server.pick_encoding("br;q=0, gzip", {"br": b"", "gzip": b""}) == "gzip"
+    assert server.pick_encoding("*", {"gzip": b""}) == "gzip"
+    assert server.pick_encoding("deflate", {"gzip": b""}) is None
@@ -0,0 +1,79 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+import server
+
+
+@pytest.fixture
+def image_pool(monkeypatch):
+    # Threads instead of processes: same code path without spawning workers in tests
+    pool = ThreadPoolExecutor(max_workers=1)
+    monkeypatch.setattr(server, "image_pool", pool)
+    yield pool
+    pool.shutdown()
+
+
+def png(size=(800, 400), color=(200, 30, 30)):
+    buffer = BytesIO()
+    Image.new("RGB", size, color).save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+def upload(api, headers, data, name="photo.png"):
+    return api.post("/api/upload", files={"file": (name, data, "application/octet-stream")}, headers=headers)
+
+
+def tmp_files():
+    return list((server.MEDIA_DIR / "tmp").glob("*"))
+
+
+def test_upload_sniffs_type_and_renders_webp_variants(api, governor, image_pool):
+    response = upload(api, governor, png())
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["content_type"] == "image/png"
+    assert set(body["variants"]) == set(server.IMAGE_VARIANTS)
+
+    thumb = api.get(body["variants"]["thumb"])
+    assert thumb.status_code == 200
+    assert thumb.headers["content-type"] == "image/webp"
+    with Image.open(BytesIO(thumb.content)) as image:
+        assert max(image.size) == server.IMAGE_VARIANTS["thumb"]
+    assert not tmp_files()
+
+
+def test_same_upload_reuses_the_stored_variants(api, governor, image_pool, db):
+    data = png(color=(1, 2, 3))
+    first = upload(api, governor, data).json()
+    second = upload(api, governor, data).json()
+    assert first == second
+
+
+def test_oversized_upload_is_rejected_without_leftovers(api, governor, monkeypatch):
+    monkeypatch.setattr(server, "MAX_UPLOAD_BYTES", 1024)
+    monkeypatch.setattr(server, "UPLOAD_CHUNK_SIZE", 256)
+    assert upload(api, governor, png(size=(400, 400), color=(0, 0, 0)) + b"\0" * 2048).status_code == 413
+    assert not tmp_files()
+
+
+def test_non_image_is_rejected(api, governor):
+    assert upload(api, governor, b"<svg onload=alert(1)>", name="x.png").status_code == 415
+    assert not tmp_files()
+
+
+def test_upload_requires_authentication(api):
+    assert upload(api, {}, png()).status_code in (401, 403)
+
+
+def test_image_pool_is_recreated_after_shutdown(api, governor, image_pool, monkeypatch):
+    monkeypatch.setattr(server, "ProcessPoolExecutor", ThreadPoolExecutor)
+    server.shutdown_image_pool()
+    assert server.image_pool is None
+    # A second lifespan in the same process still renders variants
+    body = upload(api, governor, png()).json()
+    assert set(body["variants"]) == set(server.IMAGE_VARIANTS)
+    assert server.image_pool is not None and server.image_pool is not image_pool
+    server.shutdown_image_pool()